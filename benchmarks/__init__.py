@@ -0,0 +1,9 @@
+# Offline benchmarks for Penny: a local Gemini stand-in, scripted conversations driven through
+# streamlit.testing.v1.AppTest, a concurrent-session load generator, an import-time profile
+# of every page, a bulk transaction import run and a full-versus-fragment rerun comparison.
+# No network access needed.
+#
+#     python -m benchmarks --sessions 20 --concurrency 4 --latency 0.2
+#     python -m benchmarks.import_time --max-ms welcome=100
+#     python -m benchmarks.transactions --rows 100000 --max-seconds 5
+#     python -m benchmarks.reruns --goals 1,5,20 --messages 10,50,100
@@ -0,0 +1,49 @@
+import argparse
+import json
+import sys
+
+from benchmarks.fake_gemini import MALFORMED_KINDS, FakeGeminiConfig
+from benchmarks.load import run_load
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline load test for Penny.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake model latency per call, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Delay between streamed chunks, in seconds")
+    parser.add_argument("--malformed", choices=MALFORMED_KINDS)
+    parser.add_argument("--malformed-rate", type=float, default=1.0)
+    parser.add_argument("--trace-memory", action="store_true", help="Report traced memory (slows reruns down)")
+    parser.add_argument("--max-rerun-p95-ms", type=float, help="Fail if the overall p95 rerun time exceeds this")
+    parser.add_argument("--max-calls-per-session", type=float, help="Fail if model calls per session exceed this")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    config = FakeGeminiConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        chunk_delay=args.chunk_delay,
+        malformed=args.malformed,
+        malformed_rate=args.malformed_rate,
+    )
+    report = run_load(sessions=args.sessions, concurrency=args.concurrency, config=config, trace_memory=args.trace_memory)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    failures = list(report["errors"])
+    if args.max_rerun_p95_ms is not None and report["rerun_p95_ms"] > args.max_rerun_p95_ms:
+        failures.append(f"rerun p95 {report['rerun_p95_ms']}ms exceeds {args.max_rerun_p95_ms}ms")
+    if args.max_calls_per_session is not None and report["model_calls_per_session"] > args.max_calls_per_session:
+        failures.append(f"{report['model_calls_per_session']} model calls per session exceeds {args.max_calls_per_session}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# Scripted user sessions, seeded from the app's own assets: persona names and expense categories
+# from convo.json, and the example reply (with its follow-up suggestions) in the chat system prompt.
+import functools
+import json
+import os
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=None)
+def app_config():
+    with open(os.path.join(REPO_DIR, "convo.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def reference_reply():
+    # The example JSON object that follows "Expected JSON Output:" in the prompt template
+    with open(os.path.join(REPO_DIR, "assets", "prompts", "chat_system.txt"), encoding="utf-8") as f:
+        text = f.read()
+    example = text[text.find("Expected JSON Output:"):]
+    return json.loads(example[example.find("{"):example.find("}\n") + 1])
+
+
+def build_scripts():
+    categories = app_config()["app_config"]["expense_categories"]
+    example = reference_reply()
+    expenses = ", ".join(f"{category.lower()} {100 + 50 * i} XCD" for i, category in enumerate(categories))
+    return {
+        "onboarding": ["Hi", "1500 XCD", f"My expenses are {expenses}", "Is my budget okay?"],
+        "follow_ups": ["Hello", example["predictiveText1"], example["predictiveText2"]],
+        "faq": ["How do I start a budget?", "What is an emergency fund?", "How much should I save each month?"],
+        "quit": ["hey", "bye"],
+    }
+
+
+def personas():
+    return [persona["name"] for persona in app_config()["app_config"]["personalities"]]
@@ -0,0 +1,138 @@
+# Drop-in replacement for google.generativeai.GenerativeModel with configurable latency,
+# streaming and malformed output. install() patches the genai module in place, so the app
+# picks it up the next time it builds a model.
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import types
+
+import google.generativeai as genai
+
+from benchmarks.conversations import reference_reply
+
+MALFORMED_KINDS = ("fenced", "preamble", "trailing_comma", "smart_quotes", "truncated")
+
+
+class FakeGeminiConfig:
+    def __init__(self, latency=0.0, jitter=0.0, chunk_size=12, chunk_delay=0.0, malformed=None, malformed_rate=1.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.malformed = malformed
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+
+
+class CallCounter:
+    def __init__(self):
+        self.total = 0
+        self.streamed = 0
+        self._lock = threading.Lock()
+
+    def add(self, stream):
+        with self._lock:
+            self.total += 1
+            self.streamed += int(stream)
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+            self.streamed = 0
+
+
+def malform(text, kind):
+    if kind == "fenced":
+        return f"```json\n{text}\n```"
+    if kind == "preamble":
+        return f"Sure! Here's my reply:\n{text}\nLet me know {{if}} you need anything else."
+    if kind == "trailing_comma":
+        return text[:-1] + ",}"
+    if kind == "smart_quotes":
+        return text.replace('"response":', "“response”:", 1)
+    if kind == "truncated":
+        return text[:len(text) // 2]
+    return text
+
+
+def reply_for(contents, system_instruction=""):
+    # Batched goal requests get one explanation per goal id; everything else gets a chat reply,
+    # with budget_data (the first figure as income) when the system instruction asks for it
+    goal_ids = re.findall(r'"id": (\d+)', contents)
+    if goal_ids and '"goals"' in contents:
+        return json.dumps({"goals": [
+            {"id": int(i), "verdict": "achievable", "explanation": f"Benchmark explanation for goal {i}."}
+            for i in goal_ids
+        ]})
+    reply = dict(reference_reply())
+    reply["response"] = f"{reply['response']} (re: {contents[-60:].strip()})"
+    if '"budget_data"' in system_instruction:
+        figures = re.findall(r"\d+(?:\.\d+)?", contents.rsplit("###", 1)[-1])
+        reply["budget_data"] = {"income": float(figures[0]) if figures else None, "expenses": {}, "goals": []}
+    return json.dumps(reply, ensure_ascii=False)
+
+
+def make_response(text, contents):
+    usage = types.SimpleNamespace(prompt_token_count=len(contents) // 4, candidates_token_count=len(text) // 4)
+    return types.SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeGenerativeModel:
+    config = FakeGeminiConfig()
+    calls = CallCounter()
+
+    def __init__(self, model_name=None, system_instruction=None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction or ""
+
+    def _text(self, contents):
+        text = reply_for(contents, self.system_instruction)
+        config = self.config
+        if config.malformed and config.rng.random() < config.malformed_rate:
+            text = malform(text, config.malformed)
+        return text
+
+    def _delay(self):
+        return max(self.config.latency + self.config.rng.uniform(-self.config.jitter, self.config.jitter), 0.0)
+
+    def _chunks(self, text):
+        size = self.config.chunk_size
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        contents = str(contents)
+        self.calls.add(stream)
+        time.sleep(self._delay())
+        text = self._text(contents)
+        if not stream:
+            return make_response(text, self.system_instruction + contents)
+        return [make_response(chunk, contents) for chunk in self._chunks(text)]
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        contents = str(contents)
+        self.calls.add(stream)
+        await asyncio.sleep(self._delay())
+        text = self._text(contents)
+        if not stream:
+            return make_response(text, self.system_instruction + contents)
+
+        async def chunks():
+            for chunk in self._chunks(text):
+                await asyncio.sleep(self.config.chunk_delay)
+                yield make_response(chunk, contents)
+        return chunks()
+
+    def count_tokens(self, contents, **kwargs):
+        return types.SimpleNamespace(total_tokens=len(str(contents)) // 4)
+
+
+def install(config=None):
+    if config is not None:
+        FakeGenerativeModel.config = config
+    FakeGenerativeModel.calls.reset()
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.configure = lambda **kwargs: None
+    return FakeGenerativeModel
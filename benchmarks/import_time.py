@@ -0,0 +1,111 @@
+# Import-time profile per page: each page module is imported in a fresh interpreter under
+# `python -X importtime`, after streamlit itself, so the report shows what opening that page
+# first costs on top of Streamlit and which dependencies account for it.
+#
+#     python -m benchmarks.import_time --runs 3 --max-ms welcome=100 --max-ms login=100
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.conversations import REPO_DIR
+
+VIEWS_DIR = os.path.join(REPO_DIR, "penny", "views")
+HEAVY_MODULES = ("pandas", "numpy", "plotly.express", "google.generativeai", "markdown_it")
+
+
+def page_names():
+    return sorted(name[:-3] for name in os.listdir(VIEWS_DIR) if name.endswith(".py") and name != "__init__.py")
+
+
+def parse_importtime(stderr):
+    # [(name, depth, cumulative_us)] in the order -X importtime prints them (children first)
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+
+def direct_imports(entries, prefix="penny"):
+    # Modules imported straight from the app's own code, with their cumulative cost
+    parents = {}
+    stack = []
+    for i in range(len(entries) - 1, -1, -1):
+        name, depth, _ = entries[i]
+        while stack and stack[-1][1] >= depth:
+            stack.pop()
+        parents[i] = stack[-1][0] if stack else None
+        stack.append((name, depth))
+    return {
+        name: cumulative for i, (name, depth, cumulative) in enumerate(entries)
+        if not name.startswith(prefix) and parents[i] and parents[i].startswith(prefix)
+    }
+
+
+def profile_page(page):
+    module = f"penny.views.{page}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    entries = parse_importtime(completed.stderr)
+    # Everything after streamlit's own top-level entry was imported because of the page
+    start = next(i for i, (name, depth, _) in enumerate(entries) if name == "streamlit" and depth == 0) + 1
+    page_entries = entries[start:]
+    loaded = {name for name, _, _ in page_entries}
+    return {
+        "import_ms": sum(cumulative for _, depth, cumulative in page_entries if depth == 0) / 1000,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in loaded],
+        "direct_imports_ms": {name: cumulative / 1000 for name, cumulative in direct_imports(page_entries).items()},
+    }
+
+
+def run_profile(pages, runs=1):
+    report = {}
+    for page in pages:
+        samples = [profile_page(page) for _ in range(runs)]
+        slowest = max(samples, key=lambda sample: sample["import_ms"])
+        heaviest = sorted(slowest["direct_imports_ms"].items(), key=lambda item: -item[1])[:5]
+        report[page] = {
+            "import_ms": round(statistics.median(sample["import_ms"] for sample in samples), 1),
+            "heavy_modules": slowest["heavy_modules"],
+            "heaviest_imports_ms": {name: round(ms, 1) for name, ms in heaviest},
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description="Import-time profile per page.")
+    parser.add_argument("--pages", help="Comma-separated page names (default: every module in penny/views)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per page; the median is reported")
+    parser.add_argument("--max-ms", action="append", default=[], metavar="PAGE=MS",
+                        help="Fail if importing PAGE takes longer than MS milliseconds (repeatable)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    pages = args.pages.split(",") if args.pages else page_names()
+    report = run_profile(pages, args.runs)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    failures = []
+    for limit in args.max_ms:
+        page, ms = limit.split("=")
+        if page in report and report[page]["import_ms"] > float(ms):
+            failures.append(f"importing the {page} page took {report[page]['import_ms']}ms, over {ms}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# Drives scripted sessions through AppTest, sequentially or from a process pool, and collects
+# per-interaction rerun times, model-call counts and the size of each session's state.
+import os
+import pickle
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import fake_gemini
+from benchmarks.conversations import REPO_DIR, build_scripts, personas
+
+APP_PATH = os.path.join(REPO_DIR, "streamlit_app.py")
+
+
+def prepare_environment(workdir=None):
+    # Everything the app reads at startup, pointed at throwaway local resources
+    workdir = workdir or tempfile.mkdtemp(prefix="penny-bench-")
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["PENNY_CACHE_BACKEND"] = "memory"
+    os.environ["PENNY_PERSIST_USER_DATA"] = "true"
+    os.environ["PENNY_STORE_BACKEND"] = "sqlite"
+    os.environ["PENNY_STORE_PATH"] = os.path.join(workdir, "penny_data.sqlite3")
+    os.environ["PENNY_FAQ_INDEX_DIR"] = os.path.join(workdir, "faq_index")
+    os.environ["PENNY_FAQ_LEARNED_PATH"] = os.path.join(workdir, "faq_learned.jsonl")
+    return workdir
+
+
+def session_state_bytes(at):
+    total = 0
+    for key, value in at.session_state.items():
+        try:
+            total += len(pickle.dumps(value))
+        except Exception:
+            # Unpicklable entries (e.g. widget internals) are skipped
+            continue
+    return total
+
+
+class SessionResult:
+    def __init__(self, name):
+        self.name = name
+        self.rerun_ms = {}
+        self.errors = []
+        self.state_bytes = 0
+
+    def timed(self, label, at, action):
+        started = time.perf_counter()
+        try:
+            action()
+        except Exception as e:
+            # A missing widget usually means the previous rerun failed; keep the session going
+            self.errors.append(f"{label}: {type(e).__name__}: {e}")
+            return
+        self.rerun_ms.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            self.errors.append(f"{label}: {at.exception[0].message}")
+
+
+def run_session(index, script_name, messages, persona, timeout=30):
+    from streamlit.testing.v1 import AppTest
+
+    result = SessionResult(f"{script_name}#{index}")
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state["logged_in"] = True
+    at.session_state["user_id"] = f"bench-{index}@example.com"
+    at.session_state["user_name"] = f"Bench{index}"
+    at.session_state["persona"] = persona
+    at.session_state["page"] = "home"
+    result.timed("home", at, at.run)
+    if not at.chat_input:
+        result.errors.append("home: chat input did not render")
+        return result
+
+    for message in messages:
+        result.timed("chat", at, lambda: at.chat_input[0].set_value(message).run())
+
+    at.session_state["page"] = "budget"
+    result.timed("budget", at, at.run)
+    for widget, value in zip(at.text_input, ("1500", "1100", "500", "300", "100", "50")):
+        widget.set_value(value)
+    result.timed("budget_save", at, lambda: at.button(key="FormSubmitter:budget_form-Save Budget Details").click().run())
+
+    at.session_state["page"] = "goals"
+    result.timed("goals", at, at.run)
+    for widget, value in zip(at.text_input, ("Laptop", "1200", "6")):
+        widget.set_value(value)
+    result.timed("goal_save", at, lambda: at.button(key="FormSubmitter:goal_form-Check Achievability & Save").click().run())
+
+    # The second Graphs visit should be served from the figure cache
+    at.session_state["page"] = "graphs"
+    result.timed("graphs", at, at.run)
+    result.timed("graphs", at, at.run)
+
+    result.state_bytes = session_state_bytes(at)
+    return result
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def summarize(results, elapsed, calls, streamed):
+    by_label = {}
+    for result in results:
+        for label, values in result.rerun_ms.items():
+            by_label.setdefault(label, []).extend(values)
+    all_reruns = [value for values in by_label.values() for value in values]
+    return {
+        "sessions": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "model_calls": calls,
+        "model_calls_streamed": streamed,
+        "model_calls_per_session": round(calls / max(len(results), 1), 2),
+        "rerun_ms": {
+            label: {
+                "count": len(values),
+                "p50": round(statistics.median(values), 2),
+                "p95": round(percentile(values, 0.95), 2),
+                "max": round(max(values), 2),
+            }
+            for label, values in sorted(by_label.items())
+        },
+        "rerun_p95_ms": round(percentile(all_reruns, 0.95), 2) if all_reruns else 0.0,
+        "session_state_bytes": {
+            "mean": round(statistics.mean(r.state_bytes for r in results)) if results else 0,
+            "max": max((r.state_bytes for r in results), default=0),
+        },
+        "errors": [error for result in results for error in result.errors],
+    }
+
+
+def run_batch(plan, config, workdir, trace_memory=False):
+    # One worker: its own fake model and app caches, sessions run back to back
+    prepare_environment(workdir)
+    fake = fake_gemini.install(config)
+    # tracemalloc slows every allocation down, so rerun times are only meaningful without it
+    if trace_memory:
+        tracemalloc.start()
+    results = [run_session(*args) for args in plan]
+    memory = (0, 0)
+    if trace_memory:
+        memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return results, fake.calls.total, fake.calls.streamed, memory
+
+
+def run_load(sessions=8, concurrency=1, config=None, scripts=None, trace_memory=False):
+    workdir = prepare_environment()
+    scripts = scripts or build_scripts()
+    persona_names = personas()
+    plan = [
+        (i, name, scripts[name], persona_names[i % len(persona_names)])
+        for i, name in zip(range(sessions), (list(scripts) * sessions)[:sessions])
+    ]
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        batches = [run_batch(plan, config, workdir, trace_memory)]
+    else:
+        # AppTest is not safe to drive from several threads (reruns intermittently come back
+        # empty), so concurrent sessions run in worker processes sharing one store file.
+        chunks = [plan[i::concurrency] for i in range(concurrency)]
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(run_batch, chunk, config, workdir, trace_memory) for chunk in chunks if chunk]
+            batches = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    results = [result for batch in batches for result in batch[0]]
+    report = summarize(results, elapsed, sum(b[1] for b in batches), sum(b[2] for b in batches))
+    if trace_memory:
+        current = sum(b[3][0] for b in batches)
+        peak = sum(b[3][1] for b in batches)
+        report["traced_memory_bytes"] = {"current": current, "peak": peak, "per_session": current // max(sessions, 1)}
+    return report
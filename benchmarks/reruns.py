@@ -0,0 +1,133 @@
+# Work per interaction with and without fragments. AppTest always reruns the whole script, so
+# each interaction is timed as a full rerun, which is what every click cost before the pages used
+# st.fragment, while the telemetry span of the fragment holding the widget is the work a
+# fragment-scoped rerun does now. Sessions are seeded with a range of goal and message counts to
+# show how each cost grows.
+#
+#     python -m benchmarks.reruns --goals 1,5,20 --messages 10,50,100 --runs 5
+import argparse
+import datetime
+import json
+import logging
+import statistics
+import sys
+import time
+
+from benchmarks import fake_gemini
+from benchmarks.load import APP_PATH, prepare_environment
+
+SAVINGS_PER_GOAL = 20
+
+
+class SpanCollector(logging.Handler):
+    # Receives the JSON line penny.telemetry logs for every span
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+
+    def emit(self, record):
+        span = json.loads(record.getMessage())
+        self.spans.append((span["span"], span["duration_ms"]))
+
+    def first(self, name):
+        return next((duration for span, duration in self.spans if span == name), None)
+
+
+def new_session(user_id, page, goals=0, messages=0):
+    from streamlit.testing.v1 import AppTest
+
+    from penny.budget import SavingsHistory
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["logged_in"] = True
+    at.session_state["user_id"] = user_id
+    at.session_state["user_name"] = "Bench"
+    at.session_state["persona"] = "Friendly"
+    at.session_state["page"] = page
+    at.session_state["budget"] = {'income': 1500.0, 'monthly_budget': 1000.0, 'rent': 500.0, 'food': 300.0, 'transport': 100.0, 'liabilities': 50.0}
+    start = datetime.date.today() - datetime.timedelta(days=SAVINGS_PER_GOAL)
+    at.session_state["goals"] = [
+        {
+            'goal_name': f"Goal {i + 1}",
+            'goal_amount': 1000.0 + 100 * i,
+            'time_span': 12,
+            'savings_history': SavingsHistory({'date': start + datetime.timedelta(days=d), 'amount': 10.0} for d in range(SAVINGS_PER_GOAL)),
+            'created': start.isoformat(),
+        }
+        for i in range(goals)
+    ]
+    at.session_state["messages"] = [
+        {"seq": i, "role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} about my budget for rent and food."}
+        for i in range(messages)
+    ]
+    at.session_state["next_message_seq"] = messages
+    at.session_state["history_loaded"] = True
+    at.run()
+    return at
+
+
+def measure(collector, span, interact, runs):
+    full, fragment = [], []
+    for _ in range(runs):
+        collector.spans.clear()
+        started = time.perf_counter()
+        at = interact()
+        full.append((time.perf_counter() - started) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        fragment.append(collector.first(span))
+    full_ms, fragment_ms = statistics.median(full), statistics.median(fragment)
+    return {
+        "full_rerun_ms": round(full_ms, 2),
+        "fragment_rerun_ms": round(fragment_ms, 2),
+        "reduction": round(full_ms / fragment_ms, 1) if fragment_ms else None,
+    }
+
+
+def run_benchmark(goal_counts, message_counts, runs):
+    prepare_environment()
+    fake_gemini.install(fake_gemini.FakeGeminiConfig())
+    collector = SpanCollector()
+    telemetry_logger = logging.getLogger("penny.telemetry")
+    telemetry_logger.addHandler(collector)
+    telemetry_logger.setLevel(logging.INFO)
+
+    report = {"log_savings": {}, "send_chat_message": {}}
+    for count in goal_counts:
+        at = new_session(f"reruns-goals-{count}@example.com", "goals", goals=count)
+
+        def log_savings():
+            at.text_input(key="amount_str_0").set_value("10")
+            return at.button(key="FormSubmitter:savings_form_0-Log Savings").click().run()
+
+        report["log_savings"][f"{count}_goals"] = measure(collector, "fragment.goal", log_savings, runs)
+    for count in message_counts:
+        at = new_session(f"reruns-chat-{count}@example.com", "home", messages=count)
+        report["send_chat_message"][f"{count}_messages"] = measure(
+            collector, "fragment.chat", lambda: at.chat_input[0].set_value("How should I split my budget this month?").run(), runs
+        )
+    telemetry_logger.removeHandler(collector)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.reruns", description="Full-script versus fragment rerun cost.")
+    parser.add_argument("--goals", default="1,5,20", help="Comma-separated goal counts")
+    parser.add_argument("--messages", default="10,50,100", help="Comma-separated chat history lengths")
+    parser.add_argument("--runs", type=int, default=5, help="Interactions per session; the median is reported")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        [int(count) for count in args.goals.split(",")], [int(count) for count in args.messages.split(",")], args.runs
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
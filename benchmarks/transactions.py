@@ -0,0 +1,98 @@
+# Bulk import throughput: a synthetic multi-year bank export (CSV or OFX) is parsed, categorized
+# and rolled up exactly as the Budget page's importer does, without Streamlit running, and the
+# report shows rows per second and peak Python memory.
+#
+#     python -m benchmarks.transactions --rows 100000 --years 5 --format csv --max-seconds 5
+import argparse
+import datetime
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+MERCHANTS = (
+    "MASSY STORES SUPERMARKET", "KFC BASSETERRE", "RUBIS FUEL", "BUS FARE", "NETFLIX.COM", "SPOTIFY",
+    "UNIVERSITY BOOKSTORE", "RENT PAYMENT - LANDLORD", "DIGICEL TOP UP", "CINEMA 8", "CAFE CALYPSO", "ATM WITHDRAWAL",
+)
+
+
+def synthetic_transactions(rows, years, seed=7):
+    # (date, description, amount) spread evenly over the years before today, with a monthly salary
+    rng = random.Random(seed)
+    span = years * 365
+    start = datetime.date.today() - datetime.timedelta(days=span)
+    salary_every = max(rows // (years * 12), 1)
+    for i in range(rows):
+        date = start + datetime.timedelta(days=span * i // rows)
+        if i % salary_every == 0:
+            yield date, "SALARY PAYROLL DEPOSIT", round(rng.uniform(1400, 1600), 2)
+        else:
+            yield date, rng.choice(MERCHANTS), -round(rng.uniform(2, 120), 2)
+
+
+def synthetic_export(rows, years, fmt):
+    if fmt == "csv":
+        lines = ["Date,Description,Amount"]
+        lines.extend(f'{date:%m/%d/%Y},"{description}",{amount:.2f}' for date, description, amount in synthetic_transactions(rows, years))
+        return "\n".join(lines).encode("utf-8")
+    blocks = [
+        f"<STMTTRN>\n<TRNTYPE>{'CREDIT' if amount > 0 else 'DEBIT'}\n<DTPOSTED>{date:%Y%m%d}120000\n"
+        f"<TRNAMT>{amount:.2f}\n<NAME>{description}\n</STMTTRN>"
+        for date, description, amount in synthetic_transactions(rows, years)
+    ]
+    return ("OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n" + "\n".join(blocks)
+            + "\n</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>").encode("utf-8")
+
+
+def run_benchmark(rows, years, fmt):
+    from penny.transactions import category_rules, import_transactions
+
+    data = synthetic_export(rows, years, fmt)
+    rules = category_rules()
+    started = time.perf_counter()
+    result = import_transactions(f"export.{fmt}", data, rules, {'rows': 0})
+    seconds = time.perf_counter() - started
+    # A second, traced run for memory, since tracing slows the parse down severalfold
+    tracemalloc.start()
+    import_transactions(f"export.{fmt}", data, rules, {'rows': 0})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "format": fmt,
+        "rows": rows,
+        "years": years,
+        "file_mb": round(len(data) / 1e6, 2),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds),
+        "peak_python_mb": round(peak / 1e6, 1),
+        "imported": result.rows,
+        "skipped": result.skipped,
+        "months": len(result.months),
+        "categories": {category: round(total, 2) for category, total in result.categories.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.transactions", description="Bulk transaction import benchmark.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5, help="Years of history the export covers")
+    parser.add_argument("--format", choices=("csv", "ofx"), default="csv")
+    parser.add_argument("--max-seconds", type=float, help="Fail if the import takes longer than this")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.rows, args.years, args.format)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.max_seconds is not None and report["seconds"] > args.max_seconds:
+        print(f"FAIL: importing {args.rows} rows took {report['seconds']}s, over {args.max_seconds}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
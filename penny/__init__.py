@@ -0,0 +1 @@
+# Penny: shared code for streamlit_app.py, split by concern. Page modules live in penny.views.
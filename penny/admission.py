@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import streamlit as st
+
+from penny.telemetry import Telemetry, get_telemetry
+
+# --- Admission control ---
+# Every model call has to be admitted first. Each user has a token bucket, so one session
+# spamming the chat or the goal form can only spend its own allowance, and a global bucket keeps
+# the whole process under the provider quota. When the global bucket is empty, callers wait in a
+# queue ordered by priority (interactive chat ahead of background goal analysis) and then by how
+# many requests that user already has queued, so users are served round-robin. Anything not
+# admitted in time gets a degraded answer instead of an upstream call.
+PRIORITY_CHAT = 0
+PRIORITY_BACKGROUND = 1
+
+RATE_USER_PER_MINUTE = float(os.getenv("PENNY_RATE_USER_PER_MINUTE", "10"))
+RATE_USER_BURST = int(os.getenv("PENNY_RATE_USER_BURST", "5"))
+RATE_GLOBAL_PER_MINUTE = float(os.getenv("PENNY_RATE_GLOBAL_PER_MINUTE", "120"))
+RATE_GLOBAL_BURST = int(os.getenv("PENNY_RATE_GLOBAL_BURST", "20"))
+ADMISSION_MAX_WAIT_SECONDS = {
+    PRIORITY_CHAT: float(os.getenv("PENNY_ADMISSION_CHAT_WAIT", "5")),
+    PRIORITY_BACKGROUND: float(os.getenv("PENNY_ADMISSION_BACKGROUND_WAIT", "15")),
+}
+ADMISSION_MAX_TRACKED_USERS = 10000
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TokenBucket:
+    # Not thread-safe on its own; the AdmissionController lock guards every bucket
+    def __init__(self, per_minute, capacity, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now):
+        # Seconds until a whole token is available
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def take(self):
+        self.tokens -= 1
+
+    def give_back(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AdmissionController:
+    def __init__(self, user_per_minute=RATE_USER_PER_MINUTE, user_burst=RATE_USER_BURST,
+                 global_per_minute=RATE_GLOBAL_PER_MINUTE, global_burst=RATE_GLOBAL_BURST,
+                 max_wait=ADMISSION_MAX_WAIT_SECONDS, telemetry=None, clock=time.monotonic):
+        self.telemetry = telemetry or Telemetry()
+        self.clock = clock
+        self.user_per_minute = user_per_minute
+        self.user_burst = user_burst
+        self.global_bucket = TokenBucket(global_per_minute, global_burst, clock)
+        self.max_wait = max_wait
+        self.admitted = Counter()
+        self.rejected = Counter()
+        self._users = OrderedDict()
+        self._queue = []
+        self._queued_by_user = Counter()
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    def _user_bucket(self, user_id):
+        bucket = self._users.pop(user_id, None) or TokenBucket(self.user_per_minute, self.user_burst, self.clock)
+        self._users[user_id] = bucket
+        if len(self._users) > ADMISSION_MAX_TRACKED_USERS:
+            self._users.popitem(last=False)
+        return bucket
+
+    def _reject(self, reason):
+        self.rejected[reason] += 1
+        self.telemetry.increment(f"admission.rejected.{reason}")
+        return False
+
+    def admit(self, user_id, priority=PRIORITY_CHAT):
+        # Blocks for at most max_wait[priority]; returns whether the call may go upstream
+        with self._condition:
+            started = self.clock()
+            bucket = self._user_bucket(user_id)
+            if bucket.wait_time(started) > 0:
+                return self._reject("user")
+            bucket.take()
+
+            ticket = (priority, self._queued_by_user[user_id], next(self._tickets))
+            heapq.heappush(self._queue, ticket)
+            self._queued_by_user[user_id] += 1
+            deadline = started + self.max_wait[priority]
+            try:
+                while True:
+                    now = self.clock()
+                    wait = deadline - now
+                    if self._queue[0] == ticket:
+                        refill = self.global_bucket.wait_time(now)
+                        if refill == 0:
+                            self.global_bucket.take()
+                            self.admitted[priority] += 1
+                            self.telemetry.record("admission.wait", now - started, priority=priority)
+                            return True
+                        wait = min(wait, refill)
+                    if now >= deadline:
+                        bucket.give_back()
+                        return self._reject("global")
+                    self._condition.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._queued_by_user[user_id] -= 1
+                if not self._queued_by_user[user_id]:
+                    del self._queued_by_user[user_id]
+                self._condition.notify_all()
+
+    def admit_spare(self):
+        # Speculative work only runs on spare global capacity: it never queues, never touches a
+        # user's bucket, and leaves a quarter of the global burst for interactive traffic
+        with self._condition:
+            self.global_bucket.wait_time(self.clock())
+            if self._queue or self.global_bucket.tokens < 1 + self.global_bucket.capacity / 4:
+                return self._reject("spare")
+            self.global_bucket.take()
+            self.admitted["spare"] += 1
+            return True
+
+    def stats(self):
+        with self._condition:
+            return {
+                "admitted_chat": self.admitted[PRIORITY_CHAT],
+                "admitted_background": self.admitted[PRIORITY_BACKGROUND],
+                "admitted_spare": self.admitted["spare"],
+                "rejected_spare": self.rejected["spare"],
+                "rejected_user": self.rejected["user"],
+                "rejected_global": self.rejected["global"],
+                "queued": len(self._queue),
+                "global_tokens": round(self.global_bucket.tokens, 2),
+            }
+
+
+@st.cache_resource
+def get_admission_controller():
+    controller = AdmissionController(telemetry=get_telemetry())
+    get_telemetry().register_source("admission", controller.stats)
+    return controller
+
+
+def admit_model_call(priority=PRIORITY_CHAT):
+    user_id = st.session_state.get('user_id') or 'anonymous'
+    return get_admission_controller().admit(user_id, priority)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from penny.budget import EXPENSE_FIELDS, EXPENSE_LABELS, ROLLING_WINDOW_MONTHS
+
+# --- Budget analytics ---
+# Derived frames are computed with vectorized pandas/NumPy operations and cached with
+# st.cache_data, which hashes the inputs: they are only recomputed when data changes.
+@st.cache_data(show_spinner=False)
+def budget_frame(history):
+    # One row per month with totals, savings rate, over-budget flag and rolling averages
+    df = pd.DataFrame(history)
+    if df.empty:
+        return df
+    df = df.set_index('month').sort_index()
+    df['total_expenses'] = df[EXPENSE_FIELDS].to_numpy().sum(axis=1)
+    df['remaining'] = df['income'] - df['total_expenses']
+    income = df['income'].to_numpy()
+    df['savings_rate'] = np.divide(df['remaining'].to_numpy(), income, out=np.zeros(len(df)), where=income > 0)
+    df['over_budget'] = (df['monthly_budget'] > 0) & (df['total_expenses'] > df['monthly_budget'])
+    rolling = df[['income', 'total_expenses', 'remaining', 'savings_rate']].rolling(ROLLING_WINDOW_MONTHS, min_periods=1).mean()
+    return df.join(rolling.add_suffix('_avg'))
+
+
+@st.cache_data(show_spinner=False)
+def category_breakdown(history, month):
+    # Long-form Category/Amount frame for one month, including the remaining or over-budget slice
+    df = budget_frame(history)
+    if df.empty or month not in df.index:
+        return pd.DataFrame(columns=['Category', 'Amount'])
+    row = df.loc[month]
+    breakdown = pd.DataFrame({
+        'Category': [EXPENSE_LABELS[field] for field in EXPENSE_FIELDS],
+        'Amount': row[EXPENSE_FIELDS].to_numpy(dtype=float),
+    })
+    remaining = row['remaining']
+    balance_label = 'Remaining Balance' if remaining > 0 else 'Over budget'
+    return pd.concat([breakdown, pd.DataFrame({'Category': [balance_label], 'Amount': [abs(remaining)]})], ignore_index=True)
+
+
+@st.cache_data(show_spinner=False)
+def goals_frame(goals):
+    # One row per goal; the amount columns of every goal's history are summed in a single bincount
+    if not goals:
+        return pd.DataFrame(columns=['goal_name', 'goal_amount', 'time_span', 'saved', 'progress', 'monthly_needed'])
+    histories = [goal['savings_history'] for goal in goals]
+    owners = np.repeat(np.arange(len(goals)), [len(history) for history in histories])
+    amounts = np.concatenate([np.frombuffer(history.amounts, dtype=float) for history in histories])
+    df = pd.DataFrame({
+        'goal_name': [goal['goal_name'] for goal in goals],
+        'goal_amount': np.array([goal['goal_amount'] for goal in goals], dtype=float),
+        'time_span': np.array([goal['time_span'] for goal in goals], dtype=float),
+    })
+    df['saved'] = np.bincount(owners, weights=amounts, minlength=len(goals))
+    goal_amount = df['goal_amount'].to_numpy()
+    df['progress'] = np.clip(np.divide(df['saved'].to_numpy(), goal_amount, out=np.zeros(len(df)), where=goal_amount > 0), 0, 1)
+    df['monthly_needed'] = np.maximum(goal_amount - df['saved'].to_numpy(), 0) / np.maximum(df['time_span'].to_numpy(), 1)
+    return df
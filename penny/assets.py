@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import os
+import re
+import string
+import threading
+from collections import namedtuple
+
+import streamlit as st
+
+from penny.config import APP_DIR
+from penny.telemetry import get_telemetry
+
+logger = logging.getLogger("penny")
+
+# --- Static assets ---
+# The theme and the prompts are plain files under assets/. The theme is minified once per process
+# and written to static/ under a content-hashed name, so with server.enableStaticServing each rerun
+# only sends a one-line @import and the browser caches the stylesheet. Without static serving the
+# minified CSS is inlined instead. Prompts are compiled to string.Template objects with a content
+# hash that doubles as their version in cache keys; PENNY_PROMPT_HOT_RELOAD re-reads edited files.
+ASSETS_DIR = os.path.join(APP_DIR, "assets")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+THEME_CSS_PATH = os.path.join(ASSETS_DIR, "penny.css")
+PROMPTS_DIR = os.path.join(ASSETS_DIR, "prompts")
+PROMPT_HOT_RELOAD = os.getenv("PENNY_PROMPT_HOT_RELOAD", "false").lower() == "true"
+
+# Strings are kept verbatim and comments dropped; only the code between strings is squeezed
+CSS_STRING = r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+CSS_COMMENT_PATTERN = re.compile(CSS_STRING + r"|/\*.*?\*/", re.DOTALL)
+CSS_STRING_PATTERN = re.compile(CSS_STRING)
+CSS_SPACE_PATTERN = re.compile(r"\s+")
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};,>])\s*")
+CSS_COLON_PATTERN = re.compile(r":\s+")
+
+
+def minify_css_code(code):
+    code = CSS_SPACE_PATTERN.sub(" ", code)
+    code = CSS_PUNCTUATION_PATTERN.sub(r"\1", code)
+    # Only the space after a colon goes: "div :hover" is a different selector from "div:hover"
+    return CSS_COLON_PATTERN.sub(":", code)
+
+
+def minify_css(css):
+    # Comments go first, so the code on both sides of one is squeezed as a whole
+    css = CSS_COMMENT_PATTERN.sub(lambda match: match.group(1) or "", css)
+    # re.split with a capturing group puts the strings at the odd indexes
+    parts = CSS_STRING_PATTERN.split(css)
+    for i in range(0, len(parts), 2):
+        parts[i] = minify_css_code(parts[i])
+    return "".join(parts).replace(";}", "}").strip()
+
+
+@st.cache_resource
+def get_theme_stylesheet():
+    # (static URL, None) when the minified file can be served, otherwise (None, minified CSS)
+    with open(THEME_CSS_PATH, encoding="utf-8") as f:
+        css = minify_css(f.read())
+    if not st.get_option("server.enableStaticServing"):
+        return None, css
+    name = f"penny.{hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]}.min.css"
+    path = os.path.join(STATIC_DIR, name)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            # Write under a temporary name first so the server never sends a half-written file
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(css)
+            os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.warning("Could not write %s, inlining the theme instead: %s", path, e)
+        return None, css
+    return f"app/static/{name}", None
+
+
+def apply_theme():
+    url, css = get_theme_stylesheet()
+    st.html(f'<style>@import url("{url}");</style>' if url else f"<style>{css}</style>")
+
+
+PromptSource = namedtuple("PromptSource", ["template", "version", "mtime"])
+
+
+class PromptLibrary:
+    # Every assets/prompts/<name>.txt, compiled up front. With hot reload on, a template whose file
+    # changed on disk is recompiled the next time it is used.
+    def __init__(self, directory=PROMPTS_DIR, hot_reload=PROMPT_HOT_RELOAD):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._sources = {
+            name[:-len(".txt")]: self._compile(name[:-len(".txt")])
+            for name in sorted(os.listdir(directory)) if name.endswith(".txt")
+        }
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def _compile(self, name):
+        path = self._path(name)
+        mtime = os.path.getmtime(path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return PromptSource(string.Template(text), hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], mtime)
+
+    def source(self, name):
+        with self._lock:
+            source = self._sources.get(name)
+            if source is None or (self.hot_reload and os.path.getmtime(self._path(name)) != source.mtime):
+                if source is not None:
+                    self.reloads += 1
+                source = self._sources[name] = self._compile(name)
+            return source
+
+    def version(self, name):
+        return self.source(name).version
+
+    def render(self, name, **values):
+        return self.source(name).template.substitute(values)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "templates": len(self._sources),
+                "hot_reload": self.hot_reload,
+                "reloads": self.reloads,
+                "versions": {name: source.version for name, source in self._sources.items()},
+            }
+
+
+@st.cache_resource
+def get_prompt_library():
+    library = PromptLibrary()
+    get_telemetry().register_source("prompts", library.stats)
+    return library
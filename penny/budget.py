@@ -0,0 +1,94 @@
+import bisect
+import datetime
+from array import array
+
+# --- Budget history ---
+# Budgets are kept per month as columns (one list per field) so the whole history converts to a
+# DataFrame in one step (see penny.analytics). Everything here is plain Python, so the Budget page,
+# login and the chat can read and update budgets without importing pandas.
+BUDGET_FIELDS = ['income', 'monthly_budget', 'rent', 'food', 'transport', 'liabilities']
+EXPENSE_FIELDS = ['rent', 'food', 'transport', 'liabilities']
+EXPENSE_LABELS = {'rent': 'Rent', 'food': 'Food', 'transport': 'Transport', 'liabilities': 'Liabilities'}
+ROLLING_WINDOW_MONTHS = 3
+
+
+def current_month():
+    return datetime.date.today().strftime("%Y-%m")
+
+
+def recent_months(count):
+    # "YYYY-MM" for the current month and the count - 1 before it, newest first
+    today = datetime.date.today()
+    index = today.year * 12 + today.month - 1
+    return [f"{(index - i) // 12:04d}-{(index - i) % 12 + 1:02d}" for i in range(count)]
+
+
+def empty_budget_history():
+    return {'month': [], **{field: [] for field in BUDGET_FIELDS}}
+
+
+def record_budget_month(history, month, budget):
+    # Insert or replace one month, keeping the columns sorted by month
+    months = history['month']
+    if month in months:
+        i = months.index(month)
+    else:
+        i = bisect.bisect(months, month)
+        months.insert(i, month)
+        for field in BUDGET_FIELDS:
+            history[field].insert(i, 0.0)
+    for field in BUDGET_FIELDS:
+        history[field][i] = float(budget.get(field, 0) or 0)
+
+
+def budget_for_month(history, month):
+    if month not in history['month']:
+        return {}
+    i = history['month'].index(month)
+    return {field: history[field][i] for field in BUDGET_FIELDS}
+
+
+def saving_capacity(budget):
+    return max((budget.get('income', 0) or 0) - (budget.get('monthly_budget', 0) or 0), 0.0)
+
+
+# --- Savings history ---
+# A goal's logged savings are two typed columns instead of one dict per entry: the dates as
+# proleptic ordinals and the amounts as doubles, 12 bytes an entry rather than a few hundred.
+# Iterating still yields {'date', 'amount'} dicts, so serialization and display code is unchanged.
+class SavingsHistory:
+    __slots__ = ('days', 'amounts')
+
+    def __init__(self, entries=(), days=b"", amounts=b""):
+        self.days = array('i', days)
+        self.amounts = array('d', amounts)
+        for entry in entries:
+            self.append(entry['date'], entry['amount'])
+
+    def append(self, date, amount):
+        self.days.append(date.toordinal())
+        self.amounts.append(float(amount))
+
+    def total(self):
+        return sum(self.amounts)
+
+    def first_date(self):
+        return datetime.date.fromordinal(min(self.days)) if self.days else None
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __iter__(self):
+        for day, amount in zip(self.days, self.amounts):
+            yield {'date': datetime.date.fromordinal(day), 'amount': amount}
+
+    def __reduce__(self):
+        # Pickles, and hashes for st.cache_data, as the raw bytes of both columns: hashing the
+        # entries one by one cost tens of milliseconds per call with a few goals
+        return SavingsHistory, ((), self.days.tobytes(), self.amounts.tobytes())
+
+    def __eq__(self, other):
+        return isinstance(other, SavingsHistory) and self.days == other.days and self.amounts == other.amounts
+
+    def __repr__(self):
+        return f"SavingsHistory({list(self)!r})"
@@ -0,0 +1,264 @@
+import concurrent.futures
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from penny.config import APP_DIR
+from penny.fast_path import normalize_prompt
+from penny.gemini import GEMINI_TIMEOUT_SECONDS
+from penny.prompts import prompt_template_for
+from penny.telemetry import get_telemetry
+
+# --- Response cache ---
+# Shared by every session in this process (st.cache_resource), so the common openers and
+# FAQ-style questions only cost one Gemini round-trip per persona and prompt version.
+# PENNY_CACHE_BACKEND picks "memory" (default) or "sqlite"; the SQLite file also survives restarts.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("PENNY_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("PENNY_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+
+class MemoryCacheBackend:
+    # In-process LRU with a TTL per entry
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if time.time() - created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    # On-disk LRU with a TTL per entry; shared by every process pointing at the same file
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_last_used ON response_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE response_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key NOT IN (SELECT key FROM response_cache ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        self.backend.set(key, copy.deepcopy(value))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend),
+        }
+
+
+@st.cache_resource
+def get_response_cache():
+    cache = build_response_cache()
+    get_telemetry().register_source("response_cache", cache.stats)
+    return cache
+
+
+def build_response_cache():
+    backend_name = os.getenv("PENNY_CACHE_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        path = os.getenv("PENNY_CACHE_PATH", os.path.join(APP_DIR, "penny_cache.sqlite3"))
+        backend = SQLiteCacheBackend(path, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+    else:
+        backend = MemoryCacheBackend(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+    return ResponseCache(backend)
+
+
+def response_cache_key(prompt, persona):
+    # Hash the rendered template too, so editing the system prompt invalidates old answers
+    return f"{persona}|{prompt_template_for(prompt, persona).version}|{normalize_prompt(prompt)}"
+
+
+# --- Request coalescing ---
+# When a class of students all say "hi" or submit the same goal at once, only the first session
+# goes upstream. Identical requests that arrive while that call is in flight wait on the same
+# future and each get a copy of its result. Followers wait as long as the leader keeps making
+# progress (a streaming leader touches its flight for every chunk), and give up after the same
+# stall the Gemini client itself allows. If the leader fails or stalls, a follower treats it as
+# a miss and makes its own call.
+SINGLE_FLIGHT_STALL_SECONDS = GEMINI_TIMEOUT_SECONDS + 5
+
+
+class Flight(concurrent.futures.Future):
+    def __init__(self):
+        super().__init__()
+        self.touch()
+
+    def touch(self):
+        self.last_progress = time.monotonic()
+
+
+class SingleFlight:
+    def __init__(self):
+        self.leaders = 0
+        self.collapsed = 0
+        self.leader_failures = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        # Returns (flight, is_leader); the leader must call finish() exactly once
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.collapsed += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            flight = self._flights.pop(key)
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(copy.deepcopy(result))
+
+    def wait(self, flight, stall_timeout=SINGLE_FLIGHT_STALL_SECONDS):
+        while True:
+            try:
+                return copy.deepcopy(flight.result(max(flight.last_progress + stall_timeout - time.monotonic(), 0)))
+            except concurrent.futures.TimeoutError:
+                if time.monotonic() - flight.last_progress >= stall_timeout:
+                    raise
+
+    def follow(self, flight):
+        # The leader's result, or None if it failed or stalled and the caller should make its own call
+        try:
+            return self.wait(flight)
+        except Exception:
+            with self._lock:
+                self.leader_failures += 1
+            return None
+
+    def do(self, key, fn):
+        flight, leader = self.join(key)
+        if not leader:
+            result = self.follow(flight)
+            return fn() if result is None else result
+        # finally, so even a KeyboardInterrupt or a killed thread can't leave the flight registered
+        result, error = None, RuntimeError("The shared request was interrupted")
+        try:
+            result = fn()
+            error = None
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.finish(key, result=result, error=error)
+
+    def stats(self):
+        with self._lock:
+            requests = self.leaders + self.collapsed
+            return {
+                "upstream_calls": self.leaders,
+                "collapsed": self.collapsed,
+                "collapse_rate": self.collapsed / requests if requests else 0.0,
+                "leader_failures": self.leader_failures,
+                "in_flight": len(self._flights),
+            }
+
+
+@st.cache_resource
+def get_single_flight():
+    flight = SingleFlight()
+    get_telemetry().register_source("single_flight", flight.stats)
+    return flight
@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+# --- Chart cache ---
+# Figures are built once per chart kind and content hash of their input frame, and the serialized
+# figure JSON is reused on later reruns. The dark theme lives in one registered Plotly template
+# instead of being re-applied with update_layout/update_traces on every build. New chart kinds
+# register a builder with @chart_builder("kind") and render through show_chart(kind, data).
+CHART_COLORS = ['#FC5C7D', '#6A82FB', '#FFCDD2', '#8EDCE6', '#FBC2EB', '#A18CD1', '#FF7F9F', '#7C4DFF']
+PLOTLY_TEMPLATE_NAME = "penny_dark"
+CHART_BUILDERS = {}
+
+
+@st.cache_resource
+def register_plotly_template():
+    template = go.layout.Template(pio.templates["plotly_dark"])
+    template.layout.update(
+        colorway=CHART_COLORS,
+        title_x=0.5,
+        title_font_size=24,
+        title_font_color='#e0e0e0',
+        legend_title_font_color='#e0e0e0',
+        legend_font_color='#e0e0e0',
+        paper_bgcolor='rgba(0,0,0,0)', # Transparent background for the plot area
+        plot_bgcolor='rgba(0,0,0,0)', # Transparent background for the chart itself
+        margin=dict(l=20, r=20, t=60, b=20)
+    )
+    # Slice labels and outlines for better contrast on the dark theme
+    template.data.pie = [go.Pie(textinfo='percent+label', marker=dict(line=dict(color='#0b1020', width=1)))]
+    pio.templates[PLOTLY_TEMPLATE_NAME] = template
+    return PLOTLY_TEMPLATE_NAME
+
+
+def chart_builder(kind):
+    def register(builder):
+        CHART_BUILDERS[kind] = builder
+        return builder
+    return register
+
+
+def content_hash(data):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        payload = data.to_json(orient="split", date_format="iso")
+    else:
+        payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def build_figure_json(kind, data_hash, _data):
+    # `_data` is skipped by Streamlit's argument hashing; `data_hash` stands in for it
+    return CHART_BUILDERS[kind](_data, register_plotly_template()).to_json()
+
+
+def show_chart(kind, data):
+    figure_json = build_figure_json(kind, content_hash(data), data)
+    st.plotly_chart(json.loads(figure_json), use_container_width=True)
+
+
+@chart_builder("budget_pie")
+def build_budget_pie(breakdown, template):
+    return px.pie(
+        breakdown,
+        values='Amount',
+        names='Category',
+        title='Distribution of Monthly Finances',
+        template=template
+    )
+
+
+@chart_builder("budget_trend")
+def build_budget_trend(trend, template):
+    fig = px.line(trend, x=trend.index, y=trend.columns, markers=True, template=template)
+    fig.update_layout(xaxis_title=None, yaxis_title='Amount', legend_title_text=None)
+    return fig
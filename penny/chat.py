@@ -0,0 +1,186 @@
+import json
+
+import streamlit as st
+
+from penny.admission import PRIORITY_CHAT, RateLimited, admit_model_call
+from penny.budget import saving_capacity
+from penny.cache import get_response_cache, get_single_flight, response_cache_key
+from penny.decoding import JsonObjectScanner, ResponseFieldStream, decode_gemini_reply
+from penny.faq import faq_response, offer_faq_answer
+from penny.fast_path import fast_path_response
+from penny.gemini import get_gemini_client
+from penny.memory import build_model_input
+from penny.prefetch import take_prefetched_reply
+from penny.prompts import prompt_template_for
+from penny.telemetry import get_telemetry
+
+# --- Replies ---
+# One chat turn: the fast path and FAQ first, then a prefetched or cached reply, and only then a
+# model call, shared with identical in-flight requests and degraded when it is not admitted.
+def fallback_response(message):
+    return {
+        "response": message,
+        "quit": False,
+        "name": st.session_state.user_name,
+        "predictiveText1": "",
+        "predictiveText2": ""
+    }
+
+
+def degraded_response(prompt, persona):
+    # Served when a model call is not admitted: a cached answer to the same question even if this
+    # turn has context, otherwise a rule-based note built from the saved budget
+    get_telemetry().increment("admission.degraded")
+    cached = get_response_cache().get(response_cache_key(prompt, persona))
+    if cached is not None:
+        return cached
+    message = "I'm getting a lot of questions right now. Give me a few seconds and ask me again!"
+    budget = st.session_state.get('budget') or {}
+    if budget.get('income'):
+        message += (f" In the meantime: after your planned spending of {budget.get('monthly_budget', 0) or 0:.2f}, "
+                    f"you have about {saving_capacity(budget):.2f} a month you could put towards savings.")
+    return fallback_response(message)
+
+
+def get_response_from_gemini(prompt, persona, use_cache=True):
+    local_reply = fast_path_response(prompt, persona) or faq_response(prompt, persona)
+    if local_reply is not None:
+        return local_reply
+
+    model_input, context_free = build_model_input(prompt)
+    prefetched = take_prefetched_reply(prompt, persona)
+    if prefetched is not None:
+        return prefetched
+
+    # A reply that depends on earlier turns or saved data is specific to this session
+    cache_key = response_cache_key(prompt, persona) if use_cache and context_free else None
+    if cache_key:
+        cached = get_response_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    def fetch_reply():
+        if not admit_model_call(PRIORITY_CHAT):
+            raise RateLimited("Model call not admitted")
+        template = prompt_template_for(prompt, persona)
+        response = get_gemini_client().generate(model_input, system_instruction=template.system_instruction)
+        reply = decode_gemini_reply(response.text.strip())
+        if cache_key:
+            get_response_cache().set(cache_key, reply)
+            offer_faq_answer(prompt, persona, reply)
+        return reply
+
+    try:
+        # Identical context-free prompts from other sessions share one upstream call
+        return get_single_flight().do(cache_key, fetch_reply) if cache_key else fetch_reply()
+    except RateLimited:
+        return degraded_response(prompt, persona)
+    except json.JSONDecodeError as e:
+        st.warning(f"Error parsing JSON. Raw response: {e.doc}")
+        st.warning(f"Error details: {e}")
+        # Fallback for when the AI messes up
+        return fallback_response("Oops! I ran into an issue. Please try again.")
+    except Exception as e:
+        st.error(f"Error getting response from Gemini: {e}")
+        return fallback_response("Oops! I ran into an issue. Please try again in a moment.")
+
+
+# --- Streaming responses ---
+# Render Penny's reply token-by-token instead of waiting for the whole JSON object.
+# Set to False to go back to the blocking call with the "Penny is thinking..." spinner.
+STREAM_RESPONSES = True
+
+
+def stream_response_from_gemini(prompt, persona, result, use_cache=True):
+    # Generator for st.write_stream: yields the "response" text as it arrives and
+    # fills `result` with quit/name/predictiveText* once the JSON object closes.
+    local_reply = fast_path_response(prompt, persona) or faq_response(prompt, persona)
+    if local_reply is not None:
+        result.update(local_reply)
+        yield local_reply["response"]
+        return
+
+    model_input, context_free = build_model_input(prompt)
+    prefetched = take_prefetched_reply(prompt, persona)
+    if prefetched is not None:
+        result.update(prefetched)
+        yield prefetched["response"]
+        return
+
+    # A reply that depends on earlier turns or saved data is specific to this session
+    cache_key = response_cache_key(prompt, persona) if use_cache and context_free else None
+    if cache_key:
+        cached = get_response_cache().get(cache_key)
+        if cached is not None:
+            result.update(cached)
+            yield cached.get("response", "")
+            return
+
+    flight = get_single_flight() if cache_key else None
+    if flight:
+        shared, leader = flight.join(cache_key)
+        if not leader:
+            # Another session is already streaming this exact prompt; show its reply in one go,
+            # or make our own call below if that session's request failed
+            reply = flight.follow(shared)
+            if reply is not None:
+                result.update(reply)
+                yield reply["response"]
+                return
+            flight = None
+
+    # What waiting sessions receive: the decoded reply, or the reason there is none
+    shared_reply = None
+    shared_error = RuntimeError("The shared Gemini request did not produce a reply")
+    try:
+        if not admit_model_call(PRIORITY_CHAT):
+            shared_error = RateLimited("Model call not admitted")
+            reply = degraded_response(prompt, persona)
+            result.update(reply)
+            yield reply["response"]
+            return
+
+        template = prompt_template_for(prompt, persona)
+        field = ResponseFieldStream()
+        scanner = JsonObjectScanner()
+        streamed = []
+
+        try:
+            for chunk in get_gemini_client().stream(model_input, system_instruction=template.system_instruction):
+                text = chunk.text
+                if flight:
+                    shared.touch()
+                scanner.feed(text)
+                delta = field.feed(text)
+                if delta:
+                    streamed.append(delta)
+                    yield delta
+            result.update(decode_gemini_reply(field.buffer, scanner.objects))
+            shared_reply = result
+            if cache_key:
+                get_response_cache().set(cache_key, result)
+                offer_faq_answer(prompt, persona, result)
+            # A malformed or missing "response" key means nothing was streamed; show the repaired reply
+            if not streamed:
+                yield result["response"]
+
+        except json.JSONDecodeError as e:
+            shared_error = e
+            if field.done:
+                # The reply itself came through fine, only the trailing keys are broken
+                result.update(fallback_response("".join(streamed)))
+                return
+            st.warning(f"Error parsing JSON. Raw response: {field.buffer}")
+            st.warning(f"Error details: {e}")
+            result.update(fallback_response("Oops! I ran into an issue. Please try again."))
+            if not streamed:
+                yield result["response"]
+        except Exception as e:
+            shared_error = e
+            st.error(f"Error getting response from Gemini: {e}")
+            result.update(fallback_response("Oops! I ran into an issue. Please try again in a moment."))
+            if not streamed:
+                yield result["response"]
+    finally:
+        if flight:
+            flight.finish(cache_key, result=shared_reply, error=None if shared_reply else shared_error)
@@ -0,0 +1,21 @@
+import json
+import os
+
+import streamlit as st
+
+# --- App configuration ---
+# convo.json and the other data files sit next to streamlit_app.py, one level above this package.
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@st.cache_data
+def load_app_config():
+    try:
+        with open(os.path.join(APP_DIR, "convo.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def ai_advice_enabled():
+    return load_app_config().get('app_config', {}).get('use_ai_advice', True)
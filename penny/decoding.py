@@ -0,0 +1,295 @@
+import json
+import re
+import threading
+from collections import Counter
+
+import streamlit as st
+
+from penny.telemetry import get_telemetry
+
+# --- Response decoding ---
+# Gemini sometimes wraps the object in code fences, adds a preamble or trailing commentary,
+# or emits almost-JSON. Rather than slicing first "{" to last "}", scan for balanced objects,
+# repair the usual defects and coerce the five keys to their expected types.
+REPLY_SCHEMA = {
+    "response": (str, "I'm sorry, I couldn't generate a response."),
+    "quit": (bool, False),
+    "name": (str, "user"),
+    "predictiveText1": (str, ""),
+    "predictiveText2": (str, ""),
+}
+
+# Curly quotes are only rewritten where they act as JSON delimiters outside straight-quoted
+# strings, never inside reply text
+SMART_QUOTE_OPEN_PATTERN = re.compile("([{,:\\[]\\s*)[\u201c\u201d]")
+SMART_QUOTE_CLOSE_PATTERN = re.compile("[\u201c\u201d](\\s*[:,}\\]])")
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+PYTHON_LITERAL_PATTERN = re.compile(r"(?<=[:\[,\s])(True|False|None)(?=\s*[,}\]])")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# Odd-numbered pieces of a split are string literals, which the repairs below must leave alone
+JSON_STRING_PATTERN = re.compile(r'("(?:[^"\\]|\\.)*")', re.DOTALL)
+
+
+def outside_strings(fix, text):
+    parts = JSON_STRING_PATTERN.split(text)
+    parts[::2] = [fix(part) for part in parts[::2]]
+    return "".join(parts)
+
+
+def remove_trailing_commas(text):
+    return outside_strings(lambda part: TRAILING_COMMA_PATTERN.sub(r"\1", part), text)
+
+
+def replace_python_literals(text):
+    return outside_strings(lambda part: PYTHON_LITERAL_PATTERN.sub(lambda m: PYTHON_LITERALS[m.group(1)], part), text)
+
+
+def escape_control_characters(text):
+    # Raw newlines and tabs inside string values are invalid JSON
+    out = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch in "\n\r\t":
+                ch = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch]
+        elif ch == '"':
+            in_string = True
+        out.append(ch)
+    return "".join(out)
+
+
+def replace_smart_quotes(text):
+    return outside_strings(lambda part: SMART_QUOTE_CLOSE_PATTERN.sub(r'"\1', SMART_QUOTE_OPEN_PATTERN.sub(r'\1"', part)), text)
+
+
+# Least risky first. Rewriting curly quotes changes where strings start and end, so the control
+# character pass runs again after it.
+JSON_REPAIRS = (
+    ("trailing_comma", remove_trailing_commas),
+    ("python_literals", replace_python_literals),
+    ("control_characters", escape_control_characters),
+    ("smart_quotes", replace_smart_quotes),
+    ("control_characters", escape_control_characters),
+)
+
+
+class JsonObjectScanner:
+    # Brace-aware scanner that can be fed chunk by chunk. Braces inside JSON strings are
+    # ignored, and every balanced top-level {...} is collected in `objects` as it closes.
+    def __init__(self):
+        self.objects = []
+        self._current = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text):
+        for ch in text:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._current = [ch]
+                continue
+
+            self._current.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.objects.append("".join(self._current))
+                    self._current = []
+        return self.objects
+
+
+def repair_json_text(text):
+    # Targeted fixes for the defects Gemini actually produces, applied one at a time until the text
+    # parses (code fences and preambles are already cut off by JsonObjectScanner). Returns the
+    # repaired text and the names of the repairs that changed something.
+    repairs = []
+    for name, repair in JSON_REPAIRS:
+        fixed = repair(text)
+        if fixed == text:
+            continue
+        text = fixed
+        if name not in repairs:
+            repairs.append(name)
+        try:
+            json.loads(text)
+        except json.JSONDecodeError:
+            continue
+        break
+    return text, repairs
+
+
+def validate_reply(data):
+    # Coerce the five keys to their schema types; returns the reply and the defaulted keys
+    reply = {}
+    defaulted = []
+    for key, (expected_type, default) in REPLY_SCHEMA.items():
+        value = data.get(key)
+        if expected_type is bool and isinstance(value, str):
+            value = value.strip().lower() == "true"
+        elif expected_type is str and value is not None and not isinstance(value, str):
+            value = str(value)
+        if not isinstance(value, expected_type):
+            value = default
+            defaulted.append(key)
+        reply[key] = value
+    # Only present when the request asked for it (see needs_model_extraction)
+    if isinstance(data.get("budget_data"), dict):
+        reply["budget_data"] = data["budget_data"]
+    return reply, defaulted
+
+
+class ParseMetrics:
+    def __init__(self):
+        self.clean = 0
+        self.repaired = 0
+        self.failed = 0
+        self.fields_defaulted = 0
+        self.repairs = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, outcome, repairs=(), defaulted=()):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.repairs.update(repairs)
+            self.fields_defaulted += len(defaulted)
+
+    def stats(self):
+        total = self.clean + self.repaired + self.failed
+        return {
+            "clean": self.clean,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_rate": self.repaired / total if total else 0.0,
+            "fields_defaulted": self.fields_defaulted,
+            "repairs": dict(self.repairs),
+        }
+
+
+@st.cache_resource
+def get_parse_metrics():
+    metrics = ParseMetrics()
+    get_telemetry().register_source("json_parsing", metrics.stats)
+    return metrics
+
+
+def decode_gemini_reply(raw_text, candidates=None):
+    # Returns a validated reply dict, or raises json.JSONDecodeError if no usable object was found.
+    # `candidates` lets the streaming path hand over objects its scanner already collected.
+    if candidates is None:
+        candidates = JsonObjectScanner().feed(raw_text)
+
+    parsed = []
+    for candidate in candidates:
+        repairs = []
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            fixed, repairs = repair_json_text(candidate)
+            try:
+                data = json.loads(fixed)
+            except json.JSONDecodeError:
+                continue
+        if isinstance(data, dict):
+            parsed.append((data, repairs))
+
+    if not parsed:
+        get_parse_metrics().record("failed")
+        raise json.JSONDecodeError("JSON object not found in response.", raw_text, 0)
+
+    # Prefer the object that actually carries a reply over e.g. a stray {} in the preamble
+    data, repairs = next(((d, r) for d, r in parsed if "response" in d), parsed[0])
+    reply, defaulted = validate_reply(data)
+    get_parse_metrics().record("repaired" if repairs else "clean", repairs, defaulted)
+    return reply
+
+
+# The streaming path decodes the "response" value while the rest of the object is still arriving
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class ResponseFieldStream:
+    # Incrementally decodes the value of the "response" key while the JSON object is still arriving.
+    # Everything fed in is kept in `buffer` so the complete object can be parsed once the stream ends.
+    KEY_PATTERN = re.compile(r'"response"\s*:\s*"')
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._pos = None
+
+    def feed(self, text):
+        self.buffer += text
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self.KEY_PATTERN.search(self.buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        buf = self.buffer
+        i = self._pos
+        out = []
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != '\\':
+                out.append(ch)
+                i += 1
+                continue
+
+            # Escape sequences can be split across chunks; wait for the rest before decoding
+            if i + 1 >= len(buf):
+                break
+            esc = buf[i + 1]
+            if esc != 'u':
+                out.append(JSON_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            if i + 6 > len(buf):
+                break
+            try:
+                code = int(buf[i + 2:i + 6], 16)
+            except ValueError:
+                out.append(buf[i:i + 6])
+                i += 6
+                continue
+            if 0xD800 <= code < 0xDC00:
+                # Surrogate pair (e.g. an escaped emoji) - needs the low half too
+                if i + 12 > len(buf):
+                    break
+                try:
+                    low = int(buf[i + 8:i + 12], 16) if buf[i + 6:i + 8] == '\\u' else None
+                except ValueError:
+                    low = None
+                if low is not None and 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(code))
+            i += 6
+
+        self._pos = i
+        return "".join(out)
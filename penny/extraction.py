@@ -0,0 +1,280 @@
+import datetime
+import re
+
+import streamlit as st
+
+from penny.budget import BUDGET_FIELDS, EXPENSE_FIELDS, SavingsHistory, current_month, empty_budget_history, record_budget_month
+from penny.config import load_app_config
+from penny.fast_path import classify_intent
+from penny.store import persist_budget, persist_goals
+
+# --- Budget extraction from chat ---
+# "I make 1500 XCD, rent is 500, food 300" typed into the chat lands in the saved budget. A local
+# parser splits the message into clauses and pairs each amount with the budget field its keywords
+# name. Only when a message has figures the parser cannot place does the chat request ask the
+# model for a typed "budget_data" object alongside its reply, so there is never a separate call.
+# Either way the figures are merged into this month's budget and the user's goals.
+#
+# Only statements about the user's current situation are saved. Questions and what-ifs ("What if
+# my rent goes up to 600?", "Is 300 too much on food"), changes ("my income dropped by 200"),
+# counts and percentages ("I have 2 loans"), balances ("I owe 5000 on my loan") and one-off spends
+# ("I spent 40 on a taxi today") are left alone. Weekly, fortnightly, daily and yearly figures
+# are converted to monthly ones, and "N days a week" multiplies. A figure with a period the
+# parser cannot convert ("20 an hour", "90 every quarter") is left to the model. A goal is saved straight away only
+# when the user says they want it ("I want to save 5000 for a car in 12 months"); one that comes
+# up any other way, or from the model, is offered with a button instead (pending_goals).
+BUDGET_KEYWORDS = {
+    'income': ('income', 'salary', 'i make', 'earn', 'earning', 'get paid', 'wage', 'wages', 'allowance', 'take home'),
+    'monthly_budget': ('budget', 'spending limit'),
+    'rent': ('rent', 'housing', 'mortgage'),
+    'food': ('food', 'groceries', 'grocery', 'lunch', 'meals', 'eating out'),
+    'transport': ('transport', 'transportation', 'bus', 'taxi', 'gas', 'fuel', 'car'),
+    'liabilities': ('liabilities', 'loan', 'loans', 'debt', 'bills', 'phone', 'internet', 'insurance'),
+}
+MONEY_PATTERN = re.compile(r"(?:\$|xcd|ec\$|usd)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?")
+CLAUSE_SPLIT_PATTERN = re.compile(r"(?<!\d),|,(?!\d{3}(?!\d))|[;\n]|\band\b|\bplus\b|(?<!\d)\.(?!\d)")
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[?!])|(?<=\.)(?!\d)|\n")
+QUESTION_PATTERN = re.compile(
+    r"\?|^\W*(?:(?:so|and|but|also|ok|okay|well|hey|penny)\W+)*"
+    r"(?:what|how|why|when|where|which|who|can|could|should|would|will|shall|is|are|am|do|does|did|was|were|may|might)\b"
+)
+CONDITIONAL_PATTERN = re.compile(
+    r"\b(?:if|suppose|supposing|imagine|hypothetically|assuming|too much|too little|enough|thinking (?:about|of)|considering)\b"
+)
+CHANGE_PATTERN = re.compile(
+    r"\b(?:up|down|drop|drops|dropped|fell|fall|falls|rose|rise|rises|increase|increased|increases|decrease|decreased|"
+    r"decreases|raise|raised|cut|reduce|reduced|more|less|extra|another|additional)\b|\bby\s+(?:\$|xcd|ec\$|usd)?\s*\d"
+)
+# Amounts that are not a monthly flow: what is owed or left over, and money spent once
+BALANCE_PATTERN = re.compile(
+    r"\b(?:owe|owes|owed|owing|left|leftover|remaining|balance|outstanding)\b|\bin\s+(?:my\s+)?(?:savings|the bank|my account)\b"
+)
+ONE_OFF_PATTERN = re.compile(
+    r"\b(?:today|yesterday|tonight|last night|this (?:morning|afternoon|evening)|just (?:spent|paid|bought))\b"
+)
+# Numbers that count things rather than money; the noun stays so "300 for 2 loans" is still a loan cost
+COUNT_PATTERN = re.compile(
+    r"\b\d[\d,]*(?:\.\d+)?\s*(?:%|percent\b|(?P<noun>(?:credit )?cards?|loans?|debts?|bills?|cars?|phones?|kids?|child|"
+    r"children|people|persons?|roommates?|jobs?|times?|days?|weeks?|months?|years?|items?|meals?|subscriptions?)\b)"
+)
+GOAL_INTENT_PATTERN = re.compile(
+    r"\b(?:want|wanna|would like|'d like|plan|planning|need|going to|gonna|will|saving|goal|hope|hoping)\b"
+    r"|^\W*(?:please\W+)?(?:save|add|set|create)\b"
+)
+# Factor from each period to a month; an hourly figure has none without the hours worked
+PERIOD_PATTERNS = (
+    (re.compile(r"\b(?:an?|per|each|every)\s+hour\b|\bhourly\b"), None),
+    (re.compile(r"\b(?:a|per|each|every)\s+day\b|\bdaily\b"), 365 / 12),
+    (re.compile(r"\bevery\s+(?:two|2|other)\s+weeks?\b|\b(?:bi-?weekly|fortnightly)\b|\b(?:a|per|each|every)\s+fortnight\b"), 26 / 12),
+    (re.compile(r"\b(?:a|per|each|every)\s+week\b|\bweekly\b"), 52 / 12),
+    (re.compile(r"\b(?:a|per|each|every|this|last)\s+month\b|\bmonthly\b"), 1),
+    (re.compile(r"\b(?:a|per|each|every)\s+year\b|\byearly\b|\bannually\b"), 1 / 12),
+)
+# "20 on lunch 5 days a week": the count multiplies, and "a day" or "an hour" only names the unit
+FREQUENCY_PATTERN = re.compile(
+    r"\b(?:(?P<count>\d+)\s*(?:days?|times?|hours?|shifts?|nights?)|(?P<word>once|twice))\s+(?:a|per|each|every)\s+(?P<per>week|month)\b"
+)
+FREQUENCY_COUNTS = {'once': 1, 'twice': 2}
+FREQUENCY_FACTORS = {'week': 52 / 12, 'month': 1}
+UNIT_PATTERN = re.compile(r"\b(?:an?|per|each)\s+(?:hour|day|shift|night|time)\b")
+# Any period word still in a clause after the ones above were taken out is one the parser can't convert
+PERIOD_WORD_PATTERN = re.compile(
+    r"\b(?:hours?|hourly|days?|daily|nights?|nightly|weeks?|weekly|weekends?|fortnights?|fortnightly|months?|monthly|"
+    r"quarters?|quarterly|semesters?|terms?|years?|yearly|annual|annually)\b"
+)
+GOAL_PATTERNS = (
+    re.compile(r"\bsav(?:e|ing)\s+(?:up\s+)?(?:\$|xcd\s*)?(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?:xcd|dollars|\$)?\s+"
+               r"(?:for|towards)\s+(?:a\s+|an\s+|my\s+|the\s+)?(?P<name>[a-z][a-z ]*?)\s+"
+               r"(?:in|within|over)\s+(?P<span>\d+)\s+(?P<unit>months?|years?)\b"),
+    re.compile(r"\b(?:buy|get|afford)\s+(?:a\s+|an\s+|my\s+|the\s+)?(?P<name>[a-z][a-z ]*?)\s+"
+               r"(?:for|that costs|costing|worth)\s+(?:\$|xcd\s*)?(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?:xcd|dollars|\$)?\s+"
+               r"(?:in|within|over)\s+(?P<span>\d+)\s+(?P<unit>months?|years?)\b"),
+)
+
+
+@st.cache_resource
+def budget_keyword_patterns():
+    # Expense categories from convo.json without a budget field of their own count as liabilities
+    keywords = {field: list(words) for field, words in BUDGET_KEYWORDS.items()}
+    for category in load_app_config().get('app_config', {}).get('expense_categories', []):
+        field = category.lower() if category.lower() in EXPENSE_FIELDS else 'liabilities'
+        keywords[field].append(category.lower())
+    return {
+        field: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b")
+        for field, words in keywords.items()
+    }
+
+
+def parse_amount(number, thousands=None):
+    amount = float(number.replace(",", ""))
+    return amount * 1000 if thousands else amount
+
+
+def extract_goals_locally(text):
+    goals = []
+    for pattern in GOAL_PATTERNS:
+        for match in pattern.finditer(text):
+            span = int(match.group('span'))
+            goals.append({
+                'goal_name': match.group('name').strip().title(),
+                'goal_amount': parse_amount(match.group('amount')),
+                'time_span': span * 12 if match.group('unit').startswith('year') else span,
+            })
+    return goals
+
+
+def is_hypothetical(sentence):
+    return bool(QUESTION_PATTERN.search(sentence) or CONDITIONAL_PATTERN.search(sentence))
+
+
+def stated_clauses(text):
+    # Yields the clauses of statement sentences that can carry budget figures, with goal
+    # phrases taken out and changes, balances and one-off spends skipped
+    for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+        if is_hypothetical(sentence):
+            continue
+        for pattern in GOAL_PATTERNS:
+            sentence = pattern.sub(" ", sentence)
+        for clause in CLAUSE_SPLIT_PATTERN.split(sentence):
+            if not (CHANGE_PATTERN.search(clause) or BALANCE_PATTERN.search(clause) or ONE_OFF_PATTERN.search(clause)):
+                yield clause
+
+
+def clause_figures(clause):
+    # Returns the clause with its period phrases and counts taken out, its amounts, and the factor
+    # that makes them monthly; the factor is None when the clause's period can't be converted
+    factor = 1.0
+    frequency = FREQUENCY_PATTERN.search(clause)
+    if frequency:
+        count = FREQUENCY_COUNTS[frequency.group('word')] if frequency.group('word') else int(frequency.group('count'))
+        factor = count * FREQUENCY_FACTORS[frequency.group('per')]
+        clause = UNIT_PATTERN.sub(" ", FREQUENCY_PATTERN.sub(" ", clause))
+    else:
+        for period, period_factor in PERIOD_PATTERNS:
+            if period.search(clause):
+                factor = period_factor
+                clause = period.sub(" ", clause)
+                break
+    if PERIOD_WORD_PATTERN.search(clause):
+        factor = None
+    clause = COUNT_PATTERN.sub(lambda m: f" {m.group('noun') or ''} ", clause)
+    return clause, MONEY_PATTERN.findall(clause), factor
+
+
+def extract_budget_locally(prompt, expecting_income=False):
+    # Returns {"budget": {field: monthly amount}, "goals": [...], "suggested_goals": [...]}, all
+    # empty if nothing was found; suggested goals need the user's confirmation before saving
+    text = prompt.lower()
+    goals, suggested_goals = [], []
+    for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+        sentence_goals = extract_goals_locally(sentence)
+        if is_hypothetical(sentence) or not GOAL_INTENT_PATTERN.search(sentence):
+            suggested_goals.extend(sentence_goals)
+        else:
+            goals.extend(sentence_goals)
+
+    intent, amount = classify_intent(prompt)
+    if intent == "amount":
+        # A bare number only means something if Penny just asked for the income
+        return {'budget': {'income': amount} if expecting_income else {}, 'goals': goals, 'suggested_goals': suggested_goals}
+
+    patterns = budget_keyword_patterns()
+    budget = {}
+    for clause in stated_clauses(text):
+        clause, amounts, factor = clause_figures(clause)
+        if len(amounts) != 1 or factor is None:
+            continue
+        fields = [field for field, pattern in patterns.items() if pattern.search(clause)]
+        if len(fields) > 1 and 'monthly_budget' in fields:
+            # "my food budget is 300" is about food, not the overall budget
+            fields.remove('monthly_budget')
+        if len(fields) != 1:
+            continue
+        value = parse_amount(*amounts[0]) * factor
+        field = fields[0]
+        # Several "other" costs in one message add up
+        budget[field] = budget.get(field, 0.0) + value if field == 'liabilities' else value
+    return {
+        'budget': {field: round(value, 2) for field, value in budget.items()},
+        'goals': goals,
+        'suggested_goals': suggested_goals,
+    }
+
+
+def needs_model_extraction(prompt):
+    # Stated figures the local parser could not place; the chat request then asks for budget_data too
+    if classify_intent(prompt)[0] is not None:
+        return False
+    if not any(clause_figures(clause)[1] for clause in stated_clauses(prompt.lower())):
+        return False
+    extracted = extract_budget_locally(prompt)
+    return not any(extracted.values())
+
+
+def coerce_budget_data(data):
+    # Typed version of the model's "budget_data" object, in the local parser's shape. The model's
+    # goals are only ever suggestions.
+    extracted = {'budget': {}, 'goals': [], 'suggested_goals': []}
+    if not isinstance(data, dict):
+        return extracted
+    fields = {'income': data.get('income'), **(data.get('expenses') if isinstance(data.get('expenses'), dict) else {})}
+    for field, value in fields.items():
+        if field in BUDGET_FIELDS and isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            extracted['budget'][field] = float(value)
+    for goal in data.get('goals') or []:
+        try:
+            extracted['suggested_goals'].append({
+                'goal_name': str(goal['goal_name']).strip(),
+                'goal_amount': float(goal['goal_amount']),
+                'time_span': max(int(goal['time_span']), 1),
+            })
+        except (KeyError, TypeError, ValueError):
+            continue
+    return extracted
+
+
+def merge_extracted_budget(extracted):
+    # Folds extracted figures into this month's budget and the goal list; returns what changed
+    changed = []
+    if extracted['budget']:
+        budget = {**st.session_state.get('budget', {}), **extracted['budget']}
+        history = st.session_state.get('budget_history') or empty_budget_history()
+        record_budget_month(history, current_month(), budget)
+        st.session_state.budget = budget
+        st.session_state.budget_history = history
+        persist_budget()
+        changed.extend(extracted['budget'])
+
+    if extracted['goals']:
+        goals = st.session_state.setdefault('goals', [])
+        by_name = {goal['goal_name'].lower(): goal for goal in goals}
+        for goal in extracted['goals']:
+            existing = by_name.get(goal['goal_name'].lower())
+            if existing:
+                existing.update(goal_amount=goal['goal_amount'], time_span=goal['time_span'])
+            else:
+                goals.append({**goal, 'savings_history': SavingsHistory(), 'created': datetime.date.today().isoformat()})
+            changed.append(f"goal {goal['goal_name']}")
+        persist_goals()
+    return changed
+
+
+def confirm_pending_goal(index):
+    # on_click callback for a suggested goal's "Save" button
+    goal = st.session_state.pending_goals.pop(index)
+    merge_extracted_budget({'budget': {}, 'goals': [goal]})
+    st.toast(f"Saved your goal: {goal['goal_name']}")
+
+
+def dismiss_pending_goal(index):
+    st.session_state.pending_goals.pop(index)
+
+
+def show_pending_goals():
+    for i, goal in enumerate(st.session_state.get('pending_goals', [])):
+        save_column, dismiss_column = st.columns([4, 1])
+        with save_column:
+            st.button(f"Save goal: {goal['goal_name']} ({goal['goal_amount']:,.2f} in {goal['time_span']} months)",
+                      key=f"pending_goal_{i}", on_click=confirm_pending_goal, args=(i,))
+        with dismiss_column:
+            st.button("Dismiss", key=f"dismiss_goal_{i}", on_click=dismiss_pending_goal, args=(i,), type="secondary")
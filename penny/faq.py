@@ -0,0 +1,288 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+import streamlit as st
+
+from penny.config import APP_DIR
+from penny.telemetry import Telemetry, get_telemetry
+
+logger = logging.getLogger("penny")
+
+# --- FAQ retrieval ---
+# Recurring budgeting questions, including the follow-ups Penny suggests itself, are answered
+# from faq.json plus earlier model answers to general questions, without a generation call.
+# Questions are embedded as hashed word and bigram TF-IDF vectors. The L2-normalised matrix is
+# written to disk once per corpus version and memory-mapped, so a lookup is one matrix-vector
+# product and an argpartition for the top k. Below FAQ_MATCH_THRESHOLD the turn goes to the model.
+# A model answer is only learned after the user gives it a thumbs-up. The learned file keeps the
+# newest PENNY_FAQ_MAX_LEARNED entries, one per question and persona, and index files for older
+# corpus versions are removed once the current one is in place.
+FAQ_PATH = os.path.join(APP_DIR, "faq.json")
+FAQ_LEARNED_PATH = os.getenv("PENNY_FAQ_LEARNED_PATH", os.path.join(APP_DIR, "penny_faq_learned.jsonl"))
+FAQ_INDEX_DIR = os.getenv("PENNY_FAQ_INDEX_DIR", os.path.join(APP_DIR, ".penny_faq_index"))
+FAQ_MATCH_THRESHOLD = float(os.getenv("PENNY_FAQ_THRESHOLD", "0.75"))
+FAQ_DUPLICATE_THRESHOLD = 0.95
+FAQ_DIMENSIONS = 1024
+FAQ_TOP_K = 5
+FAQ_MIN_LEARNED_LENGTH = 80
+FAQ_MAX_LEARNED = int(os.getenv("PENNY_FAQ_MAX_LEARNED", "500"))
+
+FAQ_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+FAQ_POSSESSIVE_PATTERN = re.compile(r"['’]s\b|['’]")
+FAQ_STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "our", "you", "your", "is", "are", "am", "be", "do", "does",
+    "have", "has", "to", "of", "in", "on", "at", "for", "with", "it", "this", "that", "and", "or", "so",
+    "what", "how", "if", "should", "can", "could", "would", "will", "any", "some", "penny",
+}
+
+
+def faq_stem(word):
+    # Just enough stemming for "budgeting"/"budget" and "expenses"/"expense" to meet
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def faq_features(text):
+    text = FAQ_POSSESSIVE_PATTERN.sub("", text.lower())
+    words = [faq_stem(word) for word in FAQ_TOKEN_PATTERN.findall(text) if word not in FAQ_STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def faq_term_counts(texts):
+    # (len(texts), FAQ_DIMENSIONS) hashed term counts
+    counts = np.zeros((len(texts), FAQ_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in faq_features(text):
+            counts[row, zlib.crc32(feature.encode("utf-8")) % FAQ_DIMENSIONS] += 1
+    return counts
+
+
+class FaqIndex:
+    def __init__(self, entries, idf, matrix, learned_path=None, telemetry=None, learned_on_disk=0):
+        self.telemetry = telemetry or Telemetry()
+        # One entry per matrix row; an entry with several phrasings owns several rows
+        self.entries = entries
+        self.idf = idf
+        self.matrix = matrix
+        self.learned_path = learned_path
+        self.learned_on_disk = learned_on_disk
+        self.hits = 0
+        self.misses = 0
+        self._learned_entries = []
+        self._learned_rows = np.zeros((0, FAQ_DIMENSIONS), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def embed(self, text):
+        vector = np.log1p(faq_term_counts([text])[0]) * self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, text, k=FAQ_TOP_K):
+        # [(score, entry)] best first, over the on-disk index plus answers learned since it was built
+        query = self.embed(text)
+        with self._lock:
+            learned_entries, learned_rows = self._learned_entries, self._learned_rows
+        scores = self.matrix @ query
+        if len(learned_entries):
+            scores = np.concatenate([scores, learned_rows @ query])
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (float(scores[i]), self.entries[i] if i < len(self.entries) else learned_entries[i - len(self.entries)])
+            for i in top
+        ]
+
+    def answer(self, prompt, persona, threshold=FAQ_MATCH_THRESHOLD):
+        started = time.perf_counter()
+        match = None
+        for score, entry in self.search(prompt):
+            if score < threshold:
+                break
+            if persona in entry['answers']:
+                match = entry
+                break
+        self.telemetry.record("faq.lookup", time.perf_counter() - started, hit=match is not None)
+        with self._lock:
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if match is None:
+            return None
+        return {
+            "response": match['answers'][persona],
+            "quit": False,
+            "name": "user",
+            "predictiveText1": match.get('predictiveText1', ""),
+            "predictiveText2": match.get('predictiveText2', ""),
+        }
+
+    def learn(self, prompt, persona, reply):
+        # Keeps a model answer to a general question; it is searchable right away and part of the
+        # on-disk index from the next start
+        best = self.search(prompt, k=1)
+        if best and best[0][0] >= FAQ_DUPLICATE_THRESHOLD and persona in best[0][1]['answers']:
+            return False
+        entry = {
+            "questions": [prompt.strip()],
+            "answers": {persona: reply['response']},
+            "predictiveText1": reply.get('predictiveText1', ""),
+            "predictiveText2": reply.get('predictiveText2', ""),
+        }
+        row = self.embed(prompt).astype(np.float32)
+        with self._lock:
+            oldest_kept = max(len(self._learned_entries) + 1 - FAQ_MAX_LEARNED, 0)
+            self._learned_entries = self._learned_entries[oldest_kept:] + [entry]
+            self._learned_rows = np.vstack([self._learned_rows[oldest_kept:], row])
+            if self.learned_path:
+                with open(self.learned_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.learned_on_disk += 1
+                # Compacting at twice the cap keeps the rewrites rare
+                if self.learned_on_disk > 2 * FAQ_MAX_LEARNED:
+                    self.learned_on_disk = len(compact_learned_faq(self.learned_path, FAQ_MAX_LEARNED))
+        return True
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries) + len(self._learned_entries),
+            "learned_since_start": len(self._learned_entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def learned_faq_key(entry):
+    return " ".join(entry['questions'][0].lower().split()), tuple(sorted(entry['answers']))
+
+
+def compact_learned_faq(learned_path, keep=FAQ_MAX_LEARNED):
+    # Rewrites the learned file with its newest `keep` entries, the latest one per question and persona
+    with open(learned_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    newest = {}
+    for entry in entries:
+        key = learned_faq_key(entry)
+        newest.pop(key, None)
+        newest[key] = entry
+    kept = list(newest.values())[-keep:] if keep else []
+    if len(kept) < len(entries):
+        with open(f"{learned_path}.tmp", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in kept)
+        os.replace(f"{learned_path}.tmp", learned_path)
+    return kept
+
+
+def load_faq_corpus(learned_path=FAQ_LEARNED_PATH):
+    # (faq.json entries plus learned ones, number of learned entries)
+    with open(FAQ_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    learned = compact_learned_faq(learned_path, FAQ_MAX_LEARNED) if learned_path and os.path.exists(learned_path) else []
+    return corpus + learned, len(learned)
+
+
+def remove_stale_faq_index_files(index_dir, version):
+    # Processes still mapping an old matrix keep reading it; unlinking only frees the name
+    for name in os.listdir(index_dir):
+        if name.startswith("faq-") and name.endswith(("-matrix.npy", "-idf.npy")) and not name.startswith(f"faq-{version}-") \
+                and ".tmp." not in name:
+            try:
+                os.remove(os.path.join(index_dir, name))
+            except OSError as e:
+                logger.warning("Could not remove stale FAQ index file %s: %s", name, e)
+
+
+def build_faq_index(index_dir=FAQ_INDEX_DIR, learned_path=FAQ_LEARNED_PATH, telemetry=None):
+    corpus, learned_on_disk = load_faq_corpus(learned_path)
+    rows = [(question, entry) for entry in corpus for question in entry['questions']]
+    fingerprint = json.dumps([corpus, FAQ_DIMENSIONS, sorted(FAQ_STOPWORDS)], sort_keys=True, ensure_ascii=False)
+    version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    matrix_path = os.path.join(index_dir, f"faq-{version}-matrix.npy")
+    idf_path = os.path.join(index_dir, f"faq-{version}-idf.npy")
+
+    if not (os.path.exists(matrix_path) and os.path.exists(idf_path)):
+        counts = faq_term_counts([question for question, _ in rows])
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weights = np.log1p(counts) * idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        os.makedirs(index_dir, exist_ok=True)
+        # Write under temporary names first so another process never maps a half-written file
+        for path, array in ((idf_path, idf), (matrix_path, weights / norms)):
+            np.save(f"{path}.tmp.npy", array)
+            os.replace(f"{path}.tmp.npy", path)
+
+    matrix = np.load(matrix_path, mmap_mode="r")
+    idf = np.load(idf_path)
+    remove_stale_faq_index_files(index_dir, version)
+    return FaqIndex([entry for _, entry in rows], idf, matrix, learned_path, telemetry, learned_on_disk)
+
+
+@st.cache_resource
+def get_faq_index():
+    index = build_faq_index(telemetry=get_telemetry())
+    get_telemetry().register_source("faq_index", index.stats)
+    return index
+
+
+def is_general_question(prompt):
+    # Figures make a question personal, so those always go to the model
+    return not any(ch.isdigit() for ch in prompt) and len(prompt.split()) >= 3
+
+
+def faq_response(prompt, persona):
+    if not is_general_question(prompt):
+        return None
+    try:
+        return get_faq_index().answer(prompt, persona)
+    except (OSError, ValueError) as e:
+        logger.warning("FAQ index unavailable: %s", e)
+        return None
+
+
+def offer_faq_answer(prompt, persona, reply):
+    # A fresh model answer to a general question; it is only learned if the user rates it up
+    if prompt.strip().endswith("?") and is_general_question(prompt) and len(reply.get('response', '')) >= FAQ_MIN_LEARNED_LENGTH:
+        st.session_state.faq_candidate = {
+            'id': st.session_state.get('next_message_seq', 0),
+            'prompt': prompt,
+            'persona': persona,
+            'reply': {key: reply.get(key, "") for key in ('response', 'predictiveText1', 'predictiveText2')},
+        }
+
+
+def learn_faq_answer(prompt, persona, reply):
+    try:
+        get_faq_index().learn(prompt, persona, reply)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not store FAQ answer: %s", e)
+
+
+def rate_faq_candidate(key):
+    # on_change callback of the thumbs under the latest answer
+    candidate = st.session_state.pop('faq_candidate', None)
+    if candidate and st.session_state.get(key) == 1:
+        learn_faq_answer(candidate['prompt'], candidate['persona'], candidate['reply'])
+
+
+def show_faq_feedback():
+    candidate = st.session_state.get('faq_candidate')
+    if candidate:
+        key = f"faq_feedback_{candidate['id']}"
+        st.feedback("thumbs", key=key, on_change=rate_faq_candidate, args=(key,))
@@ -0,0 +1,106 @@
+import re
+
+import streamlit as st
+
+from penny.config import load_app_config
+
+# --- Deterministic fast path ---
+# Greetings, quit commands and bare income answers follow fixed rules in the system prompt,
+# so they are answered locally in the same JSON schema instead of costing a Gemini call.
+
+
+GREETINGS = {
+    "hi", "hello", "hey", "hiya", "howdy", "yo", "sup", "hola",
+    "good morning", "good afternoon", "good evening", "greetings",
+}
+# The professional_intro templates lead into an assessment of the user's figures, which a
+# greeting doesn't give, so professional greetings use these instead
+PROFESSIONAL_GREETINGS = (
+    "Hello, I'm Penny, your budgeting assistant.",
+    "Good to meet you. I'm Penny, and I can help you plan your monthly budget.",
+)
+QUIT_COMMANDS = {"quit", "bye", "exit", "goodbye", "bye bye", "see you", "see ya", "quit chat", "exit chat"}
+AMOUNT_ONLY_PATTERN = re.compile(
+    r"^(?:(?:my|about|around|roughly)\s+)*(?:(?:monthly|net|take home)\s+)?(?:income|salary|pay)?\s*(?:is|of)?\s*"
+    r"(?:\$|xcd|ec\$|usd)?\s*(\d[\d,]*(?:\.\d+)?)\s*(?:xcd|ec|usd|dollars|\$)?(?:\s+(?:a|per)\s+month|\s+monthly)?$"
+)
+
+
+def classify_intent(prompt):
+    text = normalize_prompt(prompt)
+    # "hi penny" / "bye penny" count too
+    if text.endswith(" penny"):
+        text = text[:-len(" penny")].rstrip(" ,")
+    if text in QUIT_COMMANDS:
+        return "quit", None
+    if text in GREETINGS:
+        return "greeting", None
+    match = AMOUNT_ONLY_PATTERN.match(text)
+    if match:
+        return "amount", float(match.group(1).replace(",", ""))
+    return None, None
+
+
+def last_assistant_message():
+    for message in reversed(st.session_state.get('messages', [])):
+        if message["role"] == "assistant":
+            return message["content"]
+    return ""
+
+
+def fast_path_response(prompt, persona):
+    intent, amount = classify_intent(prompt)
+    if intent is None:
+        return None
+
+    config = load_app_config()
+    templates = config.get("advice_templates", {})
+    turn = len(st.session_state.get('messages', []))
+    friendly = persona != "Professional"
+    reply = {"quit": False, "name": "user"}
+
+    if intent == "quit":
+        reply.update({
+            "response": "Goodbye! It was great helping you.",
+            "quit": True,
+            "predictiveText1": "",
+            "predictiveText2": "",
+        })
+    elif intent == "greeting":
+        # Only ask for the income when Penny doesn't have one yet
+        has_income = bool((st.session_state.get('budget') or {}).get('income'))
+        intros = (templates.get("friendly_intro") or [""]) if friendly else PROFESSIONAL_GREETINGS
+        intro = intros[turn % len(intros)]
+        if has_income:
+            question = "What would you like to look at today?" if friendly else "What would you like to review today?"
+            suggestions = ("How am I doing on my budget?", "How can I save more each month?")
+        else:
+            question = "To get started, what's your monthly income?" if friendly else "To begin, please share your monthly income."
+            suggestions = ("What if I don't have a steady income?", "What kind of expenses should I list?")
+        reply.update({
+            "response": f"{intro} {question}".strip(),
+            "predictiveText1": suggestions[0],
+            "predictiveText2": suggestions[1],
+        })
+    else:
+        # A bare number only means something if Penny just asked for the income
+        if "income" not in last_assistant_message().lower():
+            return None
+        categories = config.get("app_config", {}).get("expense_categories", ["Rent", "Food", "Transport"])
+        category_list = ", ".join(c.lower() for c in categories)
+        if friendly:
+            response = f"Got it, {amount:,.2f} a month! 🙌 Now, what are your main monthly expenses? Think {category_list}."
+        else:
+            response = f"Noted: a monthly income of {amount:,.2f}. Next, please list your main monthly expenses ({category_list})."
+        reply.update({
+            "response": response,
+            "predictiveText1": "How do I figure out my monthly expenses?",
+            "predictiveText2": "Should I include savings as an expense?",
+        })
+    return reply
+
+
+def normalize_prompt(prompt):
+    # "Hi!", " hi " and "HI" should all share one cache entry
+    text = " ".join(prompt.lower().split())
+    return text.strip(" .!?,;:")
@@ -0,0 +1,248 @@
+import asyncio
+import concurrent.futures
+import importlib
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+from dotenv import load_dotenv
+from google.api_core import exceptions as google_exceptions
+
+from penny.telemetry import Telemetry, get_telemetry, token_counts
+
+# --- Gemini AI Setup ---
+# Loading .env only has to happen once per process. google.generativeai takes most of a second to
+# import, so the SDK is imported and configured when the first client is built rather than at
+# startup, and pages that never call the model don't pay for it.
+@st.cache_resource
+def gemini_api_key():
+    load_dotenv()
+    return os.getenv("GEMINI_API_KEY")
+
+
+def ensure_gemini_configured():
+    # Pages that call the model check the key before rendering anything that needs it
+    if not gemini_api_key():
+        st.error("Authentication Error: Missing GEMINI_API_KEY. Please make sure you have a .env file with your API key.")
+        st.stop()
+
+
+@st.cache_resource
+def preload_gemini_sdk():
+    # Started once the home page has rendered, so the SDK import overlaps with the user typing
+    # instead of delaying their first reply
+    thread = threading.Thread(target=importlib.import_module, args=("google.generativeai",), name="gemini-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Gemini client ---
+# Every model call goes through one process-wide client that runs the async Gemini API on a
+# background event loop. The Streamlit script thread only waits up to a deadline; transient
+# upstream errors are retried with exponential backoff, slow calls can be hedged with a duplicate
+# request once they pass the observed p95, and a semaphore caps in-flight calls across sessions.
+# Models are built once per system instruction and reused, so a request only carries the user's turn.
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("PENNY_GEMINI_TIMEOUT", "30"))
+GEMINI_MAX_RETRIES = int(os.getenv("PENNY_GEMINI_RETRIES", "2"))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("PENNY_GEMINI_MAX_IN_FLIGHT", "8"))
+GEMINI_HEDGE_REQUESTS = os.getenv("PENNY_GEMINI_HEDGE", "false").lower() == "true"
+
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+STREAM_END = object()
+
+
+class GeminiClient:
+    BACKOFF_BASE_SECONDS = 0.5
+    BACKOFF_MAX_SECONDS = 8.0
+    HEDGE_MIN_SAMPLES = 20
+    HEDGE_MIN_DELAY_SECONDS = 1.0
+
+    def __init__(self, model_name, timeout=GEMINI_TIMEOUT_SECONDS, max_retries=GEMINI_MAX_RETRIES,
+                 max_in_flight=GEMINI_MAX_IN_FLIGHT, hedge=GEMINI_HEDGE_REQUESTS, telemetry=None):
+        self.telemetry = telemetry or Telemetry()
+        self.model_name = model_name
+        self._models = {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.retries = 0
+        self.hedges = 0
+        self._latencies = deque(maxlen=200)
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="gemini-client", daemon=True).start()
+
+    def model_for(self, system_instruction=None):
+        # Only ever called on the event loop thread, so the dict needs no lock
+        if system_instruction not in self._models:
+            import google.generativeai as genai
+
+            self._models[system_instruction] = genai.GenerativeModel(
+                model_name=self.model_name, system_instruction=system_instruction
+            )
+        return self._models[system_instruction]
+
+    # Blocking entry points for the script thread
+    def generate(self, contents, system_instruction=None, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        future = asyncio.run_coroutine_threadsafe(
+            self._generate(contents, system_instruction, timeout, kwargs), self._loop
+        )
+        try:
+            return future.result(timeout + 1)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Gemini did not answer within {timeout:g}s")
+
+    def stream(self, contents, system_instruction=None, timeout=None, **kwargs):
+        # Yields chunks as they arrive; `timeout` bounds the wait for each chunk
+        timeout = timeout or self.timeout
+        chunks = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._stream(contents, system_instruction, kwargs, chunks), self._loop
+        )
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"Gemini stream stalled for {timeout:g}s")
+                if item is STREAM_END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def p95_latency(self):
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def stats(self):
+        return {"retries": self.retries, "hedges": self.hedges, "p95_latency_s": self.p95_latency() or 0.0}
+
+    def record_call(self, name, latency, response):
+        tokens = token_counts(response)
+        self.telemetry.record(name, latency, **tokens)
+        self.telemetry.increment("gemini.calls")
+        self.telemetry.increment("gemini.prompt_tokens", tokens["prompt_tokens"])
+        self.telemetry.increment("gemini.response_tokens", tokens["response_tokens"])
+
+    # Event-loop side
+    def _backoff(self, attempt):
+        delay = min(self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), self.BACKOFF_MAX_SECONDS)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _attempt(self, contents, system_instruction, kwargs):
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self.model_for(system_instruction).generate_content_async(contents, **kwargs)
+            latency = time.perf_counter() - started
+            self._latencies.append(latency)
+            self.record_call("gemini.generate", latency, response)
+            return response
+
+    async def _hedged(self, contents, system_instruction, kwargs):
+        hedge_after = None
+        if self.hedge and len(self._latencies) >= self.HEDGE_MIN_SAMPLES:
+            hedge_after = max(self.p95_latency(), self.HEDGE_MIN_DELAY_SECONDS)
+
+        primary = asyncio.ensure_future(self._attempt(contents, system_instruction, kwargs))
+        if hedge_after is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        # The primary is slower than 95% of recent calls: race a duplicate against it
+        self.hedges += 1
+        pending = {primary, asyncio.ensure_future(self._attempt(contents, system_instruction, kwargs))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _generate(self, contents, system_instruction, timeout, kwargs):
+        deadline = self._loop.time() + timeout
+        attempt = 0
+        while True:
+            remaining = deadline - self._loop.time()
+            try:
+                return await asyncio.wait_for(self._hedged(contents, system_instruction, kwargs), remaining)
+            except TRANSIENT_ERRORS:
+                attempt += 1
+                delay = self._backoff(attempt)
+                if attempt > self.max_retries or self._loop.time() + delay >= deadline:
+                    self.telemetry.increment("gemini.errors")
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _stream(self, contents, system_instruction, kwargs, chunks):
+        attempt = 0
+        try:
+            while True:
+                delivered = False
+                try:
+                    async with self._semaphore:
+                        started = time.perf_counter()
+                        model = self.model_for(system_instruction)
+                        response = await model.generate_content_async(contents, stream=True, **kwargs)
+                        chunk = None
+                        async for chunk in response:
+                            if not delivered:
+                                self.telemetry.record("gemini.stream.first_chunk", time.perf_counter() - started)
+                            delivered = True
+                            chunks.put(chunk)
+                        # Usage metadata arrives with the final chunk
+                        self.record_call("gemini.stream", time.perf_counter() - started, chunk)
+                    chunks.put(STREAM_END)
+                    return
+                except TRANSIENT_ERRORS:
+                    # Only retry if nothing has been shown to the user yet
+                    attempt += 1
+                    if delivered or attempt > self.max_retries:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff(attempt))
+        except Exception as e:
+            self.telemetry.increment("gemini.errors")
+            chunks.put(e)
+
+
+@st.cache_resource
+def get_gemini_client(model_name=GEMINI_MODEL_NAME):
+    import google.generativeai as genai
+
+    api_key = gemini_api_key()
+    if api_key:
+        genai.configure(api_key=api_key)
+    client = GeminiClient(model_name, telemetry=get_telemetry())
+    get_telemetry().register_source("gemini_client", client.stats)
+    return client
@@ -0,0 +1,95 @@
+import os
+import re
+
+import streamlit as st
+
+# --- Conversation memory ---
+# The model only sees what we send it, so each request carries a bounded context: the budget and
+# goals on file, the most recent turns that fit in the token budget, and a compact running summary
+# of older turns. Summarization is incremental and local (no extra model call): each turn that
+# slides out of the window is condensed to one line once and appended to the memory block.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("PENNY_CONTEXT_TOKENS", "1200"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("PENNY_SUMMARY_TOKENS", "300"))
+
+
+def estimate_tokens(text):
+    # Rough 4-characters-per-token estimate; close enough for budgeting without a count_tokens round-trip
+    return len(text) // 4 + 1
+
+
+def summarize_turn(message):
+    text = " ".join(message["content"].split())
+    first_sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first_sentence) > 140:
+        first_sentence = first_sentence[:137] + "..."
+    speaker = "User" if message["role"] == "user" else "Penny"
+    return f"{speaker}: {first_sentence}"
+
+
+def reset_conversation_memory():
+    st.session_state.conversation_summary = []
+    st.session_state.summarized_upto = 0
+
+
+def fold_into_summary(messages):
+    # Condenses turns into the running summary, then trims it from the oldest end
+    summary = st.session_state.conversation_summary
+    summary.extend(summarize_turn(message) for message in messages)
+    while summary and sum(estimate_tokens(line) for line in summary) > SUMMARY_TOKEN_BUDGET:
+        summary.pop(0)
+
+
+def format_financial_memory():
+    lines = []
+    budget = st.session_state.get('budget', {})
+    if budget:
+        fields = ", ".join(f"{key.replace('_', ' ')} {value:.2f}" for key, value in budget.items())
+        lines.append(f"Budget on file: {fields}")
+    for goal in st.session_state.get('goals', []):
+        saved = goal['savings_history'].total()
+        lines.append(f"Goal: {goal['goal_name']} costing {goal['goal_amount']:.2f} over {goal['time_span']} months, {saved:.2f} saved so far")
+    return lines
+
+
+def build_conversation_context(history=None):
+    # Everything before the current prompt, which show_home_page has already appended
+    if history is None:
+        history = st.session_state.get('messages', [])[:-1]
+    if 'conversation_summary' not in st.session_state or st.session_state.summarized_upto > len(history):
+        reset_conversation_memory()
+    summarized_upto = st.session_state.summarized_upto
+
+    # Keep the newest turns that fit in the budget
+    window_start = len(history)
+    used = 0
+    for i in range(len(history) - 1, summarized_upto - 1, -1):
+        cost = estimate_tokens(history[i]["content"]) + 2
+        if used + cost > CONTEXT_TOKEN_BUDGET:
+            break
+        used += cost
+        window_start = i
+
+    # Fold turns that fell out of the window into the summary
+    fold_into_summary(history[summarized_upto:window_start])
+    summary = st.session_state.conversation_summary
+    st.session_state.summarized_upto = max(summarized_upto, window_start)
+
+    sections = []
+    if summary:
+        sections.append("### Memory of earlier conversation ###\n" + "\n".join(summary))
+    financial_lines = format_financial_memory()
+    if financial_lines:
+        sections.append("### Financial data on file ###\n" + "\n".join(financial_lines))
+    recent = history[window_start:]
+    if recent:
+        transcript = "\n".join(f"{'User' if m['role'] == 'user' else 'Penny'}: {m['content']}" for m in recent)
+        sections.append("### Recent conversation ###\n" + transcript)
+    return "\n\n".join(sections)
+
+
+def build_model_input(prompt, history=None):
+    # Returns the text to send and whether it is context-free (and therefore safe to cache)
+    context = build_conversation_context(history)
+    if not context:
+        return prompt, True
+    return f"{context}\n\n### Current input ###\n{prompt}", False
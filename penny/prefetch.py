@@ -0,0 +1,185 @@
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from penny.admission import get_admission_controller
+from penny.decoding import decode_gemini_reply
+from penny.faq import faq_response
+from penny.fast_path import fast_path_response
+from penny.gemini import get_gemini_client
+from penny.memory import build_model_input, format_financial_memory
+from penny.prompts import prompt_template_for
+from penny.telemetry import get_telemetry
+
+# --- Suggestion prefetch ---
+# Every reply ends with two likely follow-ups (predictiveText1/2), shown as quick-reply chips.
+# While the user reads the reply, their answers are generated speculatively on a small thread
+# pool, keyed by the suggestion, the seq of the turn it follows and the financial data on file,
+# so compacting or summarizing the history between the reply and the click doesn't lose them.
+# Clicking a chip takes the finished (or still running) answer instead of starting a new call,
+# and any other outstanding prefetches of that session are cancelled. Prefetches only use spare global capacity and a per-session
+# budget, so speculation never delays real turns.
+PREFETCH_ENABLED = os.getenv("PENNY_PREFETCH", "true").lower() == "true"
+PREFETCH_WORKERS = int(os.getenv("PENNY_PREFETCH_WORKERS", "2"))
+PREFETCH_BUDGET_PER_SESSION = int(os.getenv("PENNY_PREFETCH_BUDGET", "20"))
+PREFETCH_TIMEOUT_SECONDS = float(os.getenv("PENNY_PREFETCH_TIMEOUT", "15"))
+PREFETCH_MAX_ENTRIES = 500
+
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS, max_entries=PREFETCH_MAX_ENTRIES):
+        self.started = 0
+        self.served = 0
+        self.cancelled = 0
+        self.max_entries = max_entries
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="penny-prefetch")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        # fn(cancelled_event) runs on the pool; returns False if the key is already being prefetched
+        with self._lock:
+            if key in self._jobs:
+                return False
+            cancelled = threading.Event()
+            self._jobs[key] = (self._executor.submit(self._run, fn, cancelled), cancelled)
+            self.started += 1
+            while len(self._jobs) > self.max_entries:
+                self._cancel(self._jobs.popitem(last=False)[1])
+            return True
+
+    @staticmethod
+    def _run(fn, cancelled):
+        return None if cancelled.is_set() else fn(cancelled)
+
+    def _cancel(self, job):
+        future, cancelled = job
+        cancelled.set()
+        future.cancel()
+        self.cancelled += 1
+
+    def cancel(self, keys):
+        with self._lock:
+            for key in keys:
+                job = self._jobs.pop(key, None)
+                if job:
+                    self._cancel(job)
+
+    def take(self, key, timeout=PREFETCH_TIMEOUT_SECONDS):
+        # The prefetched result, waiting for it if it is still running; None on any failure
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is None:
+            return None
+        try:
+            result = job[0].result(timeout)
+        except Exception:
+            return None
+        if result is not None:
+            with self._lock:
+                self.served += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "served": self.served,
+                "cancelled": self.cancelled,
+                "pending": len(self._jobs),
+                "hit_rate": self.served / self.started if self.started else 0.0,
+            }
+
+
+@st.cache_resource
+def get_prefetcher():
+    prefetcher = Prefetcher()
+    get_telemetry().register_source("prefetch", prefetcher.stats)
+    return prefetcher
+
+
+def prefetch_key(prompt, persona, history):
+    # `history` is the turns the prompt follows; only the last one's seq is used, since its
+    # position in st.session_state.messages changes when older turns are compacted away
+    template = prompt_template_for(prompt, persona)
+    last_seq = history[-1].get("seq") if history else None
+    facts = "\n".join(format_financial_memory())
+    return hashlib.sha256(f"{persona}|{template.version}|{last_seq}|{facts}|{prompt}".encode("utf-8")).hexdigest()
+
+
+def fetch_speculative(client, controller, system_instruction, model_input, cancelled):
+    # Runs on the prefetch pool, so everything it needs is passed in rather than read from st.*
+    if cancelled.is_set() or not controller.admit_spare():
+        return None
+    response = client.generate(model_input, system_instruction=system_instruction, timeout=PREFETCH_TIMEOUT_SECONDS)
+    return None if cancelled.is_set() else response.text
+
+
+def prefetch_suggestions(persona):
+    # Call after the assistant reply is in st.session_state.messages
+    cancel_prefetches()
+    if not PREFETCH_ENABLED:
+        return
+    prefetcher = get_prefetcher()
+    keys = []
+    for suggestion in st.session_state.get('suggestions', []):
+        if st.session_state.get('prefetch_spent', 0) >= PREFETCH_BUDGET_PER_SESSION:
+            break
+        # Greetings and FAQ answers are already instant
+        if fast_path_response(suggestion, persona) or faq_response(suggestion, persona):
+            continue
+        model_input, _ = build_model_input(suggestion, st.session_state.messages)
+        key = prefetch_key(suggestion, persona, st.session_state.messages)
+        fetch = functools.partial(
+            fetch_speculative, get_gemini_client(), get_admission_controller(),
+            prompt_template_for(suggestion, persona).system_instruction, model_input
+        )
+        if prefetcher.submit(key, fetch):
+            st.session_state.prefetch_spent = st.session_state.get('prefetch_spent', 0) + 1
+        keys.append(key)
+    st.session_state.prefetch_keys = keys
+
+
+def cancel_prefetches():
+    keys = st.session_state.pop('prefetch_keys', [])
+    if keys:
+        get_prefetcher().cancel(keys)
+
+
+def take_prefetched_reply(prompt, persona):
+    # A decoded reply if this exact turn was prefetched; the session's other prefetches are dropped.
+    # Call after the prompt itself was added to st.session_state.messages.
+    keys = st.session_state.pop('prefetch_keys', [])
+    if not keys:
+        return None
+    key = prefetch_key(prompt, persona, st.session_state.get('messages', [])[:-1])
+    get_prefetcher().cancel([k for k in keys if k != key])
+    if key not in keys:
+        return None
+    raw_text = get_prefetcher().take(key)
+    if raw_text is None:
+        return None
+    try:
+        return decode_gemini_reply(raw_text)
+    except json.JSONDecodeError:
+        return None
+
+
+def queue_suggestion(suggestion):
+    # on_click callback: the chip's text becomes the next chat prompt
+    st.session_state.pending_prompt = suggestion
+
+
+def show_suggestion_chips():
+    suggestions = st.session_state.get('suggestions', [])
+    if not suggestions:
+        return
+    for column, (i, suggestion) in zip(st.columns(len(suggestions)), enumerate(suggestions)):
+        with column:
+            st.button(suggestion, key=f"suggestion_{i}", on_click=queue_suggestion, args=(suggestion,), type="secondary")
@@ -0,0 +1,215 @@
+import datetime
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from penny.admission import PRIORITY_BACKGROUND, RateLimited, admit_model_call
+from penny.analytics import goals_frame
+from penny.assets import get_prompt_library
+from penny.budget import saving_capacity
+from penny.cache import get_response_cache, get_single_flight
+from penny.decoding import JsonObjectScanner, repair_json_text
+from penny.gemini import get_gemini_client
+
+# --- Goal projections ---
+# Achievability is decided locally: each goal gets a share of the monthly saving capacity
+# (income minus the overall budget) in proportion to what it still needs, goals with logged
+# savings are projected at their observed pace instead, and a seeded Monte Carlo over income
+# variance gives the chance of reaching each goal within its remaining months. The model is
+# only asked to narrate the resulting verdict.
+PROJECTION_SIMULATIONS = 2000
+INCOME_VARIANCE = 0.15  # Standard deviation of monthly income, as a fraction of income
+ACHIEVABLE_PROBABILITY = 0.8
+AT_RISK_PROBABILITY = 0.5
+GOAL_STATUS_LABELS = {
+    'complete': "🎉 Complete",
+    'achievable': "✅ On track",
+    'at_risk': "⚠️ At risk",
+    'not_achievable': "🚨 Not achievable at this pace",
+}
+
+
+def months_between(start, end):
+    return (end.year - start.year) * 12 + (end.month - start.month)
+
+
+def capacity_ratios(budget, months, simulations=PROJECTION_SIMULATIONS, income_variance=INCOME_VARIANCE, seed=0):
+    # (simulations, months) array of simulated capacity relative to the planned capacity
+    income = budget.get('income', 0) or 0
+    capacity = saving_capacity(budget)
+    rng = np.random.default_rng(seed)
+    if capacity <= 0 or income <= 0:
+        return np.ones((simulations, months))
+    incomes = income * (1 + rng.normal(0, income_variance, size=(simulations, months)))
+    return np.maximum(incomes - (budget.get('monthly_budget', 0) or 0), 0) / capacity
+
+
+@st.cache_data(show_spinner=False)
+def project_goals(goals, budget):
+    frame = goals_frame(goals)
+    if frame.empty:
+        return frame
+    today = datetime.date.today()
+    df = frame.copy()
+
+    elapsed = np.array([
+        months_between(datetime.date.fromisoformat(goal['created']), today) if goal.get('created') else 0
+        for goal in goals
+    ])
+    df['months_left'] = np.maximum(df['time_span'].to_numpy() - elapsed, 1).astype(int)
+    remaining = np.maximum(df['goal_amount'].to_numpy() - df['saved'].to_numpy(), 0)
+    df['monthly_needed'] = remaining / df['months_left'].to_numpy()
+
+    # Split the capacity across every goal at once, in proportion to need
+    capacity = saving_capacity(budget)
+    needed = df['monthly_needed'].to_numpy()
+    total_needed = needed.sum()
+    df['monthly_allocated'] = capacity * needed / total_needed if total_needed > 0 else 0.0
+
+    # Observed pace: logged savings per month since the first entry
+    first_logged = [goal['savings_history'].first_date() for goal in goals]
+    observed_months = np.array([max(months_between(d, today) + 1, 1) if d else 1 for d in first_logged])
+    has_history = np.array([d is not None for d in first_logged])
+    df['observed_monthly_rate'] = np.where(has_history, df['saved'].to_numpy() / observed_months, np.nan)
+    base = np.where(has_history, df['observed_monthly_rate'].to_numpy(), df['monthly_allocated'].to_numpy())
+    df['monthly_projected'] = base
+
+    # Monte Carlo: cumulative contributions under income variance, read off at each goal's horizon
+    ratios = capacity_ratios(budget, int(df['months_left'].max()))
+    cumulative = np.cumsum(ratios, axis=1)[:, df['months_left'].to_numpy() - 1]
+    reached = df['saved'].to_numpy() + base * cumulative >= df['goal_amount'].to_numpy()
+    df['probability'] = np.where(remaining > 0, reached.mean(axis=0), 1.0)
+    df['projected_months'] = np.ceil(np.divide(remaining, base, out=np.full(len(df), np.inf), where=base > 0))
+
+    probability = df['probability'].to_numpy()
+    df['status'] = np.select(
+        [remaining <= 0, probability >= ACHIEVABLE_PROBABILITY, probability >= AT_RISK_PROBABILITY],
+        ['complete', 'achievable', 'at_risk'],
+        default='not_achievable'
+    )
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def what_if_grid(goal_amount, saved, budget, contributions, horizons):
+    # Probability of reaching the goal for every contribution amount x horizon combination
+    contributions = np.asarray(contributions, dtype=float)
+    horizons = np.asarray(horizons, dtype=int)
+    cumulative = np.cumsum(capacity_ratios(budget, int(horizons.max())), axis=1)[:, horizons - 1]
+    totals = saved + contributions[:, None, None] * cumulative[None, :, :]
+    probability = (totals >= goal_amount).mean(axis=1)
+    return pd.DataFrame(
+        probability,
+        index=pd.Index([f"{c:,.2f}/mo" for c in contributions], name="Monthly saving"),
+        columns=[f"{h} mo" for h in horizons]
+    )
+
+
+def show_goal_verdict(verdict):
+    st.markdown(f"**{GOAL_STATUS_LABELS[verdict['status']]}** ({verdict['probability']:.0%} chance within {verdict['months_left']} months)")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Needed per month", f"{verdict['monthly_needed']:,.2f}")
+    col2.metric("Capacity available", f"{verdict['monthly_allocated']:,.2f}")
+    projected = verdict['projected_months']
+    col3.metric("Projected months", "—" if np.isinf(projected) else f"{projected:.0f}")
+
+
+def show_what_if(goal, verdict, budget):
+    needed = max(verdict['monthly_needed'], 1.0)
+    contributions = np.round(needed * np.array([0.5, 0.75, 1.0, 1.25, 1.5]), 2)
+    horizon = int(verdict['months_left'])
+    horizons = sorted({max(horizon - 2, 1), horizon, horizon + 3, horizon + 6, horizon + 12})
+    grid = what_if_grid(goal['goal_amount'], float(verdict['saved']), budget, tuple(contributions), tuple(horizons))
+    st.dataframe(grid.style.format("{:.0%}"), use_container_width=True)
+
+
+# --- Batched goal analysis ---
+# Penny's written take on every goal comes from one structured request covering all goals that
+# need it, instead of one unstructured call per goal. Each explanation is cached in the shared
+# response cache under a fingerprint of the facts sent about that goal and the budget. The facts
+# include the goal's share of the saving capacity, which depends on every other goal, so editing
+# the budget, logging savings or adding a goal only re-asks about the goals whose projection
+# actually changed. The request itself is assets/prompts/goal_analysis.txt, and its version is
+# part of every cached explanation's key.
+
+
+def goal_facts(goals, budget):
+    # What the model is told about each goal, taken from the projection of all goals together
+    projections = project_goals(goals, budget)
+    return [
+        {
+            'id': i,
+            'goal_name': goal['goal_name'],
+            'goal_amount': round(float(projections['goal_amount'].iat[i]), 2),
+            'saved': round(float(projections['saved'].iat[i]), 2),
+            'months_left': int(projections['months_left'].iat[i]),
+            'monthly_needed': round(float(projections['monthly_needed'].iat[i]), 2),
+            'monthly_allocated': round(float(projections['monthly_allocated'].iat[i]), 2),
+            'status': projections['status'].iat[i],
+            'probability': round(float(projections['probability'].iat[i]), 2),
+        }
+        for i, goal in enumerate(goals)
+    ]
+
+
+def goal_analysis_key(fact, budget):
+    facts = {key: value for key, value in fact.items() if key != 'id'}
+    fingerprint = json.dumps({'goal': facts, 'budget': budget}, sort_keys=True, default=str)
+    version = get_prompt_library().version("goal_analysis")
+    return f"goal|{version}|{hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()}"
+
+
+def cached_goal_analyses(goals, budget):
+    # Cached analysis per goal, or None where its projection or the budget changed since the last request
+    cache = get_response_cache()
+    return [cache.get(goal_analysis_key(fact, budget)) for fact in goal_facts(goals, budget)]
+
+
+def analyze_goals_batch(goals, budget):
+    # Returns one {"verdict", "explanation"} dict per goal, asking Gemini about stale goals only
+    facts = goal_facts(goals, budget)
+    cache = get_response_cache()
+    analyses = [cache.get(goal_analysis_key(fact, budget)) for fact in facts]
+    stale = [fact for fact, analysis in zip(facts, analyses) if analysis is None]
+    if not stale:
+        return analyses
+
+    prompt = get_prompt_library().render(
+        "goal_analysis",
+        income=f"{budget.get('income', 0) or 0:.2f}",
+        monthly_budget=f"{budget.get('monthly_budget', 0) or 0:.2f}",
+        capacity=f"{saving_capacity(budget):.2f}",
+        goals=json.dumps(stale, indent=1)
+    )
+
+    def fetch_analysis():
+        if not admit_model_call(PRIORITY_BACKGROUND):
+            raise RateLimited("Penny is busy right now, so Penny's written take will have to wait. The projection above is up to date.")
+        response = get_gemini_client().generate(prompt, generation_config={"response_mime_type": "application/json"})
+        return response.text
+
+    # Students submitting the same goal against the same budget at once share one request
+    flight_key = f"goals|{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+    response_text = get_single_flight().do(flight_key, fetch_analysis)
+
+    results = {}
+    for candidate in JsonObjectScanner().feed(response_text):
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            data = json.loads(repair_json_text(candidate)[0])
+        if isinstance(data, dict) and isinstance(data.get('goals'), list):
+            results = {item.get('id'): item for item in data['goals'] if isinstance(item, dict)}
+            break
+
+    for fact in stale:
+        item = results.get(fact['id'])
+        if not item or not item.get('explanation'):
+            continue
+        analysis = {'verdict': fact['status'], 'explanation': str(item['explanation'])}
+        cache.set(goal_analysis_key(fact, budget), analysis)
+        analyses[fact['id']] = analysis
+    return analyses
@@ -0,0 +1,47 @@
+import hashlib
+from collections import namedtuple
+
+import streamlit as st
+
+from penny.assets import get_prompt_library
+from penny.extraction import needs_model_extraction
+
+# --- Prompts ---
+# The chat system instruction is assembled from assets/prompts: the directive, the persona's
+# section and, for turns whose figures the local parser could not place, the budget_data section.
+PERSONA_PROMPTS = {"Friendly": "persona_friendly", "Professional": "persona_professional"}
+
+
+def build_system_instruction(persona, extract_budget=False):
+    library = get_prompt_library()
+    # Conditionally set the prompt persona based on the user's selection
+    persona_prompt = library.render(PERSONA_PROMPTS[persona]).strip() if persona in PERSONA_PROMPTS else ""
+    system_instruction = library.render("chat_system", persona_prompt=persona_prompt)
+    if extract_budget:
+        system_instruction += library.render("budget_data")
+    return system_instruction
+
+
+# Precompiled persona prompts: the directive is rendered and hashed once per combination of source
+# file versions and sent as the model's system instruction; the hash doubles as the prompt version
+# for cache keys, so editing a prompt file invalidates the answers cached under the old one.
+PromptTemplate = namedtuple("PromptTemplate", ["system_instruction", "version"])
+
+
+@st.cache_resource(max_entries=32)
+def compile_prompt_template(persona, extract_budget, source_versions):
+    # source_versions only keys the cache, so a reloaded prompt file gets a fresh entry
+    system_instruction = build_system_instruction(persona, extract_budget)
+    version = hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:16]
+    return PromptTemplate(system_instruction, version)
+
+
+def get_prompt_template(persona, extract_budget=False):
+    library = get_prompt_library()
+    names = ["chat_system", PERSONA_PROMPTS.get(persona)] + (["budget_data"] if extract_budget else [])
+    versions = tuple(library.version(name) for name in names if name)
+    return compile_prompt_template(persona, extract_budget, versions)
+
+
+def prompt_template_for(prompt, persona):
+    return get_prompt_template(persona, needs_model_extraction(prompt))
@@ -0,0 +1,48 @@
+import os
+
+import streamlit as st
+
+from penny.store import load_earlier_messages
+
+
+# --- Markdown parser ---
+# Built on first use and shared by every session
+@st.cache_resource
+def get_markdown():
+    from markdown_it import MarkdownIt
+
+    return MarkdownIt()
+
+
+# --- Chat transcript rendering ---
+# Only the newest CHAT_WINDOW_SIZE messages are drawn; older ones are revealed a window at a time.
+# Past messages never change, so their Markdown is rendered to HTML once per message id and reused.
+CHAT_WINDOW_SIZE = int(os.getenv("PENNY_CHAT_WINDOW_SIZE", "30"))
+
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def render_message_html(message_id, content):
+    return get_markdown().render(content)
+
+
+def show_earlier_messages():
+    # on_click callback, so the transcript below is drawn with the wider window in the same run
+    window = st.session_state.get('chat_window', CHAT_WINDOW_SIZE)
+    if len(st.session_state.messages) <= window:
+        load_earlier_messages()
+    st.session_state.chat_window = window + CHAT_WINDOW_SIZE
+
+
+def show_chat_transcript():
+    messages = st.session_state.messages
+    window = st.session_state.get('chat_window', CHAT_WINDOW_SIZE)
+    hidden = max(len(messages) - window, 0)
+
+    if hidden or st.session_state.get('history_has_more'):
+        st.button("Load earlier messages", key="load_earlier_messages", on_click=show_earlier_messages)
+
+    user_id = st.session_state.get('user_id', '')
+    for message in messages[hidden:]:
+        with st.chat_message(message["role"]):
+            message_id = f"{user_id}:{message.get('seq')}"
+            st.markdown(render_message_html(message_id, message["content"]), unsafe_allow_html=True)
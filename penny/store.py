@@ -0,0 +1,443 @@
+import copy
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from penny.budget import SavingsHistory, current_month, empty_budget_history, record_budget_month
+from penny.config import APP_DIR
+from penny.memory import fold_into_summary, reset_conversation_memory
+
+# --- Persistence ---
+# Profiles, budgets, goals and chat history live in a shared store instead of only in
+# st.session_state, so any replica can serve any user. PENNY_STORE_BACKEND picks "sqlite"
+# (default, PENNY_STORE_PATH) or "firestore" (firebase_creds.json, or the emulator when
+# FIRESTORE_EMULATOR_HOST is set). Writes are queued and flushed in batches by a background
+# thread so saving never blocks a rerun; chat history is loaded a page at a time, and a session
+# keeps at most PENNY_CHAT_MEMORY_TURNS messages in memory. Older ones are already in the store,
+# so they are dropped from st.session_state and come back through "Load earlier messages".
+# Each user's queued writes go in their own transaction; a batch that keeps failing is retried
+# PENNY_STORE_MAX_RETRIES times, then its writes are tried one by one and any that still fail
+# are appended to PENNY_STORE_DEAD_LETTER_PATH and dropped.
+#
+# Nothing verifies who a user is yet: the login form accepts any email without a password. Data
+# kept under that email would go to anyone who types the same address, so persistence is opt-in
+# (PENNY_PERSIST_USER_DATA=true, for trusted single-user or demo deployments). Otherwise every
+# login gets its own key in a private temporary database that is gone when the process exits.
+PERSIST_USER_DATA = os.getenv("PENNY_PERSIST_USER_DATA", "false").lower() == "true"
+STORE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PENNY_STORE_FLUSH_INTERVAL", "0.5"))
+STORE_MAX_RETRIES = int(os.getenv("PENNY_STORE_MAX_RETRIES", "3"))
+STORE_DEAD_LETTER_PATH = os.getenv("PENNY_STORE_DEAD_LETTER_PATH", os.path.join(APP_DIR, "penny_store_dead_letter.jsonl"))
+HISTORY_PAGE_SIZE = int(os.getenv("PENNY_HISTORY_PAGE_SIZE", "50"))
+CHAT_MEMORY_TURNS = int(os.getenv("PENNY_CHAT_MEMORY_TURNS", "100"))
+
+logger = logging.getLogger("penny")
+
+
+def serialize_goals(goals):
+    return [
+        {**goal, 'savings_history': [
+            {'date': item['date'].isoformat(), 'amount': item['amount']} for item in goal['savings_history']
+        ]}
+        for goal in goals
+    ]
+
+
+def deserialize_goals(goals):
+    return [
+        {**goal, 'savings_history': SavingsHistory(
+            {'date': datetime.date.fromisoformat(item['date']), 'amount': item['amount']} for item in goal['savings_history']
+        )}
+        for goal in goals or []
+    ]
+
+
+class UserRepository:
+    # Storage interface. Documents (profile, budget, goals) are whole-value saves; messages are
+    # append-only and carry a per-user sequence number. Goals are stored in serialized form.
+    def load_document(self, user_id, kind):
+        raise NotImplementedError
+
+    def save_document(self, user_id, kind, value):
+        raise NotImplementedError
+
+    def load_messages(self, user_id, before_seq=None, limit=HISTORY_PAGE_SIZE):
+        # Returns up to `limit` messages older than `before_seq`, oldest first
+        raise NotImplementedError
+
+    def append_messages(self, user_id, messages):
+        raise NotImplementedError
+
+    def clear_messages(self, user_id):
+        raise NotImplementedError
+
+    def last_message_seq(self, user_id):
+        raise NotImplementedError
+
+    def apply(self, operations):
+        # Backends override this to write a whole batch in one transaction
+        for op, user_id, payload in operations:
+            if op == "save":
+                self.save_document(user_id, *payload)
+            elif op == "append":
+                self.append_messages(user_id, payload)
+            elif op == "clear":
+                self.clear_messages(user_id)
+
+
+class SQLiteRepository(UserRepository):
+    DOCUMENT_KINDS = ("profile", "budget", "goals", "budget_history")
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                profile TEXT,
+                budget TEXT,
+                goals TEXT
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                user_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (user_id, seq)
+            );
+        """)
+        # Document kinds added after a database was created become new columns
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+        for kind in self.DOCUMENT_KINDS:
+            if kind not in existing:
+                self._conn.execute(f"ALTER TABLE users ADD COLUMN {kind} TEXT")
+        self._conn.commit()
+
+    def load_document(self, user_id, kind):
+        assert kind in self.DOCUMENT_KINDS
+        with self._lock:
+            row = self._conn.execute(f"SELECT {kind} FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def _save_document(self, user_id, kind, value):
+        assert kind in self.DOCUMENT_KINDS
+        self._conn.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+        self._conn.execute(f"UPDATE users SET {kind} = ? WHERE user_id = ?", (json.dumps(value), user_id))
+
+    def _append_messages(self, user_id, messages):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO messages (user_id, seq, role, content) VALUES (?, ?, ?, ?)",
+            [(user_id, m["seq"], m["role"], m["content"]) for m in messages]
+        )
+
+    def _clear_messages(self, user_id):
+        self._conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+
+    def save_document(self, user_id, kind, value):
+        self.apply([("save", user_id, (kind, value))])
+
+    def append_messages(self, user_id, messages):
+        self.apply([("append", user_id, messages)])
+
+    def clear_messages(self, user_id):
+        self.apply([("clear", user_id, None)])
+
+    def apply(self, operations):
+        with self._lock, self._conn:
+            for op, user_id, payload in operations:
+                if op == "save":
+                    self._save_document(user_id, *payload)
+                elif op == "append":
+                    self._append_messages(user_id, payload)
+                elif op == "clear":
+                    self._clear_messages(user_id)
+
+    def load_messages(self, user_id, before_seq=None, limit=HISTORY_PAGE_SIZE):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content FROM messages WHERE user_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (user_id, before_seq if before_seq is not None else 2 ** 62, limit)
+            ).fetchall()
+        return [{"seq": seq, "role": role, "content": content} for seq, role, content in reversed(rows)]
+
+    def last_message_seq(self, user_id):
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM messages WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row[0] is not None else -1
+
+
+class FirestoreRepository(UserRepository):
+    # users/{user_id} holds the documents as fields; users/{user_id}/messages/{seq} holds the chat
+    def __init__(self, credentials_path):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            if os.getenv("FIRESTORE_EMULATOR_HOST"):
+                project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "penny-emulator")
+                firebase_admin.initialize_app(options={"projectId": project_id})
+            else:
+                firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+        self._firestore = firestore
+        self.db = firestore.client()
+
+    def _user(self, user_id):
+        return self.db.collection("users").document(user_id)
+
+    def load_document(self, user_id, kind):
+        snapshot = self._user(user_id).get()
+        return (snapshot.to_dict() or {}).get(kind) if snapshot.exists else None
+
+    def save_document(self, user_id, kind, value):
+        self.apply([("save", user_id, (kind, value))])
+
+    def append_messages(self, user_id, messages):
+        self.apply([("append", user_id, messages)])
+
+    def clear_messages(self, user_id):
+        self.apply([("clear", user_id, None)])
+
+    def apply(self, operations):
+        batch = self.db.batch()
+        for op, user_id, payload in operations:
+            if op == "save":
+                kind, value = payload
+                batch.set(self._user(user_id), {kind: value}, merge=True)
+            elif op == "append":
+                for m in payload:
+                    doc = self._user(user_id).collection("messages").document(f"{m['seq']:010d}")
+                    batch.set(doc, {"seq": m["seq"], "role": m["role"], "content": m["content"]})
+            elif op == "clear":
+                # Deletes can't be mixed into a pending batch by query, so commit what we have first
+                batch.commit()
+                for doc in self._user(user_id).collection("messages").list_documents():
+                    doc.delete()
+                batch = self.db.batch()
+        batch.commit()
+
+    def load_messages(self, user_id, before_seq=None, limit=HISTORY_PAGE_SIZE):
+        query = self._user(user_id).collection("messages")
+        if before_seq is not None:
+            query = query.where(filter=self._firestore.FieldFilter("seq", "<", before_seq))
+        query = query.order_by("seq", direction=self._firestore.Query.DESCENDING).limit(limit)
+        return [doc.to_dict() for doc in reversed(list(query.stream()))]
+
+    def last_message_seq(self, user_id):
+        latest = self.load_messages(user_id, limit=1)
+        return latest[-1]["seq"] if latest else -1
+
+
+class WriteBehindStore:
+    # Queues writes and lets a background thread apply them in batches, one transaction per user
+    # so one user's bad write can't hold back everyone else's. Consecutive saves of the same
+    # document are coalesced so only the latest value is written. Reads flush the queue first.
+    def __init__(self, repository, flush_interval=STORE_FLUSH_INTERVAL_SECONDS, max_retries=STORE_MAX_RETRIES,
+                 dead_letter_path=STORE_DEAD_LETTER_PATH):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self._pending = []
+        self._failures = {}
+        self._retry_level = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        threading.Thread(target=self._run, name="penny-store", daemon=True).start()
+
+    def _enqueue(self, operation):
+        with self._cond:
+            if operation[0] == "save":
+                key = (operation[1], operation[2][0])
+                self._pending = [op for op in self._pending if not (op[0] == "save" and (op[1], op[2][0]) == key)]
+            self._pending.append(operation)
+            self._cond.notify()
+
+    def save_document(self, user_id, kind, value):
+        self._enqueue(("save", user_id, (kind, copy.deepcopy(value))))
+
+    def append_messages(self, user_id, messages):
+        self._enqueue(("append", user_id, [dict(m) for m in messages]))
+
+    def clear_messages(self, user_id):
+        self._enqueue(("clear", user_id, None))
+
+    def flush(self):
+        with self._flush_lock:
+            with self._cond:
+                operations, self._pending = self._pending, []
+            by_user = {}
+            for operation in operations:
+                by_user.setdefault(operation[1], []).append(operation)
+
+            retry = []
+            for user_id, user_operations in by_user.items():
+                try:
+                    self.repository.apply(user_operations)
+                    self._failures.pop(user_id, None)
+                    continue
+                except Exception:
+                    failures = self._failures.get(user_id, 0) + 1
+                if failures <= self.max_retries:
+                    logger.exception("Failed to write %d queued operations for %s (attempt %d); will retry",
+                                     len(user_operations), user_id, failures)
+                    self._failures[user_id] = failures
+                    retry.extend(user_operations)
+                else:
+                    self._failures.pop(user_id, None)
+                    self._apply_or_dead_letter(user_operations)
+            self._retry_level = max(self._failures.values(), default=0)
+            if retry:
+                # Back in front of anything queued meanwhile, so each user's writes stay in order
+                with self._cond:
+                    self._pending = retry + self._pending
+
+    def _apply_or_dead_letter(self, operations):
+        # Last attempt: one write at a time, so only the writes that actually fail are lost
+        for operation in operations:
+            try:
+                self.repository.apply([operation])
+            except Exception as e:
+                logger.exception("Giving up on a queued %s for %s; see %s", operation[0], operation[1], self.dead_letter_path)
+                self._dead_letter(operation, e)
+
+    def _dead_letter(self, operation, error):
+        op, user_id, payload = operation
+        entry = {"time": time.time(), "op": op, "user_id": user_id, "payload": payload, "error": repr(error)}
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+        except OSError:
+            logger.exception("Could not write to the dead-letter log %s", self.dead_letter_path)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+            # Back off while some user's writes keep failing
+            time.sleep(self.flush_interval * 2 ** self._retry_level)
+            self.flush()
+
+    def load_document(self, user_id, kind):
+        self.flush()
+        return self.repository.load_document(user_id, kind)
+
+    def load_messages(self, user_id, before_seq=None, limit=HISTORY_PAGE_SIZE):
+        self.flush()
+        return self.repository.load_messages(user_id, before_seq, limit)
+
+    def last_message_seq(self, user_id):
+        self.flush()
+        return self.repository.last_message_seq(user_id)
+
+
+@st.cache_resource
+def get_store():
+    backend_name = os.getenv("PENNY_STORE_BACKEND", "sqlite").lower()
+    if not PERSIST_USER_DATA:
+        # An empty path is SQLite's private temporary database
+        repository = SQLiteRepository("")
+    elif backend_name == "firestore":
+        repository = FirestoreRepository(os.path.join(APP_DIR, "firebase_creds.json"))
+    else:
+        repository = SQLiteRepository(os.getenv("PENNY_STORE_PATH", os.path.join(APP_DIR, "penny_data.sqlite3")))
+    return WriteBehindStore(repository)
+
+
+def login_user_id(email):
+    # Without persistence the email is only a label, so each login gets a key nobody else can reuse
+    if PERSIST_USER_DATA:
+        return email
+    return f"{email}#{uuid.uuid4().hex}"
+
+
+def load_user_state(user_id):
+    # Called at login; chat history is left for show_home_page to load on demand
+    store = get_store()
+    profile = store.load_document(user_id, "profile") or {}
+    if profile.get('persona'):
+        st.session_state.persona = profile['persona']
+    st.session_state.budget = store.load_document(user_id, "budget") or {}
+    st.session_state.budget_history = store.load_document(user_id, "budget_history") or empty_budget_history()
+    if st.session_state.budget and not st.session_state.budget_history["month"]:
+        # Budgets saved before monthly history existed count as this month's
+        record_budget_month(st.session_state.budget_history, current_month(), st.session_state.budget)
+    st.session_state.goals = deserialize_goals(store.load_document(user_id, "goals"))
+    st.session_state.pop('history_loaded', None)
+
+
+def persist_profile():
+    get_store().save_document(st.session_state.user_id, "profile", {
+        'user_name': st.session_state.get('user_name', 'user'),
+        'persona': st.session_state.get('persona', 'Friendly'),
+    })
+
+
+def persist_budget():
+    get_store().save_document(st.session_state.user_id, "budget", st.session_state.budget)
+    get_store().save_document(st.session_state.user_id, "budget_history", st.session_state.budget_history)
+
+
+def persist_goals():
+    get_store().save_document(st.session_state.user_id, "goals", serialize_goals(st.session_state.goals))
+
+
+def ensure_chat_history_loaded():
+    if st.session_state.get('history_loaded'):
+        return
+    store = get_store()
+    user_id = st.session_state.user_id
+    messages = store.load_messages(user_id, limit=HISTORY_PAGE_SIZE)
+    st.session_state.messages = messages
+    st.session_state.next_message_seq = messages[-1]["seq"] + 1 if messages else store.last_message_seq(user_id) + 1
+    st.session_state.history_has_more = len(messages) == HISTORY_PAGE_SIZE
+    st.session_state.history_loaded = True
+
+
+def load_earlier_messages():
+    messages = st.session_state.messages
+    before_seq = messages[0]["seq"] if messages else None
+    older = get_store().load_messages(st.session_state.user_id, before_seq=before_seq, limit=HISTORY_PAGE_SIZE)
+    st.session_state.messages = older + messages
+    st.session_state.history_has_more = len(older) == HISTORY_PAGE_SIZE
+    # Older turns are already covered by the conversation memory
+    if 'summarized_upto' in st.session_state:
+        st.session_state.summarized_upto += len(older)
+
+
+def add_message(role, content):
+    message = {"seq": st.session_state.get('next_message_seq', 0), "role": role, "content": content}
+    st.session_state.next_message_seq = message["seq"] + 1
+    st.session_state.messages.append(message)
+    get_store().append_messages(st.session_state.user_id, [message])
+    compact_chat_history()
+    return message
+
+
+def compact_chat_history():
+    # Never drop what the transcript is showing, even after "Load earlier messages"
+    messages = st.session_state.messages
+    excess = len(messages) - max(CHAT_MEMORY_TURNS, st.session_state.get('chat_window', 0))
+    if excess <= 0:
+        return
+    # The conversation memory may not have reached every dropped turn yet (FAQ and fast-path
+    # replies don't build a context), so those are summarized before they go
+    if 'conversation_summary' not in st.session_state:
+        reset_conversation_memory()
+    summarized_upto = st.session_state.summarized_upto
+    fold_into_summary(messages[summarized_upto:excess])
+    st.session_state.summarized_upto = max(summarized_upto - excess, 0)
+    del messages[:excess]
+    st.session_state.history_has_more = True
+
+
+def clear_chat_history():
+    st.session_state.messages = []
+    st.session_state.history_has_more = False
+    st.session_state.pop('suggestions', None)
+    get_store().clear_messages(st.session_state.user_id)
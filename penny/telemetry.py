@@ -0,0 +1,264 @@
+import functools
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- Instrumentation ---
+# Process-wide timing spans and counters. Every page render and model call is recorded; spans
+# keep a rolling window of durations for percentiles on the Admin page. With PENNY_TELEMETRY_LOG
+# set, each span is also written as one JSON log line; PENNY_METRICS_PORT starts a Prometheus
+# endpoint and PENNY_OTEL mirrors spans to OpenTelemetry, when those packages are installed.
+# Logins aren't verified, so the Admin page is unlocked per session with a shared secret:
+# admin_token in .streamlit/secrets.toml, or PENNY_ADMIN_TOKEN. Without one the page is off.
+SPAN_WINDOW = int(os.getenv("PENNY_SPAN_WINDOW", "2000"))
+
+telemetry_logger = logging.getLogger("penny.telemetry")
+
+
+class Telemetry:
+    def __init__(self):
+        self.counters = Counter()
+        self._spans = defaultdict(lambda: deque(maxlen=SPAN_WINDOW))
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._tracer = None
+
+    def enable_opentelemetry(self):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            telemetry_logger.warning("PENNY_OTEL is set but opentelemetry is not installed")
+            return
+        self._tracer = trace.get_tracer("penny")
+
+    def record(self, name, seconds, **attributes):
+        with self._lock:
+            self._spans[name].append(seconds)
+        if telemetry_logger.isEnabledFor(logging.INFO):
+            telemetry_logger.info(json.dumps({"span": name, "duration_ms": round(seconds * 1000, 3), **attributes}, default=str))
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def span(self, name, **attributes):
+        # Attributes added to the yielded dict inside the block are logged with the span
+        started = time.perf_counter()
+        if self._tracer is None:
+            try:
+                yield attributes
+            finally:
+                self.record(name, time.perf_counter() - started, **attributes)
+            return
+        with self._tracer.start_as_current_span(name) as otel_span:
+            try:
+                yield attributes
+            finally:
+                for key, value in attributes.items():
+                    otel_span.set_attribute(key, value)
+                self.record(name, time.perf_counter() - started, **attributes)
+
+    def register_source(self, name, stats_fn):
+        # Other subsystems (caches, parser, client) expose their own counters through a stats() callable
+        self._sources[name] = stats_fn
+
+    def span_percentiles(self):
+        import numpy as np
+
+        with self._lock:
+            spans = {name: np.fromiter(values, dtype=float) for name, values in self._spans.items() if values}
+        rows = {}
+        for name, values in sorted(spans.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+            rows[name] = {"count": len(values), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": values.max() * 1000}
+        return rows
+
+    def sources(self):
+        return {name: stats_fn() for name, stats_fn in self._sources.items()}
+
+
+def start_metrics_exporter(telemetry, port):
+    try:
+        from prometheus_client import REGISTRY, start_http_server
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    except ImportError:
+        telemetry_logger.warning("PENNY_METRICS_PORT is set but prometheus_client is not installed")
+        return
+
+    class TelemetryCollector:
+        def collect(self):
+            latency = GaugeMetricFamily("penny_span_seconds", "Span duration percentiles", labels=["span", "quantile"])
+            for name, row in telemetry.span_percentiles().items():
+                for quantile in ("p50", "p95", "p99"):
+                    latency.add_metric([name, quantile], row[f"{quantile}_ms"] / 1000)
+            yield latency
+            counters = CounterMetricFamily("penny_events", "Event counters", labels=["event"])
+            for name, value in telemetry.counters.items():
+                counters.add_metric([name], value)
+            yield counters
+            sources = GaugeMetricFamily("penny_source", "Subsystem stats", labels=["source", "stat"])
+            for source, stats in telemetry.sources().items():
+                for stat, value in stats.items():
+                    if isinstance(value, (int, float)):
+                        sources.add_metric([source, stat], value)
+            yield sources
+
+    REGISTRY.register(TelemetryCollector())
+    start_http_server(port)
+
+
+@st.cache_resource
+def get_telemetry():
+    telemetry = Telemetry()
+    if os.getenv("PENNY_TELEMETRY_LOG", "").lower() in ("1", "true"):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        telemetry_logger.addHandler(handler)
+        telemetry_logger.setLevel(logging.INFO)
+    if os.getenv("PENNY_OTEL", "").lower() in ("1", "true"):
+        telemetry.enable_opentelemetry()
+    if os.getenv("PENNY_METRICS_PORT"):
+        start_metrics_exporter(telemetry, int(os.getenv("PENNY_METRICS_PORT")))
+    return telemetry
+
+
+def traced(name):
+    # Decorator for page functions: times the whole render as one span
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_telemetry().span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- Session memory ---
+# At the end of a full run the dispatcher measures this session's st.session_state (a deep
+# sys.getsizeof walk, shared objects counted once) and records it here, so the Admin page can show
+# how much memory live sessions hold and which keys dominate. The walk is sampled: each session is
+# measured at most once every PENNY_SESSION_MEMORY_SAMPLE_SECONDS. Sessions not measured for
+# PENNY_SESSION_MEMORY_TTL seconds are dropped from the report.
+SESSION_MEMORY_TTL_SECONDS = float(os.getenv("PENNY_SESSION_MEMORY_TTL", "1800"))
+SESSION_MEMORY_SAMPLE_SECONDS = float(os.getenv("PENNY_SESSION_MEMORY_SAMPLE_SECONDS", "60"))
+SESSION_MEMORY_MAX_SESSIONS = 10000
+
+
+def deep_sizeof(obj, seen):
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+class SessionMemory:
+    def __init__(self, ttl=SESSION_MEMORY_TTL_SECONDS, max_sessions=SESSION_MEMORY_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session id -> (last seen, {key: bytes}), least recent first
+        self._lock = threading.Lock()
+
+    def due(self, session_id, interval=SESSION_MEMORY_SAMPLE_SECONDS):
+        with self._lock:
+            last = self._sessions.get(session_id)
+        return last is None or time.monotonic() - last[0] >= interval
+
+    def record(self, session_id, key_bytes):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), key_bytes)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            cutoff = time.monotonic() - self.ttl
+            while self._sessions and next(iter(self._sessions.values()))[0] < cutoff:
+                self._sessions.popitem(last=False)
+            sessions = [key_bytes for _, key_bytes in self._sessions.values()]
+        totals = sorted(sum(key_bytes.values()) for key_bytes in sessions)
+        by_key = Counter()
+        for key_bytes in sessions:
+            by_key.update(key_bytes)
+        return {
+            "sessions": len(totals),
+            "total_kb": round(sum(totals) / 1024, 1),
+            "mean_kb": round(sum(totals) / len(totals) / 1024, 1) if totals else 0.0,
+            "p95_kb": round(totals[int(0.95 * (len(totals) - 1))] / 1024, 1) if totals else 0.0,
+            "max_kb": round(totals[-1] / 1024, 1) if totals else 0.0,
+            "largest_keys_kb": {key: round(size / 1024, 1) for key, size in by_key.most_common(5)},
+        }
+
+
+@st.cache_resource
+def get_session_memory():
+    session_memory = SessionMemory()
+    get_telemetry().register_source("session_memory", session_memory.stats)
+    return session_memory
+
+
+def session_memory_report():
+    # Bytes held by each st.session_state key of the current session, largest first
+    seen = set()
+    sizes = {str(key): deep_sizeof(value, seen) for key, value in st.session_state.items()}
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+def record_session_memory():
+    ctx = get_script_run_ctx()
+    session_memory = get_session_memory()
+    if ctx is None or not session_memory.due(ctx.session_id):
+        return
+    session_memory.record(ctx.session_id, session_memory_report())
+
+
+def token_counts(response):
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "response_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+def admin_token():
+    try:
+        token = st.secrets.get("admin_token")
+    except FileNotFoundError:
+        token = None
+    return token or os.getenv("PENNY_ADMIN_TOKEN") or None
+
+
+def admin_enabled():
+    return admin_token() is not None
+
+
+def unlock_admin(token):
+    expected = admin_token()
+    if expected is None or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        get_telemetry().increment("admin.unlock_failed")
+        return False
+    st.session_state.admin_unlocked = True
+    return True
+
+
+def is_admin():
+    return admin_enabled() and bool(st.session_state.get('admin_unlocked'))
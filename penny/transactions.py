@@ -0,0 +1,354 @@
+import concurrent.futures
+import io
+import itertools
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+
+import streamlit as st
+
+from penny.budget import EXPENSE_FIELDS, budget_for_month, empty_budget_history, record_budget_month
+from penny.config import load_app_config
+from penny.store import persist_budget
+from penny.telemetry import get_telemetry
+
+logger = logging.getLogger("penny")
+
+# --- Transaction import ---
+# Bank exports uploaded on the Budget page (CSV, or OFX/QFX) are parsed on a background thread,
+# PENNY_IMPORT_CHUNK_ROWS rows at a time, into a columnar table of month, amount and category;
+# no row ever becomes a Python dict. Each chunk is categorized with one vectorized regex match per
+# expense category from convo.json, and the table is rolled up into one budget row per month:
+# credits are income, debits are summed per budget field, and categories without a field of their
+# own count as liabilities, as in the chat extraction. The page polls the job from a fragment, so
+# a multi-year export never blocks a rerun. pandas is imported by the worker, not by the page.
+IMPORT_CHUNK_ROWS = int(os.getenv("PENNY_IMPORT_CHUNK_ROWS", "20000"))
+IMPORT_WORKERS = int(os.getenv("PENNY_IMPORT_WORKERS", "2"))
+IMPORT_POLL_SECONDS = float(os.getenv("PENNY_IMPORT_POLL_SECONDS", "1"))
+IMPORT_MAX_JOBS = 100
+FALLBACK_CATEGORY = "Other"
+
+# Merchant keywords per convo.json category; every category also matches its own name
+CATEGORY_KEYWORDS = {
+    'Rent': ('rent', 'landlord', 'lease', 'housing', 'mortgage', 'property management'),
+    'Food': ('grocery', 'groceries', 'supermarket', 'market', 'restaurant', 'cafe', 'coffee', 'bakery',
+             'pizza', 'burger', 'chicken', 'kfc', 'subway', 'deli', 'food'),
+    'Transport': ('bus', 'taxi', 'uber', 'lyft', 'fuel', 'gas station', 'petrol', 'texaco', 'shell',
+                  'rubis', 'parking', 'toll', 'car rental', 'transport'),
+    'School supplies': ('book', 'books', 'bookstore', 'stationery', 'school', 'tuition', 'university',
+                        'college', 'campus', 'printing'),
+    'Entertainment': ('netflix', 'spotify', 'disney', 'cinema', 'movie', 'theatre', 'concert', 'steam',
+                      'playstation', 'xbox', 'game', 'games', 'bar', 'club'),
+}
+
+# Header names banks use for each column, compared lowercased
+DATE_COLUMNS = ('date', 'transaction date', 'posted date', 'posting date', 'booking date', 'value date', 'trans date')
+DESCRIPTION_COLUMNS = ('description', 'transaction description', 'details', 'memo', 'payee', 'name', 'narrative', 'merchant')
+AMOUNT_COLUMNS = ('amount', 'transaction amount', 'amount (xcd)', 'amount (usd)', 'value')
+DEBIT_COLUMNS = ('debit', 'debit amount', 'withdrawal', 'withdrawals', 'money out', 'paid out')
+CREDIT_COLUMNS = ('credit', 'credit amount', 'deposit', 'deposits', 'money in', 'paid in')
+
+OFX_TRANSACTION_PATTERN = re.compile(r"<STMTTRN>(.*?)(?=</STMTTRN>|<STMTTRN>|</BANKTRANLIST>|\Z)", re.DOTALL | re.IGNORECASE)
+OFX_FIELDS = {
+    'date': r"<DTPOSTED>\s*(\d{8})",
+    'amount': r"<TRNAMT>\s*([-+]?[\d,.]+)",
+    'name': r"<NAME>([^<\r\n]*)",
+    'memo': r"<MEMO>([^<\r\n]*)",
+}
+AMOUNT_JUNK_PATTERN = r"[^\d.\-]"
+DECIMAL_COMMA_PATTERN = r",\d{1,2}\)?-?$"
+# The first two fields of 05/01/2024, 5-1-24 or 05.01.2024
+SLASH_DATE_PATTERN = r"^\s*(\d{1,2})[/.-](\d{1,2})[/.-]\d{2,4}\b"
+
+ImportResult = namedtuple("ImportResult", ["months", "categories", "rows", "skipped"])
+
+
+@st.cache_resource
+def category_rules():
+    # (categories, {category: pattern}); the fallback category has no pattern and is always last
+    categories = [c for c in load_app_config().get('app_config', {}).get('expense_categories', []) if c != FALLBACK_CATEGORY]
+    categories = categories or list(CATEGORY_KEYWORDS)
+    patterns = {
+        category: re.compile(
+            r"\b(?:" + "|".join(re.escape(word) for word in (*CATEGORY_KEYWORDS.get(category, ()), category.lower())) + r")\b",
+            re.IGNORECASE,
+        )
+        for category in categories
+    }
+    return categories + [FALLBACK_CATEGORY], patterns
+
+
+def budget_field(category):
+    return category.lower() if category.lower() in EXPENSE_FIELDS else 'liabilities'
+
+
+def find_column(columns, names):
+    return next((columns[name] for name in names if name in columns), None)
+
+
+def parse_amounts(values):
+    import pandas as pd
+
+    text = values.str.strip()
+    # European exports write 1.234,50: a comma followed by only one or two digits is the decimal point
+    decimal_comma = text.str.contains(DECIMAL_COMMA_PATTERN, regex=True).fillna(False)
+    if decimal_comma.any():
+        text = text.where(~decimal_comma, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    amounts = pd.to_numeric(text.str.replace(AMOUNT_JUNK_PATTERN, "", regex=True).str.rstrip("-"), errors='coerce')
+    # Accounting exports write debits as (12.50), and some banks as 12.50-
+    negative = (text.str.startswith("(") | text.str.endswith("-")).fillna(False)
+    return amounts.where(~negative, -amounts.abs())
+
+
+def dates_are_dayfirst(values):
+    # 13/01/2024 can only be day-first and 01/13/2024 only month-first; a column with neither is
+    # read month-first, as pandas would
+    import pandas as pd
+
+    fields = pd.Series(pd.unique(values.dropna()), dtype=str).str.extract(SLASH_DATE_PATTERN).astype(float)
+    return bool((fields[0] > 12).any() and not (fields[1] > 12).any())
+
+
+def parse_dates(values, date_format=None, dayfirst=None):
+    # Exports repeat each date many times, so only the distinct strings go through the parser.
+    # Without a format or an order from the caller, the order is worked out from these values.
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=str)
+    if date_format is None and dayfirst is None:
+        dayfirst = dates_are_dayfirst(uniques)
+    parsed = pd.to_datetime(uniques, format=date_format, dayfirst=bool(dayfirst), errors='coerce').to_numpy()
+    # Missing values have code -1, which picks the NaT appended at the end
+    return pd.Series(np.append(parsed, np.datetime64('NaT'))[codes], index=values.index)
+
+
+def csv_chunks(data):
+    # Yields (dates, descriptions, amounts) Series per chunk, straight from pandas' C parser
+    import pandas as pd
+
+    options = dict(encoding='utf-8-sig', encoding_errors='replace', skipinitialspace=True)
+    try:
+        header = pd.read_csv(io.BytesIO(data), nrows=0, **options).columns
+    except pd.errors.EmptyDataError:
+        raise ValueError("This file is empty.")
+    columns = {str(name).strip().lower(): name for name in header}
+    date = find_column(columns, DATE_COLUMNS)
+    description = find_column(columns, DESCRIPTION_COLUMNS)
+    amount = find_column(columns, AMOUNT_COLUMNS)
+    debit, credit = find_column(columns, DEBIT_COLUMNS), find_column(columns, CREDIT_COLUMNS)
+    if date is None or (amount is None and debit is None and credit is None):
+        raise ValueError("Could not find a date and an amount column in this file.")
+    usecols = [column for column in (date, description, amount, debit, credit) if column is not None]
+    # The day/month order is decided once for the whole file, so a chunk of ambiguous dates is
+    # read the same way as the rest
+    dayfirst = dates_are_dayfirst(pd.read_csv(io.BytesIO(data), usecols=[date], dtype=str, **options)[date])
+    for chunk in pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=str, chunksize=IMPORT_CHUNK_ROWS, **options):
+        if amount is not None:
+            amounts = parse_amounts(chunk[amount])
+        else:
+            credits = parse_amounts(chunk[credit]) if credit is not None else pd.Series(float('nan'), index=chunk.index)
+            debits = parse_amounts(chunk[debit]) if debit is not None else pd.Series(float('nan'), index=chunk.index)
+            amounts = (credits.fillna(0).abs() - debits.fillna(0).abs()).where(credits.notna() | debits.notna())
+        descriptions = chunk[description] if description is not None else pd.Series("", index=chunk.index)
+        yield parse_dates(chunk[date], dayfirst=dayfirst), descriptions, amounts
+
+
+def ofx_chunks(data):
+    # OFX is SGML more often than XML, so each <STMTTRN> block is cut out by pattern and the
+    # blocks are batched into Series for vectorized field extraction
+    import pandas as pd
+
+    matches = OFX_TRANSACTION_PATTERN.finditer(data.decode('utf-8', errors='replace'))
+    while True:
+        blocks = pd.Series([match.group(1) for match in itertools.islice(matches, IMPORT_CHUNK_ROWS)], dtype=str)
+        if blocks.empty:
+            return
+        fields = {name: blocks.str.extract(pattern, flags=re.IGNORECASE, expand=False) for name, pattern in OFX_FIELDS.items()}
+        descriptions = fields['name'].fillna("").str.cat(fields['memo'].fillna(""), sep=" ")
+        yield parse_dates(fields['date'], "%Y%m%d"), descriptions, parse_amounts(fields['amount'])
+
+
+def categorize(descriptions, categories, patterns):
+    import numpy as np
+    import pandas as pd
+
+    text = descriptions.fillna("")
+    # The first matching category wins; anything unmatched is the fallback
+    matches = [text.str.contains(patterns[category], regex=True).to_numpy(dtype=bool) for category in categories[:-1]]
+    codes = np.select(matches, np.arange(len(matches)), default=len(categories) - 1) if matches else np.zeros(len(text), dtype=int)
+    return pd.Categorical.from_codes(codes.astype(np.int8), categories=categories)
+
+
+def transactions_table(dates, descriptions, amounts, categories, patterns):
+    import pandas as pd
+
+    valid = (dates.notna() & amounts.notna()).to_numpy()
+    return pd.DataFrame({
+        'month': dates[valid].dt.to_period('M').array,
+        'amount': amounts[valid].to_numpy(dtype=float),
+        'category': categorize(descriptions[valid], categories, patterns),
+    })
+
+
+def monthly_rollup(table):
+    # One row per month: income, the expense fields and total spending
+    import pandas as pd
+
+    months = pd.PeriodIndex(sorted(table['month'].unique()), freq='M')
+    debits = table[table['amount'] < 0]
+    spent = (-debits['amount']).groupby([debits['month'], debits['category']], observed=True).sum().unstack(fill_value=0.0)
+    # Months x categories is small, so folding categories into budget fields happens after the groupby
+    rollup = spent.T.groupby(budget_field).sum().T.reindex(index=months, columns=EXPENSE_FIELDS, fill_value=0.0)
+    rollup['income'] = table['amount'].clip(lower=0).groupby(table['month']).sum().reindex(months, fill_value=0.0)
+    rollup['spending'] = rollup[EXPENSE_FIELDS].sum(axis=1)
+    rollup.index = months.strftime("%Y-%m")
+    by_category = (-debits['amount']).groupby(debits['category'], observed=True).sum()
+    return rollup, {category: float(total) for category, total in by_category.items() if total > 0}
+
+
+def import_transactions(name, data, rules, progress):
+    import pandas as pd
+
+    categories, patterns = rules
+    chunks = ofx_chunks(data) if name.lower().endswith(('.ofx', '.qfx')) else csv_chunks(data)
+    tables, rows = [], 0
+    for dates, descriptions, amounts in chunks:
+        tables.append(transactions_table(dates, descriptions, amounts, categories, patterns))
+        rows += len(dates)
+        progress['rows'] = rows
+    table = pd.concat(tables, ignore_index=True) if tables else None
+    if table is None or table.empty:
+        raise ValueError("No transactions with a date and an amount were found in this file.")
+    months, by_category = monthly_rollup(table)
+    return ImportResult(months, by_category, len(table), rows - len(table))
+
+
+class TransactionImporter:
+    def __init__(self, telemetry, workers=IMPORT_WORKERS, max_jobs=IMPORT_MAX_JOBS):
+        self.telemetry = telemetry
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.rows = 0
+        self.max_jobs = max_jobs
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="penny-import")
+        self._jobs = OrderedDict()  # job id -> (future, progress)
+        self._lock = threading.Lock()
+
+    def submit(self, name, data, rules):
+        job_id = uuid.uuid4().hex
+        progress = {'rows': 0}
+        with self._lock:
+            self._jobs[job_id] = (self._executor.submit(self._run, name, data, rules, progress), progress)
+            self.started += 1
+            # Jobs whose session never came back for the result
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)[1][0].cancel()
+        return job_id
+
+    def _run(self, name, data, rules, progress):
+        with self.telemetry.span("import.transactions", bytes=len(data)) as attributes:
+            result = import_transactions(name, data, rules, progress)
+            attributes["rows"] = result.rows
+        with self._lock:
+            self.rows += result.rows
+        return result
+
+    def poll(self, job_id):
+        # ("running", rows read so far), ("done", ImportResult) or ("failed", message)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return "failed", "The import was interrupted. Please upload the file again."
+            future, progress = job
+            if not future.done():
+                return "running", progress['rows']
+            del self._jobs[job_id]
+            error = future.exception()
+            if error is None:
+                self.finished += 1
+                return "done", future.result()
+            self.failed += 1
+        if not isinstance(error, ValueError):
+            logger.error("Transaction import failed", exc_info=error)
+        return "failed", str(error) if isinstance(error, ValueError) else "This file could not be read as a bank export."
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "finished": self.finished,
+                "failed": self.failed,
+                "running": len(self._jobs),
+                "rows": self.rows,
+            }
+
+
+@st.cache_resource
+def get_transaction_importer():
+    telemetry = get_telemetry()
+    importer = TransactionImporter(telemetry)
+    telemetry.register_source("imports", importer.stats)
+    return importer
+
+
+def start_transaction_import(uploaded_file):
+    st.session_state.pop('import_summary', None)
+    st.session_state.pop('import_error', None)
+    st.session_state.import_job = get_transaction_importer().submit(uploaded_file.name, uploaded_file.getvalue(), category_rules())
+
+
+def apply_imported_months(result):
+    # Imported months replace their income and expense figures; an overall budget the user set is kept
+    history = st.session_state.setdefault('budget_history', empty_budget_history())
+    for month, row in zip(result.months.index, result.months.to_dict('records')):
+        budget = budget_for_month(history, month)
+        budget.update({field: row[field] for field in ('income', *EXPENSE_FIELDS)})
+        budget['monthly_budget'] = budget.get('monthly_budget') or row['spending']
+        record_budget_month(history, month, budget)
+    st.session_state.budget = budget_for_month(history, history['month'][-1])
+    persist_budget()
+
+
+@st.fragment(run_every=IMPORT_POLL_SECONDS)
+def show_import_status():
+    job_id = st.session_state.get('import_job')
+    if job_id is None:
+        return
+    state, value = get_transaction_importer().poll(job_id)
+    if state == "running":
+        st.info(f"Importing transactions... {value:,} rows read so far.")
+        return
+    del st.session_state['import_job']
+    if state == "failed":
+        st.session_state.import_error = value
+    else:
+        apply_imported_months(value)
+        st.session_state.import_summary = {
+            'rows': value.rows,
+            'skipped': value.skipped,
+            'months': list(value.months.index),
+            'categories': value.categories,
+        }
+    # The budget form above the fragment shows the imported figures after a full rerun
+    st.rerun()
+
+
+def show_import_summary():
+    if 'import_error' in st.session_state:
+        st.error(st.session_state.import_error)
+    summary = st.session_state.get('import_summary')
+    if not summary:
+        return
+    months = summary['months']
+    st.success(f"Imported {summary['rows']:,} transactions covering {len(months)} months ({months[0]} to {months[-1]}).")
+    if summary['skipped']:
+        st.caption(f"{summary['skipped']:,} rows without a readable date or amount were skipped.")
+    lines = [f"- {category}: ${total:,.2f}" for category, total in sorted(summary['categories'].items(), key=lambda item: -item[1])]
+    if lines:
+        st.markdown("**Spending by category**\n" + "\n".join(lines))
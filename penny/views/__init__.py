@@ -0,0 +1 @@
+# One module per page; streamlit_app.py imports each the first time its page is shown.
@@ -0,0 +1,37 @@
+import pandas as pd
+import streamlit as st
+
+from penny.telemetry import get_telemetry, is_admin, session_memory_report, traced, unlock_admin
+
+
+@traced("page.admin")
+def show_admin_page():
+    st.title("🛠️ Admin: Performance")
+    if not is_admin():
+        with st.form("admin_unlock_form"):
+            token = st.text_input("Admin token", type="password")
+            if st.form_submit_button("Unlock"):
+                if unlock_admin(token):
+                    st.rerun()
+                st.error("That token is not valid.")
+        return
+    st.markdown("Latency percentiles and counters for this server process.")
+    st.markdown("---")
+
+    telemetry = get_telemetry()
+    percentiles = telemetry.span_percentiles()
+    st.subheader("Spans")
+    if percentiles:
+        st.dataframe(pd.DataFrame.from_dict(percentiles, orient='index').round(1), use_container_width=True)
+    else:
+        st.info("No spans recorded yet.")
+
+    st.subheader("Counters")
+    st.json(dict(telemetry.counters))
+    for source, stats in telemetry.sources().items():
+        st.subheader(source.replace('_', ' ').title())
+        st.json(stats)
+
+    st.subheader("This Session")
+    st.caption("Approximate bytes held by each session state key.")
+    st.json(session_memory_report())
@@ -0,0 +1,70 @@
+import streamlit as st
+
+from penny.budget import budget_for_month, empty_budget_history, recent_months, record_budget_month
+from penny.store import persist_budget
+from penny.telemetry import traced
+from penny.transactions import show_import_status, show_import_summary, start_transaction_import
+
+
+@traced("page.budget")
+def show_budget_page():
+    st.title("📝 Budget Details")
+    st.markdown("Please provide your financial information below.")
+    st.markdown("---")
+
+    # Initialize budget data if it doesn't exist
+    if 'budget' not in st.session_state:
+        st.session_state.budget = {}
+    if 'budget_history' not in st.session_state:
+        st.session_state.budget_history = empty_budget_history()
+
+    # Budgets are saved per month; default to the current one
+    months = recent_months(12)
+    month = st.selectbox("Month:", months, key='budget_month')
+    saved = budget_for_month(st.session_state.budget_history, month) or (st.session_state.budget if month == months[0] else {})
+
+    with st.form("budget_form"):
+        st.markdown("##### Income & Overall Budget")
+        income = st.text_input("Monthly Income:", value=str(saved.get('income', '')), placeholder="e.g., 1500 XCD", key=f'budget_income_{month}')
+        monthly_budget = st.text_input("Overall Monthly Budget:", value=str(saved.get('monthly_budget', '')), placeholder="e.g., 1000 XCD", key=f'budget_monthly_budget_{month}')
+
+        st.markdown("##### Expenses & Liabilities")
+        rent = st.text_input("Rent:", value=str(saved.get('rent', '')), placeholder="e.g., 500 XCD", key=f'budget_rent_{month}')
+        food = st.text_input("Food:", value=str(saved.get('food', '')), placeholder="e.g., 300 XCD", key=f'budget_food_{month}')
+        transport = st.text_input("Transport:", value=str(saved.get('transport', '')), placeholder="e.g., 100 XCD", key=f'budget_transport_{month}')
+        liabilities = st.text_input("Other Liabilities:", value=str(saved.get('liabilities', '')), placeholder="e.g., 50 XCD", key=f'budget_liabilities_{month}')
+        
+        submitted = st.form_submit_button("Save Budget Details")
+        
+        if submitted:
+            try:
+                month_budget = {
+                    'income': float(income or 0),
+                    'monthly_budget': float(monthly_budget or 0),
+                    'rent': float(rent or 0),
+                    'food': float(food or 0),
+                    'transport': float(transport or 0),
+                    'liabilities': float(liabilities or 0)
+                }
+                history = st.session_state.budget_history
+                record_budget_month(history, month, month_budget)
+                # The working budget is always the latest month on file
+                if month == history['month'][-1]:
+                    st.session_state.budget = month_budget
+                persist_budget()
+                st.success("Budget details saved! Navigate to the 'Graphs' page to see your breakdown.")
+                st.rerun()
+            except ValueError:
+                st.error("Please ensure all financial inputs are valid numbers.")
+
+    st.markdown("---")
+    st.markdown("##### Import Transactions")
+    st.markdown("Upload a CSV or OFX export from your bank to fill in income and expenses for every month it covers.")
+    uploaded_file = st.file_uploader("Bank export:", type=["csv", "ofx", "qfx"], key='transactions_file')
+    importing = 'import_job' in st.session_state
+    if st.button("Import Transactions", disabled=uploaded_file is None or importing):
+        start_transaction_import(uploaded_file)
+        importing = True
+    if importing:
+        show_import_status()
+    show_import_summary()
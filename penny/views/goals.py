@@ -0,0 +1,171 @@
+import datetime
+
+import streamlit as st
+
+from penny.admission import RateLimited
+from penny.budget import SavingsHistory
+from penny.config import ai_advice_enabled
+from penny.gemini import ensure_gemini_configured
+from penny.projections import (
+    GOAL_STATUS_LABELS, analyze_goals_batch, cached_goal_analyses, project_goals, show_goal_verdict, show_what_if,
+)
+from penny.rendering import get_markdown
+from penny.store import persist_goals
+from penny.telemetry import traced
+
+
+@traced("page.goals")
+def show_financial_goals_page():
+    st.title("🎯 Financial Goals")
+    st.markdown("Set your goals and see if they are achievable.")
+    st.markdown("---")
+    if ai_advice_enabled():
+        ensure_gemini_configured()
+    
+    # Initialize goals data
+    if 'goals' not in st.session_state:
+        st.session_state.goals = []
+
+    st.subheader("Add a New Goal")
+    with st.form("goal_form"):
+        goal_name = st.text_input("What is your goal?", placeholder="e.g., New Laptop")
+        goal_amount = st.text_input("What is the cost?", placeholder="e.g., 1200 XCD")
+        time_span = st.text_input("How many months do you want to save for?", placeholder="e.g., 6")
+        submitted = st.form_submit_button("Check Achievability & Save")
+
+        if submitted:
+            try:
+                goal_amount_val = float(goal_amount or 0)
+                time_span_val = int(time_span or 1)
+                
+                budget_data = st.session_state.get('budget', {})
+                new_goal = {
+                    'goal_name': goal_name,
+                    'goal_amount': goal_amount_val,
+                    'time_span': time_span_val,
+                    'savings_history': SavingsHistory(),
+                    'created': datetime.date.today().isoformat(),
+                }
+
+                # Decide achievability locally, against all the other goals sharing the same capacity
+                verdict = project_goals(st.session_state.goals + [new_goal], budget_data).iloc[-1]
+                analysis = {'goal_name': goal_name, 'verdict': verdict.to_dict(), 'narration': None}
+
+                # Gemini only narrates the verdict, and only when AI advice is enabled. The same
+                # request also refreshes any saved goals whose analysis went stale.
+                if ai_advice_enabled():
+                    try:
+                        with st.spinner('Checking your goal...'):
+                            analyses = analyze_goals_batch(st.session_state.goals + [new_goal], budget_data)
+                        if analyses[-1]:
+                            analysis['narration'] = analyses[-1]['explanation']
+                    except RateLimited as e:
+                        st.info(str(e))
+                    except Exception as e:
+                        st.error(f"Error getting response from Gemini: {e}")
+                
+                # Save goal to session state with savings history
+                st.session_state.goals.append(new_goal)
+                persist_goals()
+                st.session_state.last_goal_analysis = analysis
+                st.success("Goal saved! You can now track your progress below.")
+                st.rerun()
+            except ValueError:
+                st.error("Please enter valid numbers for amount and time span.")
+
+    # Keep the latest analysis visible after the rerun that saves the goal
+    analysis = st.session_state.get('last_goal_analysis')
+    if analysis:
+        st.subheader(f"Penny's Achievability Analysis: {analysis['goal_name']}")
+        show_goal_verdict(analysis['verdict'])
+        if analysis['narration']:
+            rendered_text = get_markdown().render(analysis['narration'])
+            st.markdown(rendered_text, unsafe_allow_html=True)
+
+    st.markdown("---")
+    st.subheader("Your Saved Goals")
+    if st.session_state.goals:
+        budget_data = st.session_state.get('budget', {})
+        # Shared by the goal fragments below, which only recompute it after logging savings
+        st.session_state.goal_projections = project_goals(st.session_state.goals, budget_data).to_dict('records')
+        analyses = cached_goal_analyses(st.session_state.goals, budget_data) if ai_advice_enabled() else []
+
+        # After a budget change or new savings, refresh every out-of-date goal in a single request
+        stale_count = sum(analysis is None for analysis in analyses)
+        if stale_count:
+            if st.button(f"Ask Penny about {stale_count} goal(s) with changes", key="refresh_goal_analyses"):
+                try:
+                    with st.spinner('Checking your goals...'):
+                        analyze_goals_batch(st.session_state.goals, budget_data)
+                except RateLimited as e:
+                    st.info(str(e))
+                except Exception as e:
+                    st.error(f"Error getting response from Gemini: {e}")
+        for i in range(len(st.session_state.goals)):
+            show_saved_goal(i)
+    else:
+        st.info("You haven't set any goals yet.")
+
+
+# Each saved goal is its own fragment: logging savings reruns that goal's form, progress bar and
+# verdict only, instead of the whole app and every other goal. The other goals' verdicts, which
+# share the same saving capacity, catch up on the next full rerun.
+@st.fragment
+@traced("fragment.goal")
+def show_saved_goal(i):
+    goal = st.session_state.goals[i]
+    budget_data = st.session_state.get('budget', {})
+    st.markdown(f"### {goal['goal_name']}")
+
+    # Form to add a new savings contribution
+    with st.form(key=f"savings_form_{i}", clear_on_submit=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            # Changed to text_input to remove - and + buttons
+            savings_amount_str = st.text_input("Amount Saved:", value="", placeholder="e.g., 50.00", key=f"amount_str_{i}")
+        with col2:
+            savings_date = st.date_input("Date:", datetime.date.today(), key=f"date_{i}")
+
+        submit_savings = st.form_submit_button("Log Savings")
+
+        if submit_savings:
+            try:
+                savings_amount = float(savings_amount_str)
+                if savings_amount > 0:
+                    goal['savings_history'].append(savings_date, savings_amount)
+                    persist_goals()
+                    st.session_state.goal_projections = project_goals(st.session_state.goals, budget_data).to_dict('records')
+                    st.success(f"Saved ${savings_amount:.2f} logged for {goal['goal_name']}!")
+                else:
+                    st.warning("Please enter a positive amount to log.")
+            except ValueError:
+                st.error("Please enter a valid number for the amount.")
+
+    # Calculate and display progress
+    total_saved = goal['savings_history'].total()
+    goal_amount = goal['goal_amount']
+    progress = min(total_saved / goal_amount, 1.0) if goal_amount > 0 else 0.0
+
+    st.markdown(f"**Progress:** {total_saved:.2f} / {goal_amount:.2f}")
+
+    # Custom, styled progress bar
+    progress_percentage = progress * 100
+    st.markdown(f"""
+        <div class="progress-container">
+            <div class="progress-fill" style="width: {progress_percentage:.1f}%;">
+                <span>{progress_percentage:.1f}%</span>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+    verdict = st.session_state.goal_projections[i]
+    st.caption(f"{GOAL_STATUS_LABELS[verdict['status']]} · {verdict['probability']:.0%} chance within {verdict['months_left']} months")
+    analysis = cached_goal_analyses(st.session_state.goals, budget_data)[i] if ai_advice_enabled() else None
+    if analysis:
+        with st.expander("Penny's take"):
+            st.markdown(get_markdown().render(analysis['explanation']), unsafe_allow_html=True)
+    if verdict['status'] != 'complete':
+        with st.expander("What if I saved more, or for longer?"):
+            show_what_if(goal, verdict, budget_data)
+
+    st.markdown("---")
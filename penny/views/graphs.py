@@ -0,0 +1,45 @@
+import streamlit as st
+
+from penny.analytics import budget_frame, category_breakdown
+from penny.budget import ROLLING_WINDOW_MONTHS, current_month, empty_budget_history, record_budget_month
+from penny.charts import show_chart
+from penny.telemetry import traced
+
+
+@traced("page.graphs")
+def show_graphs_page():
+    st.title("📈 Financial Graphs")
+    st.markdown("Visualize your budget and financial progress.")
+    st.markdown("---")
+
+    history = st.session_state.get('budget_history')
+    if not history or not history['month']:
+        # Budgets entered outside the Budget page (e.g. older sessions) still get a chart
+        history = empty_budget_history()
+        if st.session_state.get('budget'):
+            record_budget_month(history, current_month(), st.session_state.budget)
+    frame = budget_frame(history)
+
+    if not frame.empty and frame['income'].iloc[-1] > 0:
+        show_budget_charts(history, frame)
+    else:
+        st.info("Please fill out the Budget page to see your graphs.")
+
+
+# The charts are a fragment, so picking another month redraws them without rerunning the page
+@st.fragment
+@traced("fragment.graphs")
+def show_budget_charts(history, frame):
+    months = [month for month in reversed(frame.index) if frame.at[month, 'income'] > 0]
+    month = st.selectbox("Month:", months, key='graphs_month') if len(months) > 1 else months[0]
+    show_chart("budget_pie", category_breakdown(history, month))
+
+    if len(frame) > 1:
+        st.subheader("Month over Month")
+        trend = frame[['income_avg', 'total_expenses_avg', 'remaining_avg']].rename(columns={
+            'income_avg': 'Income',
+            'total_expenses_avg': 'Expenses',
+            'remaining_avg': 'Remaining',
+        })
+        st.caption(f"{ROLLING_WINDOW_MONTHS}-month rolling averages")
+        show_chart("budget_trend", trend)
@@ -0,0 +1,143 @@
+import streamlit as st
+
+from penny.chat import STREAM_RESPONSES, get_response_from_gemini, stream_response_from_gemini
+from penny.extraction import coerce_budget_data, extract_budget_locally, merge_extracted_budget, show_pending_goals
+from penny.faq import show_faq_feedback
+from penny.fast_path import last_assistant_message
+from penny.gemini import ensure_gemini_configured, preload_gemini_sdk
+from penny.memory import reset_conversation_memory
+from penny.prefetch import cancel_prefetches, prefetch_suggestions, show_suggestion_chips
+from penny.rendering import CHAT_WINDOW_SIZE, show_chat_transcript
+from penny.store import add_message, clear_chat_history, ensure_chat_history_loaded, persist_profile
+from penny.telemetry import traced
+
+
+@traced("page.home")
+def show_home_page():
+    ensure_gemini_configured()
+    user_name = st.session_state.get('user_name', 'User')
+    
+    st.markdown(f"""
+        <div class="main-header">
+            <h1 class='home-title-gradient'>Hi, I'm Penny.</h1>
+            <p class='home-greeting-text'>Hello there, **{user_name}**! How can I help you today?</p>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    st.markdown(f"""
+        <div class="persona-selection-box">
+            <p class='persona-selection-label'>Choose Penny's persona:</p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Validate and set the persona to prevent the ValueError
+    current_persona = st.session_state.get('persona', 'Friendly')
+    persona_options = ("Friendly", "Professional")
+    if current_persona not in persona_options:
+        current_persona = "Friendly"
+        st.session_state.persona = "Friendly"
+        
+    persona = st.radio(
+        "Choose Penny's persona:",
+        persona_options,
+        index=persona_options.index(current_persona),
+        horizontal=True,
+        label_visibility="collapsed",
+        key='persona_selector'
+    )
+    if persona != st.session_state.get('persona'):
+        st.session_state.persona = persona
+        persist_profile()
+
+    # Add a button to clear the chat messages
+    st.button("Clear Chat", key="clear_chat_button", help="Clear all chat messages", type="secondary", on_click=clear_chat)
+
+    st.markdown("<br>", unsafe_allow_html=True) # Add some spacing
+
+    show_chat()
+    preload_gemini_sdk()
+
+
+def clear_chat():
+    cancel_prefetches()
+    clear_chat_history()
+    st.session_state.pop('pending_goals', None)
+    st.session_state.pop('faq_candidate', None)
+    reset_conversation_memory()
+    st.session_state.chat_window = CHAT_WINDOW_SIZE
+
+
+# The transcript, the input and the suggestion chips form one fragment: sending a message,
+# clicking a chip or loading earlier messages reruns only this part of the page, not the theme,
+# sidebar and header. The chat input is inline rather than pinned inside a fragment.
+@st.fragment
+@traced("fragment.chat")
+def show_chat():
+    ensure_chat_history_loaded()
+    show_chat_transcript()
+
+    # Input area for chat; a clicked suggestion chip counts as typed input
+    prompt = st.chat_input("Ask Penny a question...") or st.session_state.pop('pending_prompt', None)
+    
+    if prompt:
+        # Save any figures in the message before Penny answers, so the reply already sees them
+        expecting_income = "income" in last_assistant_message().lower()
+        local_extraction = extract_budget_locally(prompt, expecting_income)
+        st.session_state.pop('faq_candidate', None)
+        extracted = merge_extracted_budget(local_extraction)
+
+        # Add the user's message to the chat history
+        add_message("user", prompt)
+        
+        # Display the user's message immediately
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        
+        with st.chat_message("assistant"):
+            if STREAM_RESPONSES:
+                # Stream the reply into the chat bubble as it is generated; the rest of
+                # the JSON (quit, name, predictiveText*) is filled in once the object closes
+                ai_response_json = {}
+                streamed_text = st.write_stream(stream_response_from_gemini(prompt, st.session_state.persona, ai_response_json))
+            else:
+                # Display a thinking message while waiting for the response
+                with st.spinner('Penny is thinking...'):
+                    # Call the new function that handles the AI response and JSON validation
+                    ai_response_json = get_response_from_gemini(prompt, st.session_state.persona)
+                streamed_text = None
+
+            model_extraction = coerce_budget_data(ai_response_json.pop('budget_data', None))
+            extracted += merge_extracted_budget(model_extraction)
+            st.session_state.pending_goals = local_extraction['suggested_goals'] + model_extraction['suggested_goals']
+            if extracted:
+                st.toast(f"Saved to your budget: {', '.join(field.replace('_', ' ') for field in extracted)}")
+
+            # The greeting above the chat shows the name, so a new one needs a full rerun
+            renamed = 'name' in ai_response_json and ai_response_json['name'] not in ("user", st.session_state.get('user_name'))
+            if renamed:
+                st.session_state.user_name = ai_response_json['name']
+                st.session_state.name_set = True
+                persist_profile()
+            
+            suggestions = [ai_response_json.get(key) for key in ("predictiveText1", "predictiveText2")]
+            st.session_state.suggestions = list(dict.fromkeys(text.strip() for text in suggestions if text and text.strip()))
+
+            if ai_response_json.get("quit", False):
+                st.session_state.suggestions = []
+                add_message("assistant", "Goodbye! It was great helping you.")
+                st.rerun()
+
+            ai_response_content = ai_response_json.get("response", "I'm sorry, I couldn't generate a response.")
+            if streamed_text is None:
+                st.markdown(ai_response_content)
+            add_message("assistant", ai_response_content)
+            prefetch_suggestions(st.session_state.persona)
+        
+        # No st.rerun() needed here. Streamlit reruns the fragment when a chat input is
+        # received, and the new message will be in st.session_state.messages.
+        if renamed:
+            st.rerun()
+
+    show_faq_feedback()
+    show_pending_goals()
+    show_suggestion_chips()
@@ -0,0 +1,32 @@
+import streamlit as st
+
+from penny.store import PERSIST_USER_DATA, load_user_state, login_user_id, persist_profile
+from penny.telemetry import traced
+
+
+@traced("page.login")
+def show_login_page():
+    st.title("Login to Your Account")
+    st.info("This is a simplified prototype. Just enter a name and email to 'log in'.")
+    if PERSIST_USER_DATA:
+        st.warning("Your email isn't verified and there is no password check: anyone who enters the same email will see your budget, goals and chats.")
+    else:
+        st.caption("Your email isn't verified, so your budget, goals and chats are only kept for this session.")
+    st.markdown("---")
+    with st.form("login_form"):
+        user_name = st.text_input("First Name:")
+        email = st.text_input("Email Address")
+        password = st.text_input("Password", type="password")
+        submitted = st.form_submit_button("Enter")
+
+        if submitted:
+            if email and user_name:
+                st.session_state.logged_in = True
+                st.session_state.user_id = login_user_id(email)
+                st.session_state.user_name = user_name # Store user's first name
+                load_user_state(st.session_state.user_id)
+                persist_profile()
+                st.session_state.page = 'home'
+                st.rerun()
+            else:
+                st.error("Please enter a name and email to log in.")
@@ -0,0 +1,15 @@
+import streamlit as st
+
+from penny.telemetry import traced
+
+
+@traced("page.logout")
+def show_log_out_page():
+    st.title("Log Out")
+    st.markdown("Are you sure you want to log out?")
+    st.markdown("---")
+    if st.button("Log Out", key="logout_button"):
+        st.session_state.clear()
+        st.success("You have been logged out successfully.")
+        st.info("Redirecting to the welcome page...")
+        st.rerun()
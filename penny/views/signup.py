@@ -0,0 +1,13 @@
+import streamlit as st
+
+from penny.telemetry import traced
+
+
+@traced("page.signup")
+def show_signup_page():
+    st.title("Create Your Account")
+    st.info("This feature is currently disabled. Please use the login page to proceed.")
+    st.markdown("---")
+    if st.button("Go to Login", key="signup_to_login"):
+        st.session_state.page = 'login'
+        st.rerun()
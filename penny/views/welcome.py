@@ -0,0 +1,19 @@
+import streamlit as st
+
+from penny.telemetry import traced
+
+
+@traced("page.welcome")
+def show_welcome_page():
+    st.title("Penny's Budgeting Assistant")
+    st.subheader("Your AI-powered peer for smart financial planning.")
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Login", key="welcome_login"):
+            st.session_state.page = 'login'
+            st.rerun()
+    with col2:
+        if st.button("Sign Up", key="welcome_signup"):
+            st.session_state.page = 'signup'
+            st.rerun()
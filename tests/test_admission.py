@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from penny.admission import PRIORITY_BACKGROUND, PRIORITY_CHAT, AdmissionController, TokenBucket
+
+
+class FakeClock:
+    # Only moves when a test advances it, so refill is exact and no admit ever waits on it
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_controller(clock, user_per_minute=60, user_burst=3, global_per_minute=600, global_burst=100):
+    return AdmissionController(user_per_minute=user_per_minute, user_burst=user_burst,
+                               global_per_minute=global_per_minute, global_burst=global_burst,
+                               max_wait={PRIORITY_CHAT: 0, PRIORITY_BACKGROUND: 0}, clock=clock)
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(60, 2, clock)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time(clock()) == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert bucket.wait_time(clock()) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert bucket.wait_time(clock()) == 0.0
+    clock.advance(3600)
+    bucket.wait_time(clock())
+    assert bucket.tokens == 2
+
+
+def test_user_burst_is_enforced_and_refills():
+    clock = FakeClock()
+    controller = make_controller(clock)
+    assert [controller.admit("a@example.com") for _ in range(4)] == [True, True, True, False]
+    assert controller.stats()["rejected_user"] == 1
+    # Another user has their own allowance
+    assert controller.admit("b@example.com")
+    clock.advance(1)
+    assert controller.admit("a@example.com")
+    assert not controller.admit("a@example.com")
+
+
+def test_global_bucket_rejects_under_contention():
+    clock = FakeClock()
+    controller = make_controller(clock, global_per_minute=0, global_burst=2)
+    users = [f"user{i}@example.com" for i in range(8)]
+    start = threading.Barrier(len(users))
+    results = {}
+
+    def call(user_id):
+        start.wait()
+        results[user_id] = controller.admit(user_id)
+
+    threads = [threading.Thread(target=call, args=(user_id,)) for user_id in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sum(results.values()) == 2
+    stats = controller.stats()
+    assert stats["rejected_global"] == 6
+    assert stats["queued"] == 0
+    # A user turned away by the global bucket keeps their own token
+    rejected = [user_id for user_id, admitted in results.items() if not admitted]
+    assert all(controller._users[user_id].tokens == 3 for user_id in rejected)
+
+
+def test_spare_capacity_leaves_room_for_chat():
+    clock = FakeClock()
+    controller = make_controller(clock, global_per_minute=0, global_burst=4)
+    assert [controller.admit_spare() for _ in range(4)] == [True, True, True, False]
+    assert controller.admit("a@example.com")
+    assert controller.stats()["rejected_spare"] == 1
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from penny.cache import SingleFlight
+
+
+def start_leader(flight, key, fn):
+    # Runs flight.do() for `key` in a thread and returns once that thread leads the flight
+    def lead():
+        try:
+            flight.do(key, fn)
+        except RuntimeError:
+            pass
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    while key not in flight._flights:
+        time.sleep(0.001)
+    return thread
+
+
+def slow(result=None, error=None, seconds=0.05):
+    def fn():
+        time.sleep(seconds)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    leader = start_leader(flight, "k", slow(result={"response": "hi"}))
+    assert flight.do("k", lambda: pytest.fail("follower should not call upstream")) == {"response": "hi"}
+    leader.join()
+    assert flight.stats()["collapsed"] == 1
+
+
+def test_follower_makes_its_own_call_when_the_leader_fails():
+    flight = SingleFlight()
+    leader = start_leader(flight, "k", slow(error=RuntimeError("stream died")))
+    assert flight.do("k", lambda: "own reply") == "own reply"
+    leader.join()
+    assert flight.stats()["leader_failures"] == 1
+
+
+def test_a_base_exception_in_the_leader_still_ends_the_flight():
+    flight = SingleFlight()
+    with pytest.raises(KeyboardInterrupt):
+        flight.do("k", slow(error=KeyboardInterrupt()))
+    assert flight.stats()["in_flight"] == 0
+    assert flight.do("k", lambda: "next") == "next"
+
+
+def test_follower_waits_while_the_leader_makes_progress():
+    flight = SingleFlight()
+    shared, _ = flight.join("k")
+
+    def stream():
+        for _ in range(6):
+            time.sleep(0.02)
+            shared.touch()
+        flight.finish("k", result="done")
+
+    threading.Thread(target=stream).start()
+    # Longer in total than the stall timeout, but never silent for that long
+    assert flight.wait(shared, stall_timeout=0.06) == "done"
+
+
+def test_follower_gives_up_on_a_stalled_leader():
+    flight = SingleFlight()
+    shared, _ = flight.join("k")
+    with pytest.raises(TimeoutError):
+        flight.wait(shared, stall_timeout=0.02)
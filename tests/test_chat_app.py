@@ -0,0 +1,34 @@
+import os
+from unittest import mock
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from benchmarks import fake_gemini
+from benchmarks.load import APP_PATH, prepare_environment
+
+
+@pytest.fixture
+def chat(tmp_path):
+    # A logged-in session on the Home page, talking to the fake model
+    with mock.patch.dict(os.environ):
+        prepare_environment(str(tmp_path))
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        for key, value in dict(logged_in=True, user_id="test@example.com", user_name="Test", persona="Friendly",
+                               page="home", history_loaded=True, messages=[], budget={}, goals=[]).items():
+            at.session_state[key] = value
+        yield at
+    fake_gemini.install(fake_gemini.FakeGeminiConfig())
+
+
+@pytest.mark.parametrize("malformed", ["smart_quotes", "trailing_comma", "fenced", "preamble"])
+def test_a_repaired_reply_is_shown_in_the_chat(chat, malformed):
+    fake_gemini.install(fake_gemini.FakeGeminiConfig(malformed=malformed))
+    chat.run()
+    # A figure keeps the question out of the FAQ, so it goes to the model
+    prompt = f"Is splitting 3 ways a good idea ({malformed})?"
+    chat.chat_input[0].set_value(prompt).run()
+    assert not chat.exception
+    reply = chat.session_state["messages"][-1]
+    assert reply["role"] == "assistant" and prompt[-30:] in reply["content"]
+    assert reply["content"] in [block.value for message in chat.chat_message for block in message.markdown]
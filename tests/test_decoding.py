@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from penny.decoding import JsonObjectScanner, ResponseFieldStream, decode_gemini_reply, repair_json_text
+
+
+def stream(*chunks):
+    field = ResponseFieldStream()
+    return [field.feed(chunk) for chunk in chunks], field
+
+
+# --- repair_json_text ---
+
+def test_smart_quotes_are_replaced_only_as_delimiters():
+    text, repairs = repair_json_text('{“response”: “She said “hi” to me”}')
+    assert repairs == ["smart_quotes"]
+    assert json.loads(text) == {"response": "She said “hi” to me"}
+
+
+def test_trailing_commas_are_removed():
+    text, repairs = repair_json_text('{"response": "ok", "items": [1, 2,], "quit": false,\n}')
+    assert repairs == ["trailing_comma"]
+    assert json.loads(text) == {"response": "ok", "items": [1, 2], "quit": False}
+
+
+def test_python_literals_become_json():
+    text, repairs = repair_json_text('{"response": "ok", "quit": True, "name": None, "flags": [False]}')
+    assert repairs == ["python_literals"]
+    assert json.loads(text) == {"response": "ok", "quit": True, "name": None, "flags": [False]}
+
+
+def test_repairs_leave_string_contents_alone():
+    text, repairs = repair_json_text('{"response": "It is True, [a, b,] \\"None,\\" too", "quit": True,}')
+    assert repairs == ["trailing_comma", "python_literals"]
+    assert json.loads(text)["response"] == 'It is True, [a, b,] "None," too'
+
+
+def test_curly_quotes_inside_valid_strings_survive_other_repairs():
+    text, repairs = repair_json_text('{"response": "Try this: “pay yourself first”, then budget.", "quit": false,}')
+    assert repairs == ["trailing_comma"]
+    assert json.loads(text) == {"response": "Try this: “pay yourself first”, then budget.", "quit": False}
+
+
+def test_a_curly_quoted_key_next_to_straight_quoted_values():
+    text, repairs = repair_json_text('{“response”: "He said “hi”", "quit": false}')
+    assert repairs == ["smart_quotes"]
+    assert json.loads(text) == {"response": "He said “hi”", "quit": False}
+
+
+def test_control_characters_in_curly_quoted_strings():
+    text, repairs = repair_json_text('{“response”: “line\nbreak”, “quit”: True}')
+    assert repairs == ["python_literals", "smart_quotes", "control_characters"]
+    assert json.loads(text) == {"response": "line\nbreak", "quit": True}
+
+
+def test_repairs_stop_once_the_text_parses():
+    text, repairs = repair_json_text('{"response": "ok",}')
+    assert (text, repairs) == ('{"response": "ok"}', ["trailing_comma"])
+
+
+def test_raw_control_characters_in_strings_are_escaped():
+    text, repairs = repair_json_text('{"response": "line one\nline\ttwo"}')
+    assert repairs == ["control_characters"]
+    assert json.loads(text) == {"response": "line one\nline\ttwo"}
+
+
+def test_valid_json_needs_no_repairs():
+    raw = '{"response": "fine", "quit": false}'
+    assert repair_json_text(raw) == (raw, [])
+
+
+# --- JsonObjectScanner / decode_gemini_reply ---
+
+def test_scanner_ignores_braces_inside_strings_across_chunks():
+    scanner = JsonObjectScanner()
+    for chunk in ('Sure! ```json\n{"response": "use {curly', '} braces", "quit"', ': false}\n```'):
+        scanner.feed(chunk)
+    assert scanner.objects == ['{"response": "use {curly} braces", "quit": false}']
+
+
+def test_decode_prefers_the_object_with_a_response():
+    reply = decode_gemini_reply('{} Here you go: {"response": "Hi", "quit": "true", "predictiveText1": 3,}')
+    assert reply == {"response": "Hi", "quit": True, "name": "user", "predictiveText1": "3", "predictiveText2": ""}
+
+
+def test_decode_raises_without_an_object():
+    with pytest.raises(json.JSONDecodeError):
+        decode_gemini_reply("no json here")
+
+
+# --- ResponseFieldStream ---
+
+def test_stream_finds_a_key_split_across_chunks():
+    outputs, field = stream('{"resp', 'onse": "Hel', 'lo", "quit": false}')
+    assert "".join(outputs) == "Hello"
+    assert field.done
+    assert field.buffer == '{"response": "Hello", "quit": false}'
+
+
+@pytest.mark.parametrize("chunks", [
+    ('{"response": "a\\', 'nb\\', '"c"}'),
+    ('{"response": "a\\nb', '\\"c"}'),
+])
+def test_stream_decodes_escapes_split_across_chunks(chunks):
+    outputs, field = stream(*chunks)
+    assert "".join(outputs) == 'a\nb"c'
+    assert field.done
+
+
+def test_stream_decodes_unicode_escape_split_across_chunks():
+    outputs, _ = stream('{"response": "caf\\u0', '0e9!"}')
+    assert outputs == ["caf", "é!"]
+
+
+@pytest.mark.parametrize("chunks", [
+    ('{"response": "hi \\ud83d\\ude00"}',),
+    ('{"response": "hi \\ud83d', '\\ude00"}'),
+    ('{"response": "hi \\ud83d\\u', 'de00"}'),
+])
+def test_stream_joins_surrogate_pairs(chunks):
+    outputs, _ = stream(*chunks)
+    assert "".join(outputs) == "hi \U0001F600"
+
+
+def test_stream_keeps_a_lone_surrogate_and_continues():
+    outputs, field = stream('{"response": "\\ud83d and more text"}')
+    assert "".join(outputs) == "\ud83d and more text"
+    assert field.done
+
+
+def test_stream_stops_at_the_closing_quote_but_keeps_buffering():
+    outputs, field = stream('{"response": "done", "name": "x"', '}')
+    assert outputs == ["done", ""]
+    assert field.buffer.endswith('"name": "x"}')
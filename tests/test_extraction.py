@@ -0,0 +1,106 @@
+import pytest
+
+from penny.extraction import coerce_budget_data, extract_budget_locally, needs_model_extraction
+
+CAR = {'goal_name': 'Car', 'goal_amount': 5000.0, 'time_span': 12}
+
+
+@pytest.mark.parametrize("prompt", [
+    "What if my rent goes up to 600?",
+    "Is 300 too much to spend on food?",
+    "is 300 too much to spend on food",
+    "If I paid 600 in rent could I still save?",
+    "Should my food budget be 300",
+    "Suppose I earned 2000 a month",
+    "My income dropped by 200 this month",
+    "My rent went up to 600",
+    "I spend 50 more on transport now",
+    "Food increased by 40",
+    "I have 2 loans",
+    "I have 3 kids and 2 jobs",
+    "Rent is 30% of my income",
+])
+def test_questions_changes_and_counts_save_nothing(prompt):
+    assert extract_budget_locally(prompt) == {'budget': {}, 'goals': [], 'suggested_goals': []}
+    assert not needs_model_extraction(prompt)
+
+
+@pytest.mark.parametrize("prompt, budget", [
+    ("I make 1500 XCD, rent is 500, food 300", {'income': 1500.0, 'rent': 500.0, 'food': 300.0}),
+    ("I spend 1,200.50 on rent.", {'rent': 1200.5}),
+    ("I earn 400 a week", {'income': 1733.33}),
+    ("I pay 150 for 2 loans", {'liabilities': 150.0}),
+    ("My rent went up to 600. Food is 250", {'food': 250.0}),
+    ("What's a good food budget? Transport is 80", {'transport': 80.0}),
+    ("I get paid 800 every two weeks", {'income': 1733.33}),
+    ("I earn 300 fortnightly", {'income': 650.0}),
+    ("I spend 10 a day on food", {'food': 304.17}),
+    ("I spend 20 on lunch 5 days a week", {'food': 433.33}),
+    ("I make 20 an hour for 30 hours a week", {'income': 2600.0}),
+    ("I make 1500 a month", {'income': 1500.0}),
+])
+def test_stated_figures_are_saved(prompt, budget):
+    assert extract_budget_locally(prompt)['budget'] == budget
+
+
+@pytest.mark.parametrize("prompt", [
+    "I owe 5000 on my student loan",
+    "I have 500 left after rent",
+    "I have 2000 in savings",
+    "I spent 40 on a taxi today",
+    "I paid 25 for food last night",
+])
+def test_balances_and_one_off_spends_save_nothing(prompt):
+    assert extract_budget_locally(prompt)['budget'] == {}
+    assert not needs_model_extraction(prompt)
+
+
+@pytest.mark.parametrize("prompt", [
+    "I make 20 an hour",
+    "I pay 90 for insurance every quarter",
+    "Rent is 1200 per semester",
+])
+def test_periods_the_parser_cannot_convert_ask_the_model(prompt):
+    assert extract_budget_locally(prompt)['budget'] == {}
+    assert needs_model_extraction(prompt)
+
+
+def test_a_bare_amount_is_income_only_after_penny_asked():
+    assert extract_budget_locally("1500", expecting_income=True)['budget'] == {'income': 1500.0}
+    assert extract_budget_locally("1500")['budget'] == {}
+
+
+@pytest.mark.parametrize("prompt", [
+    "I want to save 5000 for a car in 12 months",
+    "I'm saving 5000 for a car in 1 year",
+    "My goal is to buy a car for 5000 in 12 months",
+    "Save 5000 for a car in 12 months",
+])
+def test_stated_goals_are_saved(prompt):
+    extracted = extract_budget_locally(prompt)
+    assert extracted['goals'] == [CAR]
+    assert extracted['suggested_goals'] == []
+
+
+@pytest.mark.parametrize("prompt", [
+    "Can I afford a car for 5000 in 12 months?",
+    "What if I save 5000 for a car in 12 months",
+    "My friend managed to buy a car for 5000 in 12 months",
+])
+def test_other_goal_mentions_need_confirmation(prompt):
+    extracted = extract_budget_locally(prompt)
+    assert extracted['goals'] == []
+    assert extracted['suggested_goals'] == [CAR]
+
+
+def test_unplaced_stated_figures_ask_the_model():
+    assert needs_model_extraction("Gym membership 40")
+    assert not needs_model_extraction("Is a gym membership of 40 worth it?")
+
+
+def test_model_goals_are_only_suggestions():
+    extracted = coerce_budget_data({
+        'income': 1500, 'expenses': {'rent': 500, 'food': None, 'bogus': 3},
+        'goals': [{'goal_name': ' Car ', 'goal_amount': '5000', 'time_span': 12}, {'goal_name': 'Broken'}],
+    })
+    assert extracted == {'budget': {'income': 1500.0, 'rent': 500.0}, 'goals': [], 'suggested_goals': [CAR]}
@@ -0,0 +1,57 @@
+import json
+import os
+
+from penny import faq
+from penny.faq import build_faq_index, compact_learned_faq
+
+ANSWER = "Start with a small emergency fund, then pay down the debts that charge the most interest first."
+
+
+def reply(text=ANSWER):
+    return {"response": text, "predictiveText1": "", "predictiveText2": ""}
+
+
+def learned_line(question, answer, persona="Friendly"):
+    return json.dumps({"questions": [question], "answers": {persona: answer}}) + "\n"
+
+
+def test_compaction_keeps_the_newest_entry_per_question_and_persona(tmp_path):
+    path = tmp_path / "learned.jsonl"
+    path.write_text(
+        learned_line("How do I save?", "old") + learned_line("How do I save?", "old", "Professional")
+        + learned_line("what is a budget?", "a") + learned_line("How  do I SAVE?", "new")
+    )
+    kept = compact_learned_faq(str(path))
+    assert [(e["questions"][0], e["answers"]) for e in kept] == [
+        ("How do I save?", {"Professional": "old"}), ("what is a budget?", {"Friendly": "a"}), ("How  do I SAVE?", {"Friendly": "new"}),
+    ]
+    assert [json.loads(line) for line in path.read_text().splitlines()] == kept
+
+
+def test_compaction_keeps_only_the_newest_entries(tmp_path):
+    path = tmp_path / "learned.jsonl"
+    path.write_text("".join(learned_line(f"Question {i}?", "a") for i in range(10)))
+    assert [e["questions"][0] for e in compact_learned_faq(str(path), keep=3)] == ["Question 7?", "Question 8?", "Question 9?"]
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_rebuilding_removes_index_files_of_older_versions(tmp_path):
+    index_dir, learned = str(tmp_path / "index"), str(tmp_path / "learned.jsonl")
+    build_faq_index(index_dir, learned).learn("How should I pay off two credit cards?", "Friendly", reply())
+    first = sorted(os.listdir(index_dir))
+    build_faq_index(index_dir, learned)
+    second = sorted(os.listdir(index_dir))
+    assert len(first) == len(second) == 2
+    assert not set(first) & set(second)
+
+
+def test_learned_answers_are_searchable_and_the_file_stays_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(faq, "FAQ_MAX_LEARNED", 2)
+    learned = tmp_path / "learned.jsonl"
+    index = build_faq_index(str(tmp_path / "index"), str(learned))
+    questions = [f"How do I budget for {topic}?" for topic in ("holidays", "textbooks", "concerts", "birthdays", "weddings", "sneakers")]
+    for question in questions:
+        assert index.learn(question, "Friendly", reply(f"{ANSWER} ({question})"))
+    assert index.answer("How do I budget for sneakers?", "Friendly")["response"].endswith("(How do I budget for sneakers?)")
+    assert index.stats()["learned_since_start"] == 2
+    assert len(learned.read_text().splitlines()) <= 4
@@ -0,0 +1,20 @@
+from penny.prefetch import prefetch_key
+
+
+def turns(first_seq, count):
+    return [{"seq": seq, "role": "user" if seq % 2 == 0 else "assistant", "content": f"turn {seq}"}
+            for seq in range(first_seq, first_seq + count)]
+
+
+def test_key_survives_compacting_older_turns():
+    history = turns(0, 12)
+    key = prefetch_key("How do I start an emergency fund?", "Friendly", history)
+    assert prefetch_key("How do I start an emergency fund?", "Friendly", history[4:]) == key
+
+
+def test_key_changes_with_the_turn_and_the_persona():
+    history = turns(0, 12)
+    key = prefetch_key("How do I start an emergency fund?", "Friendly", history)
+    assert prefetch_key("How do I start an emergency fund?", "Friendly", turns(0, 13)) != key
+    assert prefetch_key("How do I start an emergency fund?", "Professional", history) != key
+    assert prefetch_key("How do I pay off my loan?", "Friendly", history) != key
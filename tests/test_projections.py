@@ -0,0 +1,80 @@
+import datetime
+import functools
+
+import numpy as np
+import pytest
+
+from penny import projections
+from penny.budget import SavingsHistory
+from penny.projections import capacity_ratios, goal_analysis_key, goal_facts, project_goals, what_if_grid
+
+BUDGET = {'income': 2000.0, 'monthly_budget': 1500.0}
+
+
+def goal(name, amount, months, saved=0.0):
+    history = SavingsHistory()
+    if saved:
+        history.append(datetime.date.today(), saved)
+    return {'goal_name': name, 'goal_amount': amount, 'time_span': months, 'savings_history': history,
+            'created': datetime.date.today().isoformat()}
+
+
+@pytest.fixture(autouse=True)
+def fresh_projections():
+    project_goals.clear()
+    what_if_grid.clear()
+    yield
+    project_goals.clear()
+    what_if_grid.clear()
+
+
+def test_simulation_is_reproducible_for_a_seed():
+    assert np.array_equal(capacity_ratios(BUDGET, 12, seed=3), capacity_ratios(BUDGET, 12, seed=3))
+    assert not np.array_equal(capacity_ratios(BUDGET, 12, seed=3), capacity_ratios(BUDGET, 12, seed=4))
+
+
+def test_percentiles_of_the_saved_total_are_ordered():
+    totals = 500 * np.cumsum(capacity_ratios(BUDGET, 12), axis=1)
+    p10, p50, p90 = np.percentile(totals, [10, 50, 90], axis=0)
+    assert np.all(p10 < p50) and np.all(p50 < p90)
+    # Later months never fall behind earlier ones at any percentile
+    assert np.all(np.diff(p10) >= 0) and np.all(np.diff(p90) >= 0)
+    assert p50[-1] == pytest.approx(500 * 12, rel=0.05)
+
+
+def test_what_if_probability_grows_with_contribution_and_horizon():
+    grid = what_if_grid(3000.0, 0.0, BUDGET, (100.0, 250.0, 400.0), (6, 12, 24)).to_numpy()
+    assert np.all(np.diff(grid, axis=0) >= 0)
+    assert np.all(np.diff(grid, axis=1) >= 0)
+
+
+def test_a_goal_already_met_is_complete():
+    df = project_goals([goal("Laptop", 800.0, 6, saved=900.0), goal("Trip", 1200.0, 6)], BUDGET)
+    laptop = df.iloc[0]
+    assert laptop['status'] == 'complete'
+    assert laptop['probability'] == 1.0
+    assert laptop['monthly_needed'] == 0.0
+    # A met goal takes none of the capacity from the others
+    assert laptop['monthly_allocated'] == 0.0
+    assert df.iloc[1]['monthly_allocated'] == pytest.approx(500.0)
+
+
+def test_zero_variance_matches_the_deterministic_projection(monkeypatch):
+    monkeypatch.setattr(projections, 'capacity_ratios', functools.partial(capacity_ratios, income_variance=0.0))
+    # The bike is projected at its logged pace of 300 a month; the car gets 364 of the 500 capacity against 400 needed
+    goals = [goal("Bike", 1200.0, 6, saved=300.0), goal("Car", 4800.0, 12)]
+    df = project_goals(goals, BUDGET)
+    deterministic = df['saved'] + df['monthly_projected'] * df['months_left'] >= df['goal_amount']
+    assert list(df['probability']) == [float(reached) for reached in deterministic]
+    assert list(df['status']) == ['achievable', 'not_achievable']
+    assert list(df['projected_months'] <= df['months_left']) == list(deterministic)
+
+
+def test_goal_analysis_key_follows_the_other_goals():
+    bike, car = goal("Bike", 1200.0, 6), goal("Car", 4800.0, 12)
+    alone = goal_analysis_key(goal_facts([bike], BUDGET)[0], BUDGET)
+    # Adding a goal shrinks the bike's share of the capacity, so its cached take is stale
+    shared = goal_analysis_key(goal_facts([bike, car], BUDGET)[0], BUDGET)
+    assert alone != shared
+    # Its position in the list does not matter
+    assert goal_analysis_key(goal_facts([car, bike], BUDGET)[1], BUDGET) == shared
@@ -0,0 +1,89 @@
+import json
+
+import streamlit as st
+
+from penny import store
+from penny.store import UserRepository, WriteBehindStore, compact_chat_history
+
+
+class FlakyRepository(UserRepository):
+    # Records applied writes; any batch touching a user in `broken` fails
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.applied = []
+        self.batches = 0
+
+    def apply(self, operations):
+        self.batches += 1
+        if any(user_id in self.broken for _, user_id, _ in operations):
+            raise RuntimeError("backend unavailable")
+        self.applied.extend(operations)
+
+
+def make_store(repository, tmp_path, max_retries=2):
+    # A long interval keeps the background thread out of the way; the tests flush by hand
+    return WriteBehindStore(repository, flush_interval=3600, max_retries=max_retries,
+                            dead_letter_path=str(tmp_path / "dead.jsonl"))
+
+
+def test_one_users_failure_does_not_block_another(tmp_path):
+    repository = FlakyRepository(broken={"bad@example.com"})
+    store = make_store(repository, tmp_path)
+    store.save_document("bad@example.com", "budget", {"income": 1})
+    store.save_document("good@example.com", "budget", {"income": 2})
+    store.flush()
+    assert repository.applied == [("save", "good@example.com", ("budget", {"income": 2}))]
+    assert [op[1] for op in store._pending] == ["bad@example.com"]
+
+
+def test_retried_writes_stay_ahead_of_newer_ones(tmp_path):
+    repository = FlakyRepository(broken={"u"})
+    store = make_store(repository, tmp_path)
+    store.append_messages("u", [{"seq": 0, "role": "user", "content": "a"}])
+    store.flush()
+    store.append_messages("u", [{"seq": 1, "role": "user", "content": "b"}])
+    repository.broken.clear()
+    store.flush()
+    assert [op[2][0]["seq"] for op in repository.applied] == [0, 1]
+    assert not store._pending
+
+
+def test_writes_are_dead_lettered_after_the_retry_cap(tmp_path):
+    repository = FlakyRepository(broken={"u"})
+    store = make_store(repository, tmp_path, max_retries=2)
+    store.save_document("u", "goals", [{"goal_name": "Car"}])
+    for _ in range(3):
+        store.flush()
+    assert not store._pending
+    assert not repository.applied
+    entries = [json.loads(line) for line in (tmp_path / "dead.jsonl").read_text().splitlines()]
+    assert [(e["op"], e["user_id"], e["payload"]) for e in entries] == [("save", "u", ["goals", [{"goal_name": "Car"}]])]
+    assert "backend unavailable" in entries[0]["error"]
+
+
+def test_only_the_failing_write_is_dead_lettered(tmp_path):
+    class PoisonRepository(FlakyRepository):
+        def apply(self, operations):
+            if any(op == "save" and payload[0] == "goals" for op, _, payload in operations):
+                raise TypeError("not serializable")
+            super().apply(operations)
+
+    repository = PoisonRepository()
+    store = make_store(repository, tmp_path, max_retries=0)
+    store.save_document("u", "goals", [object()])
+    store.save_document("u", "budget", {"income": 3})
+    store.flush()
+    assert repository.applied == [("save", "u", ("budget", {"income": 3}))]
+    assert len((tmp_path / "dead.jsonl").read_text().splitlines()) == 1
+
+
+def test_compaction_summarizes_turns_the_memory_has_not_reached(monkeypatch):
+    monkeypatch.setattr(store, 'CHAT_MEMORY_TURNS', 4)
+    st.session_state.messages = [{"seq": i, "role": "user", "content": f"Turn {i}."} for i in range(7)]
+    st.session_state.chat_window = 0
+    st.session_state.conversation_summary = ["User: Turn 0."]
+    st.session_state.summarized_upto = 1
+    compact_chat_history()
+    assert [m["seq"] for m in st.session_state.messages] == [3, 4, 5, 6]
+    assert st.session_state.conversation_summary == ["User: Turn 0.", "User: Turn 1.", "User: Turn 2."]
+    assert st.session_state.summarized_upto == 0
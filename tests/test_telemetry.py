@@ -0,0 +1,24 @@
+from penny.telemetry import SessionMemory, deep_sizeof
+
+
+def test_sessions_are_sampled_at_most_once_per_interval():
+    memory = SessionMemory()
+    assert memory.due("a", interval=60)
+    memory.record("a", {"messages": 100})
+    assert not memory.due("a", interval=60)
+    assert memory.due("a", interval=0)
+    assert memory.due("b", interval=60)
+
+
+def test_stats_summarize_the_sampled_sessions():
+    memory = SessionMemory()
+    memory.record("a", {"messages": 1024, "goals": 1024})
+    memory.record("b", {"messages": 2048})
+    stats = memory.stats()
+    assert (stats["sessions"], stats["total_kb"], stats["max_kb"]) == (2, 4.0, 2.0)
+    assert stats["largest_keys_kb"] == {"messages": 3.0, "goals": 1.0}
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    shared = list(range(1000, 2000))
+    assert deep_sizeof([shared, shared], set()) < deep_sizeof([shared, list(range(1000, 2000))], set())
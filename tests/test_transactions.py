@@ -0,0 +1,142 @@
+import os
+
+import pandas as pd
+import pytest
+
+from penny import transactions
+from penny.transactions import category_rules, csv_chunks, import_transactions, parse_amounts, parse_dates
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def run_import(name, data=None):
+    return import_transactions(name, fixture(name) if data is None else data, category_rules(), {'rows': 0})
+
+
+# --- Parsing ---
+
+def test_amounts_handle_currency_signs_and_separators():
+    values = pd.Series(["$1,500.00", "-1.234,50", "(45.25)", "12.50-", "(12,50)", "+15", " 7 ", "abc", "", None], dtype=str)
+    assert parse_amounts(values).tolist()[:7] == [1500.0, -1234.5, -45.25, -12.5, -12.5, 15.0, 7.0]
+    assert parse_amounts(values).iloc[7:].isna().all()
+
+
+def test_dates_parse_each_distinct_string_and_keep_missing_values():
+    dates = parse_dates(pd.Series(["01/03/2026", "01/03/2026", "bad", None, "01/04/2026"], dtype=str))
+    assert dates.iloc[[0, 1, 4]].dt.day.tolist() == [3, 3, 4]
+    assert dates.iloc[[2, 3]].isna().all()
+    assert parse_dates(pd.Series(["20260209"], dtype=str), "%Y%m%d").iloc[0] == pd.Timestamp("2026-02-09")
+
+
+def test_day_first_dates_are_recognised_from_any_value():
+    dates = parse_dates(pd.Series(["05/01/2024", "13/01/2024", "02/02/2024", "25/02/2024"], dtype=str))
+    assert dates.tolist() == [pd.Timestamp(d) for d in ("2024-01-05", "2024-01-13", "2024-02-02", "2024-02-25")]
+    # Only a month-first reading fits 01/13, and a column with neither stays month-first
+    assert parse_dates(pd.Series(["05/01/2024", "01/13/2024"], dtype=str)).dt.month.tolist() == [5, 1]
+    assert parse_dates(pd.Series(["05/01/2024"], dtype=str)).iloc[0] == pd.Timestamp("2024-05-01")
+
+
+def test_dates_of_an_empty_column():
+    assert parse_dates(pd.Series([None, None], dtype=str)).isna().all()
+
+
+@pytest.mark.parametrize("header", [
+    "Date,Description,Amount",
+    "\ufeff Transaction Date , Payee ,Amount (XCD),Balance",
+    "POSTED DATE,Memo,Value",
+])
+def test_columns_are_found_by_common_bank_names(header):
+    data = f"{header}\n01/03/2026,KFC,-12.50{',0' if 'Balance' in header else ''}\n".encode("utf-8")
+    dates, descriptions, amounts = next(csv_chunks(data))
+    assert dates.iloc[0] == pd.Timestamp("2026-01-03")
+    assert descriptions.iloc[0] == "KFC"
+    assert amounts.iloc[0] == -12.5
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"Date,Description\n01/01/2026,A\n", "Could not find a date and an amount column"),
+    (b"Description,Amount\nA,-1\n", "Could not find a date and an amount column"),
+    (b"", "This file is empty"),
+    (b"Date,Amount\n", "No transactions with a date and an amount"),
+    (b"Date,Amount\nsoon,\n", "No transactions with a date and an amount"),
+])
+def test_unusable_files_explain_why(data, message):
+    with pytest.raises(ValueError, match=message):
+        run_import("export.csv", data)
+
+
+# --- Whole files ---
+
+def test_csv_export_is_rolled_up_by_month_and_field():
+    result = run_import("checking.csv")
+    # "not a date" and the row without an amount are skipped
+    assert (result.rows, result.skipped) == (7, 2)
+    assert result.categories == {
+        'Rent': 500.0, 'Food': 45.25, 'Transport': 3.5, 'School supplies': 80.0, 'Entertainment': 15.99, 'Other': 20.0,
+    }
+    assert list(result.months.index) == ["2026-01", "2026-02"]
+    january, february = result.months.loc["2026-01"], result.months.loc["2026-02"]
+    assert (january['income'], january['rent'], january['food'], january['transport']) == (1500.0, 500.0, 45.25, 3.5)
+    # Categories without a budget field of their own count as liabilities
+    assert february['liabilities'] == pytest.approx(80.0 + 15.99 + 20.0)
+    assert february['spending'] == pytest.approx(115.99)
+
+
+def test_day_first_export_is_read_day_first_throughout():
+    result = run_import("day_first.csv")
+    assert (result.rows, result.skipped) == (5, 0)
+    assert list(result.months.index) == ["2024-01", "2024-02"]
+    january, february = result.months.loc["2024-01"], result.months.loc["2024-02"]
+    assert (january['income'], january['rent'], january['food']) == (1500.0, 500.0, 45.25)
+    assert (february['transport'], february['liabilities']) == (3.5, 15.99)
+
+
+def test_separate_debit_and_credit_columns():
+    result = run_import("debit_credit.csv")
+    march = result.months.loc["2026-03"]
+    # Debits count as spending whatever their sign; a row with neither is skipped
+    assert (result.rows, result.skipped) == (4, 1)
+    assert (march['income'], march['food'], march['transport']) == (258.0, 12.5, 40.0)
+
+
+def test_ofx_sgml_and_xml_give_the_same_result():
+    sgml, xml = run_import("statement_sgml.ofx"), run_import("statement_xml.ofx")
+    assert (sgml.rows, sgml.skipped) == (xml.rows, xml.skipped) == (3, 1)
+    assert sgml.categories == xml.categories == {'Rent': 500.0, 'Food': 45.25}
+    pd.testing.assert_frame_equal(sgml.months, xml.months)
+    assert sgml.months.loc["2026-01", 'income'] == 1500.0
+
+
+def test_ofx_extension_is_case_insensitive():
+    assert run_import("STATEMENT.QFX", fixture("statement_sgml.ofx")).rows == 3
+
+
+@pytest.mark.parametrize("name", ["checking.csv", "day_first.csv", "debit_credit.csv", "statement_sgml.ofx", "statement_xml.ofx"])
+def test_chunk_boundaries_do_not_change_the_result(name, monkeypatch):
+    whole = run_import(name)
+    monkeypatch.setattr(transactions, "IMPORT_CHUNK_ROWS", 2)
+    progress = {'rows': 0}
+    chunked = import_transactions(name, fixture(name), category_rules(), progress)
+    assert (chunked.rows, chunked.skipped, chunked.categories) == (whole.rows, whole.skipped, whole.categories)
+    pd.testing.assert_frame_equal(chunked.months, whole.months)
+    assert progress['rows'] == whole.rows + whole.skipped
+
+
+def test_malformed_csv_rows():
+    data = (
+        b"Date,Description,Amount\n"
+        b"01/01/2026,EXTRA FIELDS,-1,unexpected,values\n"
+        b"01/02/2026,\"QUOTED, WITH COMMA\",-2\n"
+        b"01/03/2026,Say \"hi\",-3\n"
+        b"01/04/2026\n"
+        b"\n"
+        b"01/05/2026,CR LF,-4\r\n"
+    )
+    result = run_import("export.csv", data)
+    assert (result.rows, result.skipped) == (4, 1)
+    assert result.categories == {'Other': 10.0}